@@ -5,6 +5,8 @@
 from django.db import models
 from django.db.models import DecimalField
 
+from query_optimizer.utils import required_fields
+
 __all__ = [
     "Apartment",
     "ApartmentProxy",
@@ -170,6 +172,7 @@ def __str__(self) -> str:
         return self.name
 
     @property
+    @required_fields("street_address", "postal_code__code", "city")
     def address(self) -> str:
         return f"{self.street_address}, {self.postal_code} {self.city}"
 
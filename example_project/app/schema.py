@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import itertools
 from typing import TYPE_CHECKING
 
 import graphene
@@ -9,7 +8,7 @@
 from graphene import relay
 from graphene_django.debug import DjangoDebug
 
-from query_optimizer import optimize
+from query_optimizer import optimize, optimize_union
 from query_optimizer.fields import DjangoConnectionField, DjangoListField
 from query_optimizer.selections import get_field_selections
 
@@ -19,6 +18,7 @@
     ApartmentType,
     BuildingNode,
     BuildingType,
+    BuildingWithBudgetType,
     ContentTypeType,
     DeveloperNode,
     DeveloperType,
@@ -51,7 +51,11 @@ class Query(graphene.ObjectType):
     all_housing_companies = DjangoListField(HousingCompanyType)
     all_real_estates = DjangoListField(RealEstateType)
     all_buildings = DjangoListField(BuildingType)
+    all_buildings_in_chunks = DjangoListField(BuildingType, chunk_size=2)
+    all_buildings_budgeted = DjangoListField(BuildingType, max_queries=1, max_rows=3)
+    all_buildings_with_budget = DjangoListField(BuildingWithBudgetType)
     all_apartments = DjangoListField(ApartmentType)
+    all_apartments_limited = DjangoListField(ApartmentType, max_limit=3)
     all_sales = DjangoListField(SaleType)
     all_owners = DjangoListField(OwnerType)
     all_ownerships = DjangoListField(OwnershipType)
@@ -69,6 +73,12 @@ def resolve_all_apartments(root: None, info: GQLInfo, **kwargs) -> models.QueryS
             info,
         )
 
+    first_apartment = graphene.Field(ApartmentType)
+
+    def resolve_first_apartment(root: None, info: GQLInfo) -> Apartment | None:
+        # Not optimized, so nested fields are resolved with their own resolvers.
+        return Apartment.objects.order_by("pk").first()
+
     housing_company_by_name = graphene.List(HousingCompanyType, name=graphene.String(required=True))
 
     def resolve_housing_company_by_name(root: None, info: GQLInfo, name: str) -> models.QuerySet[HousingCompany]:
@@ -91,10 +101,8 @@ def resolve_housing_company_by_name(root: None, info: GQLInfo, name: str) -> mod
     all_people = graphene.List(People)
 
     def resolve_all_people(root: None, info: GQLInfo) -> Iterable[Union[Developer, PropertyManager, Owner]]:
-        developers = optimize(Developer.objects.all(), info)
-        property_managers = optimize(PropertyManager.objects.all(), info)
-        owners = optimize(Owner.objects.all(), info)
-        return itertools.chain(developers, property_managers, owners)
+        querysets = [Developer.objects.all(), PropertyManager.objects.all(), Owner.objects.all()]
+        return optimize_union(querysets, info)
 
     all_tags = DjangoListField(TagType)
     all_content_types = DjangoListField(ContentTypeType)
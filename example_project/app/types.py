@@ -2,21 +2,25 @@
 from __future__ import annotations
 import graphene
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import F, Value
+from django.db.models import Count, F, Max, Q, Value
 from django.db.models.functions import Concat, ExtractYear
 from django_filters import CharFilter, FilterSet, OrderingFilter
 from graphene import relay, Connection, ObjectType
 
 from query_optimizer import DjangoObjectType
 from query_optimizer.fields import (
+    AggregateField,
     AnnotatedField,
     DjangoConnectionField,
     DjangoListField,
+    ExistsField,
     MultiField,
     RelatedField,
+    RelatedValuesField,
     ManuallyOptimizedField,
 )
 from query_optimizer.settings import optimizer_settings
+from query_optimizer.utils import required_fields
 from example_project.app.models import (
     Apartment,
     ApartmentProxy,
@@ -79,6 +83,7 @@
     "ApartmentNode",
     "ApartmentType",
     "BuildingType",
+    "BuildingWithBudgetType",
     "DeveloperType",
     "EmployeeNode",
     "EmployeeType",
@@ -166,6 +171,14 @@ class Meta:
         ]
 
 
+class HousingCompanyContactType(ObjectType):
+    manager_name = graphene.String()
+
+    @required_fields("property_manager__name")
+    def resolve_manager_name(root: HousingCompany, info: GQLInfo) -> str:
+        return root.property_manager.name
+
+
 class HousingCompanyType(DjangoObjectType):
     class Meta:
         model = HousingCompany
@@ -196,8 +209,43 @@ def resolve_greeting(root: HousingCompany, info: GQLInfo) -> str:
     def resolve_alias_greeting(root: HousingCompany, info: GQLInfo) -> str:
         return f"Hello {root.alias_greeting}!"
 
+    developer_names = RelatedValuesField("developers", "name", order_by=["name"])
+    shareholder_names = RelatedValuesField("shareholders", "name", filter=Q(share__gt=0), order_by=["-share", "name"])
+
+    address = graphene.String()
+    manager_email = graphene.String()
+    developer_list = graphene.String()
+    contact = graphene.Field(HousingCompanyContactType)
+
+    @required_fields("property_manager__email")
+    def resolve_manager_email(root: HousingCompany, info: GQLInfo) -> str:
+        return root.property_manager.email
+
+    @required_fields("developers__name")
+    def resolve_developer_list(root: HousingCompany, info: GQLInfo) -> str:
+        return ", ".join(developer.name for developer in root.developers.all())
+
+    def resolve_contact(root: HousingCompany, info: GQLInfo) -> HousingCompany:
+        return root
+
+    first_developer = graphene.Field(DeveloperType)
+    first_developer_declared = graphene.Field(DeveloperType)
+
+    def resolve_first_developer(root: HousingCompany, info: GQLInfo) -> Developer | None:
+        return root.developers.first()
+
+    @required_fields()
+    def resolve_first_developer_declared(root: HousingCompany, info: GQLInfo) -> Developer | None:
+        return root.developers.first()
+
 
 class RealEstateType(DjangoObjectType):
+    has_buildings = ExistsField("building_set", lambda: BuildingNode)
+    building_names = RelatedValuesField("building_set", "name", lambda: BuildingNode, order_by=["name"])
+    buildings_with_budget = DjangoListField(
+        "example_project.app.types.BuildingWithBudgetType", field_name="building_set"
+    )
+
     class Meta:
         model = RealEstate
         field = [
@@ -210,6 +258,22 @@ class Meta:
 
 class BuildingType(DjangoObjectType):
     real_estate_name = AnnotatedField(graphene.String, F("real_estate__name"))
+    apartment_count = AnnotatedField(graphene.Int, Count("apartments"))
+    number_of_apartments = AggregateField(graphene.Int, "apartments", Count("pk"))
+    number_of_apartments_with_sales = AggregateField(
+        graphene.Int,
+        "apartments",
+        Count("pk", distinct=True),
+        filter=Q(sales__isnull=False),
+    )
+    max_apartment_rooms = AggregateField(graphene.Int, "apartments", Max("rooms"))
+    real_estate_batched = RelatedField(RealEstateType, batch_by="pk")
+    limited_apartments = DjangoListField(
+        "example_project.app.types.ApartmentType", field_name="apartments", max_limit=2
+    )
+    budgeted_apartments = DjangoListField(
+        "example_project.app.types.ApartmentType", field_name="apartments", max_rows=1
+    )
 
     class Meta:
         model = Building
@@ -221,6 +285,24 @@ class Meta:
             "apartments",
         ]
 
+    @staticmethod
+    @required_fields("real_estate_id")
+    def resolve_real_estate_batched(root: Building, info: GQLInfo) -> int:
+        return root.real_estate_id
+
+
+class BuildingWithBudgetType(DjangoObjectType):
+    class Meta:
+        model = Building
+        fields = [
+            "pk",
+            "name",
+            "apartments",
+        ]
+        skip_registry = True
+        max_queries = 2
+        max_rows = 3
+
 
 class ApartmentType(DjangoObjectType):
     class Meta:
@@ -252,12 +334,40 @@ class Meta:
     def resolve_share_range(root: Apartment, info: GQLInfo) -> str:
         return f"{root.shares_start} - {root.shares_end}"
 
+    full_address = MultiField(
+        graphene.String,
+        fields=["apartment_number", "building__street_address", "building__real_estate__name"],
+    )
+
+    def resolve_full_address(root: Apartment, info: GQLInfo) -> str:
+        return f"{root.building.street_address} {root.apartment_number}, {root.building.real_estate.name}"
+
+    expensive_sales = DjangoListField("example_project.app.types.SaleType", field_name="sales")
+
+    @staticmethod
+    def prefetch_expensive_sales(queryset: QuerySet[Sale], info: GQLInfo) -> QuerySet[Sale]:
+        return queryset.filter(purchase_price__gte=100)
+
+    def resolve_expensive_sales(root: Apartment, info: GQLInfo) -> QuerySet[Sale]:
+        # Not called for nested fields, since the sales are prefetched using the hook above.
+        return root.sales.filter(purchase_price__gte=100)
+
+    building_alt = graphene.Field(BuildingType, source="building")
+    street_address_alt = graphene.String(source="street_address")
+
+    sale_dates = MultiField(graphene.String, fields=["sales__purchase_date"])
+
+    def resolve_sale_dates(root: Apartment, info: GQLInfo) -> str:
+        return ", ".join(sale.purchase_date.isoformat() for sale in root.sales.all())
+
     @classmethod
     def filter_queryset(cls, queryset: QuerySet, info: GQLInfo) -> QuerySet:
         return queryset.filter(rooms__isnull=False)
 
 
 class SaleType(DjangoObjectType):
+    prefetched_apartment = RelatedField(ApartmentType, field_name="apartment", strategy="prefetch_related")
+
     class Meta:
         model = Sale
         fields = [
@@ -274,6 +384,7 @@ def filter_queryset(cls, queryset: QuerySet, info: GQLInfo) -> QuerySet:
 
 
 class OwnerType(DjangoObjectType):
+    has_sales = ExistsField("sales", SaleType)
     pre_field = ManuallyOptimizedField(
         graphene.String,
         args={
@@ -444,6 +555,11 @@ class Meta:
 class BuildingNode(IsTypeOfProxyPatch, DjangoObjectType):
     apartments = DjangoConnectionField(ApartmentNode)
 
+    apartment_addresses = MultiField(graphene.String, fields=["apartments__street_address"])
+
+    def resolve_apartment_addresses(root: BuildingProxy, info: GQLInfo) -> str:
+        return ", ".join(sorted(apartment.street_address for apartment in root.apartments.all()))
+
     class Meta:
         model = BuildingProxy
         interfaces = (relay.Node,)
@@ -452,6 +568,7 @@ class Meta:
 
 class RealEstateNode(IsTypeOfProxyPatch, DjangoObjectType):
     building_set = DjangoConnectionField(BuildingNode)
+    buildings_by_subquery = DjangoConnectionField(BuildingNode, field_name="building_set", parent_subquery=True)
 
     class Meta:
         model = RealEstateProxy
@@ -505,6 +622,9 @@ class HousingCompanyNode(IsTypeOfProxyPatch, DjangoObjectType):
     property_manager_alt = RelatedField(lambda: PropertyManagerNode, field_name="property_manager")
     real_estates_alt = DjangoListField(RealEstateNode, field_name="real_estates")
 
+    real_estates_by_subquery = DjangoConnectionField(RealEstateNode, field_name="real_estates", parent_subquery=True)
+    developers_by_subquery = DjangoListField(DeveloperNode, field_name="developers", parent_subquery=True)
+
     shareholders = DjangoConnectionField(ShareholderNode)
 
     idx = graphene.Field(graphene.Int)
@@ -517,6 +637,12 @@ def resolve_idx(root: HousingCompanyProxy, info: GQLInfo) -> int:
     def resolve_developer_id(root: HousingCompanyProxy, info: GQLInfo) -> list[int]:
         return getattr(root, "_prefetch_related_val_developer_id", -1)
 
+    developer_list = graphene.String()
+
+    @required_fields("developers__name")
+    def resolve_developer_list(root: HousingCompanyProxy, info: GQLInfo) -> str:
+        return ", ".join(developer.name for developer in root.developers.all())
+
     class Meta:
         model = HousingCompanyProxy
         interfaces = (relay.Node,)
@@ -5,8 +5,11 @@
 from django.urls import include, path
 from graphene_django.views import GraphQLView
 
+from query_optimizer.views import OptimizedGraphQLView
+
 urlpatterns = [
     path("graphql/", GraphQLView.as_view(graphiql=True)),
+    path("graphql/optimized/", OptimizedGraphQLView.as_view()),
     path("admin/", admin.site.urls),
 ]
 
@@ -1,26 +1,47 @@
 # Import all converters at the top to make sure they are registered first
 from __future__ import annotations
 
-from .compiler import optimize, optimize_single
+from .compiler import (
+    aoptimize,
+    aoptimize_single,
+    aoptimize_union,
+    optimize,
+    optimize_in_chunks,
+    optimize_single,
+    optimize_union,
+)
 from .converters import *  # noqa: F403
 from .fields import (
+    AggregateField,
     AnnotatedField,
     DjangoConnectionField,
     DjangoListField,
+    ExistsField,
     ManuallyOptimizedField,
     MultiField,
     RelatedField,
+    RelatedValuesField,
 )
 from .types import DjangoObjectType
+from .utils import required_fields
 
 __all__ = [
+    "AggregateField",
     "AnnotatedField",
     "DjangoConnectionField",
     "DjangoListField",
     "DjangoObjectType",
+    "ExistsField",
     "ManuallyOptimizedField",
     "MultiField",
     "RelatedField",
+    "RelatedValuesField",
+    "aoptimize",
+    "aoptimize_single",
+    "aoptimize_union",
     "optimize",
+    "optimize_in_chunks",
     "optimize_single",
+    "optimize_union",
+    "required_fields",
 ]
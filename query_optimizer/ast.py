@@ -2,6 +2,7 @@
 
 import contextlib
 from contextlib import suppress
+from functools import partial
 from types import MethodType
 from typing import TYPE_CHECKING
 
@@ -9,7 +10,8 @@
 from django.db.models import ForeignKey
 from graphene import Connection, ObjectType, PageInfo
 from graphene.relay.node import AbstractNode
-from graphene.types.definitions import GrapheneObjectType, GrapheneUnionType
+from graphene.types.definitions import GrapheneInterfaceType, GrapheneObjectType, GrapheneUnionType
+from graphene.types.field import source_resolver
 from graphene.types.union import Union as GrapheneUnion
 from graphene.utils.str_converters import to_snake_case
 from graphene_django import DjangoObjectType
@@ -22,12 +24,12 @@
 from .typing import GRAPHQL_BUILTIN, Union, overload
 
 if TYPE_CHECKING:
+    import graphene
     from django.db.models import Field, Model
     from graphene.types.base import BaseOptions
-    from graphene.types.definitions import GrapheneInterfaceType
     from graphql import FragmentDefinitionNode, GraphQLField, GraphQLOutputType, GraphQLSchema
 
-    from .typing import GQLInfo, ModelField, ToManyField, ToOneField, TypeGuard
+    from .typing import GQLInfo, ModelField, PrefetchHook, ToManyField, ToOneField, TypeGuard
 
 __all__ = [
     "GraphQLASTWalker",
@@ -160,8 +162,25 @@ def handle_to_one_field(
         graphene_type = self.get_graphene_type(field_type, field_node)
         selections = get_selections(field_node)
         self.increase_complexity()
+        # Generic foreign keys can point to any model, so handle the selections for each possible model separately.
+        if related_model is None and isinstance(graphene_type, GrapheneUnionType | GrapheneInterfaceType):
+            for possible_type in self.info.schema.get_possible_types(graphene_type):
+                model: type[Model] | None = getattr(possible_type.graphene_type._meta, "model", None)
+                if model is not None:
+                    self.handle_generic_model(graphene_type, selections, model)
+            return None
         return self.handle_selections(graphene_type, selections)
 
+    def handle_generic_model(
+        self,
+        field_type: GrapheneUnionType | GrapheneInterfaceType,
+        selections: Selections,
+        model: type[Model],
+    ) -> None:
+        # Only fragments for the given model are handled.
+        with self.use_model(model):
+            return self.handle_selections(field_type, selections)
+
     def handle_to_many_field(
         self,
         field_type: GrapheneObjectType,
@@ -194,13 +213,19 @@ def handle_page_info(self, field_type: GrapheneObjectType, field_node: FieldNode
     def handle_fragment_spread(self, field_type: GrapheneObjectType, fragment_spread: FragmentSpreadNode) -> None:
         name = fragment_spread.name.value
         fragment_definition = self.info.fragments[name]
+        # Fragments on abstract types should only be handled for the model matching the type condition.
+        if (
+            isinstance(field_type, GrapheneUnionType)
+            and fragment_definition.type_condition.name.value != field_type.name
+        ):
+            return self.handle_inline_fragment(field_type, fragment_definition)
         selections = get_selections(fragment_definition)
         return self.handle_selections(field_type, selections)
 
     def handle_inline_fragment(
         self,
         field_type: GrapheneUnionType | GrapheneInterfaceType,
-        inline_fragment: InlineFragmentNode,
+        inline_fragment: InlineFragmentNode | FragmentDefinitionNode,
     ) -> None:
         fragment_type = get_fragment_type(field_type, inline_fragment, self.info.schema)
         graphene_options: BaseOptions = fragment_type.graphene_type._meta
@@ -289,6 +314,63 @@ def is_foreign_key_id(field: Field, field_node: FieldNode) -> bool:
     return isinstance(field, ForeignKey) and field.get_attname() == to_snake_case(field_node.name.value)
 
 
+def is_pk_foreign_key(field: Field) -> TypeGuard[ForeignKey]:
+    """Is the field a foreign key that references the primary key of the related model?"""
+    return isinstance(field, ForeignKey) and field.target_field == field.related_model._meta.pk
+
+
+def is_pk_only_selection(
+    field_node: FieldNode,
+    graphene_type: type[DjangoObjectType],
+    fragments: dict[str, FragmentDefinitionNode],
+) -> bool:
+    """
+    Check if the given field node only selects the primary key (or `__typename`)
+    of the object type's model, meaning that the related object doesn't need to be fetched.
+    """
+    pk_field: Field = graphene_type._meta.model._meta.pk
+    pk_names = {"pk", pk_field.name, pk_field.attname}
+    # The relay global ID is also derived from the primary key.
+    if any(issubclass(interface, AbstractNode) for interface in graphene_type._meta.interfaces):
+        pk_names.add("id")
+    return _only_selects(get_selections(field_node), pk_names, fragments)
+
+
+def _only_selects(selections: Selections, names: set[str], fragments: dict[str, FragmentDefinitionNode]) -> bool:
+    for selection in selections:
+        if isinstance(selection, FieldNode):
+            field_name = to_snake_case(selection.name.value)
+            if field_name != "__typename" and field_name not in names:
+                return False
+
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment_definition = fragments[selection.name.value]
+            if not _only_selects(get_selections(fragment_definition), names, fragments):
+                return False
+
+        elif not _only_selects(get_selections(selection), names, fragments):
+            return False
+
+    return True
+
+
+def get_field_source(field: graphene.Field | None) -> str | None:
+    """Get the attribute name given as the `source` argument for the given graphene field, if any."""
+    resolver = getattr(field, "resolver", None)
+    if isinstance(resolver, partial) and resolver.func is source_resolver:
+        return resolver.args[0]
+    return None
+
+
+def get_prefetch_hook(graphene_type: type[ObjectType], field_name: str) -> PrefetchHook | None:
+    """
+    Get the `prefetch_{field_name}` hook defined on the given object type for a to-many field, if any.
+    The hook is used for modifying the prefetched queryset for the field for all parent instances at once.
+    """
+    hook = getattr(graphene_type, f"prefetch_{to_snake_case(field_name)}", None)
+    return hook if callable(hook) else None
+
+
 def is_to_many(field: Field) -> TypeGuard[ToManyField]:
     return bool(field.one_to_many or field.many_to_many)
 
@@ -299,7 +381,7 @@ def is_to_one(field: Field) -> TypeGuard[ToOneField]:
 
 def get_fragment_type(
     field_type: GrapheneUnionType | GrapheneInterfaceType,
-    inline_fragment: InlineFragmentNode,
+    inline_fragment: InlineFragmentNode | FragmentDefinitionNode,
     schema: GraphQLSchema,
 ) -> GrapheneObjectType:
     fragment_type_name = inline_fragment.type_condition.name.value
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from graphene import Connection
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.registry import get_global_registry
+
+from .ast import get_underlying_type
+from .errors import OptimizerError
+from .settings import optimizer_settings
+
+if TYPE_CHECKING:
+    from django.db.models import Model, QuerySet
+    from graphene_django import DjangoObjectType
+
+    from .typing import Any, Callable, Generator, GQLInfo, Iterable
+
+
+__all__ = [
+    "ResourceBudget",
+    "acount_with_budget",
+    "count_rows",
+    "count_with_budget",
+    "create_field_budget",
+    "create_operation_budget",
+    "get_budget",
+    "get_limits",
+    "get_object_type",
+    "get_operation_budget",
+    "set_budget",
+    "use_budget",
+]
+
+
+_current_budget: ContextVar[ResourceBudget | None] = ContextVar("optimizer_resource_budget", default=None)
+_operation_budget_lock = threading.Lock()
+
+
+class ResourceBudget:
+    """
+    Tracks the database resources used while evaluating optimized querysets, and raises an error
+    when any of them exceeds its limit. A budget can have a parent budget, e.g., the budget
+    of a single field can be a part of the budget of the whole operation, in which case
+    the resources are counted towards both budgets.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queries: int | None = None,
+        max_rows: int | None = None,
+        max_db_time: float | None = None,
+        name: str = "Operation",
+        parent: ResourceBudget | None = None,
+    ) -> None:
+        """
+        Create a new budget.
+
+        :param max_queries: Maximum number of SQL queries that can be made.
+        :param max_rows: Maximum number of model instances that can be fetched.
+        :param max_db_time: Maximum time in seconds that can be spent executing SQL queries.
+        :param name: Name of the budget used in error messages.
+        :param parent: Budget the resources should also be counted towards.
+        """
+        self.max_queries = max_queries or None
+        self.max_rows = max_rows or None
+        self.max_db_time = max_db_time or None
+        self.name = name
+        self.parent = parent
+        self.queries: int = 0
+        self.rows: int = 0
+        self.db_time: float = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def counts_rows(self) -> bool:
+        """Should fetched rows be counted for this budget or any of its parents?"""
+        return self.max_rows is not None or (self.parent is not None and self.parent.counts_rows)
+
+    def add_query(self) -> None:
+        with self.lock:
+            self.queries += 1
+            if self.max_queries is not None and self.queries > self.max_queries:
+                msg = f"{self.name} exceeds the maximum allowed of {self.max_queries} database queries"
+                raise OptimizerError(msg)
+
+        if self.parent is not None:
+            self.parent.add_query()
+
+    def add_rows(self, count: int) -> None:
+        with self.lock:
+            self.rows += count
+            if self.max_rows is not None and self.rows > self.max_rows:
+                msg = f"{self.name} exceeds the maximum allowed of {self.max_rows} fetched rows"
+                raise OptimizerError(msg)
+
+        if self.parent is not None:
+            self.parent.add_rows(count)
+
+    def add_db_time(self, seconds: float) -> None:
+        with self.lock:
+            self.db_time += seconds
+            if self.max_db_time is not None and self.db_time > self.max_db_time:
+                msg = f"{self.name} exceeds the maximum allowed of {self.max_db_time} seconds of database time"
+                raise OptimizerError(msg)
+
+        if self.parent is not None:
+            self.parent.add_db_time(seconds)
+
+
+def get_operation_budget(info: GQLInfo) -> ResourceBudget | None:
+    """
+    Get the budget for the whole GraphQL operation, stored in the request context.
+    Limits are set with the `MAX_QUERIES`, `MAX_ROWS` and `MAX_DB_TIME` settings.
+    Returns None if none of the limits have been set.
+
+    The budget should be created once per operation with `create_operation_budget`,
+    e.g., by the view or the execution context. If it hasn't been, it's created here.
+    """
+    if not (optimizer_settings.MAX_QUERIES or optimizer_settings.MAX_ROWS or optimizer_settings.MAX_DB_TIME):
+        return None
+
+    # Without a context, the budget only covers a single evaluation.
+    if info.context is None:
+        return create_operation_budget()
+
+    budget: ResourceBudget | None = getattr(info.context, "optimizer_budget", None)
+    if budget is not None:
+        return budget
+
+    # Root fields can be resolved concurrently, so make sure they all get the same budget.
+    with _operation_budget_lock:
+        budget = getattr(info.context, "optimizer_budget", None)
+        if budget is None:
+            budget = info.context.optimizer_budget = create_operation_budget()
+    return budget
+
+
+def create_operation_budget() -> ResourceBudget | None:
+    """Create a new budget for a GraphQL operation. Returns None if none of the limits have been set."""
+    if not (optimizer_settings.MAX_QUERIES or optimizer_settings.MAX_ROWS or optimizer_settings.MAX_DB_TIME):
+        return None
+
+    return ResourceBudget(
+        max_queries=optimizer_settings.MAX_QUERIES,
+        max_rows=optimizer_settings.MAX_ROWS,
+        max_db_time=optimizer_settings.MAX_DB_TIME,
+    )
+
+
+def get_budget(info: GQLInfo, model: type[Model]) -> ResourceBudget | None:
+    """
+    Get the budget for evaluating a queryset of the given model for the field in the given GraphQLResolveInfo.
+    Limits set on the field take precedence over the limits set in the Meta-class of the model's ObjectType.
+    If neither has any limits, returns the operation budget.
+    """
+    operation_budget = get_operation_budget(info)
+
+    parent_options = getattr(getattr(info.parent_type, "graphene_type", None), "_meta", None)
+    field = getattr(parent_options, "fields", {}).get(to_snake_case(info.field_name))
+    limits = get_limits(field, get_object_type(info.return_type, model))
+    return create_field_budget(limits, info.field_name, parent=operation_budget)
+
+
+def get_limits(field: Any, object_type: type[DjangoObjectType] | None) -> dict[str, Any]:
+    """
+    Get the resource limits set on the given field. Limits not set on the field
+    are taken from the Meta-class of the given ObjectType. Returns an empty dict if neither has any limits.
+    """
+    options = getattr(object_type, "_meta", None)
+    limits: dict[str, Any] = {}
+    for limit in ("max_queries", "max_rows", "max_db_time"):
+        value = getattr(field, limit, None)
+        limits[limit] = value if value is not None else getattr(options, limit, None)
+    return limits if any(limits.values()) else {}
+
+
+def create_field_budget(
+    limits: dict[str, Any],
+    field_name: str,
+    parent: ResourceBudget | None,
+) -> ResourceBudget | None:
+    """
+    Create a budget with the given limits for evaluating the field with the given name,
+    counting its resources also towards the given parent budget. Returns the parent budget if there are no limits.
+    """
+    if not limits:
+        return parent
+    return ResourceBudget(**limits, name=f"Field {field_name!r}", parent=parent)
+
+
+def get_object_type(return_type: Any, model: type[Model]) -> type[DjangoObjectType] | None:
+    """
+    Get the ObjectType the given GraphQL return type returns the model's instances as.
+    Falls back to the ObjectType registered for the model, e.g., for relay nodes.
+    """
+    object_type = getattr(get_underlying_type(return_type), "graphene_type", None)
+    if isinstance(object_type, type) and issubclass(object_type, Connection):
+        object_type = object_type._meta.node
+    if getattr(getattr(object_type, "_meta", None), "model", None) is model:
+        return object_type
+    return get_global_registry().get_type_for_model(model)
+
+
+def set_budget(queryset: QuerySet, budget: ResourceBudget | None) -> None:
+    """Set the budget the given queryset should be evaluated with to its hints."""
+    if budget is None:
+        queryset._hints.pop(optimizer_settings.RESOURCE_BUDGET_KEY, None)
+    else:
+        queryset._hints[optimizer_settings.RESOURCE_BUDGET_KEY] = budget
+
+
+@contextmanager
+def use_budget(budget: ResourceBudget | None, using: str) -> Generator[None, None, None]:
+    """
+    Track the resources used in the context against the given budget, or the budget currently in use,
+    if no budget is given. Queries are tracked with an execute wrapper on the given database connection.
+    """
+    if budget is None:
+        budget = _current_budget.get()
+    if budget is None:
+        yield
+        return
+
+    token = _current_budget.set(budget)
+    connection = connections[using]
+    try:
+        # Nested evaluations use the wrapper added by the outermost one.
+        if _track_query in connection.execute_wrappers:
+            yield
+        else:
+            with connection.execute_wrapper(_track_query):
+                yield
+    finally:
+        _current_budget.reset(token)
+
+
+def _track_query(execute: Callable[..., Any], sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:  # noqa: FBT001
+    budget = _current_budget.get()
+    if budget is None:  # pragma: no cover
+        return execute(sql, params, many, context)
+
+    budget.add_query()
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    budget.add_db_time(time.perf_counter() - start)
+    return result
+
+
+def count_with_budget(queryset: QuerySet) -> int:
+    """Count the rows of the given queryset, tracking the count query against the queryset's budget."""
+    budget = queryset._hints.get(optimizer_settings.RESOURCE_BUDGET_KEY)
+    with use_budget(budget, queryset.db):
+        return queryset.count()
+
+
+async def acount_with_budget(queryset: QuerySet) -> int:
+    """Count the rows of the given queryset in an async context, tracking the count query against its budget."""
+    # Like Django's own 'acount', the query is made in a thread sensitive 'sync_to_async' call.
+    return await sync_to_async(count_with_budget)(queryset)
+
+
+def count_rows(iterator: Iterable[Model]) -> Iterable[Model]:
+    """Count the model instances fetched by the given iterator towards the budget currently in use."""
+    budget = _current_budget.get()
+    if budget is None or not budget.counts_rows:
+        yield from iterator
+        return
+
+    for instance in iterator:
+        budget.add_rows(1)
+        yield instance
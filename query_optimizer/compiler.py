@@ -1,33 +1,66 @@
 from __future__ import annotations
 
 import contextlib
+from functools import cached_property
+from inspect import getattr_static
+from itertools import chain
 from typing import TYPE_CHECKING
 
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.db.models import ForeignKey, ManyToOneRel
+from django.db.models.constants import LOOKUP_SEP
+from graphene import Connection
+from graphene.types.definitions import GrapheneObjectType
 from graphene.utils.str_converters import to_snake_case
-
-from .ast import GraphQLASTWalker
+from graphene_django import DjangoObjectType
+
+from .ast import (
+    GraphQLASTWalker,
+    get_field_source,
+    get_model_field,
+    get_prefetch_hook,
+    get_related_model,
+    get_selections,
+    get_underlying_type,
+    is_pk_foreign_key,
+    is_pk_only_selection,
+    is_to_many,
+    is_to_one,
+)
+from .budgets import get_limits, get_object_type
 from .errors import OptimizerError
 from .optimizer import QueryOptimizer
-from .prefetch_hack import evaluate_with_prefetch_hack
+from .prefetch_hack import (
+    aevaluate_with_prefetch_hack,
+    evaluate_concurrently,
+    evaluate_in_chunks,
+    evaluate_with_prefetch_hack,
+)
 from .settings import optimizer_settings
-from .utils import is_optimized, maybe_queryset, optimizer_logger, swappable_by_subclassing
+from .utils import is_optimized, is_running_async, maybe_queryset, optimizer_logger, swappable_by_subclassing
 
 if TYPE_CHECKING:
     import graphene
     from django.db import models
     from django.db.models import Manager, Model, QuerySet
-    from graphene.types.definitions import GrapheneObjectType
+    from graphene.types.definitions import GrapheneInterfaceType, GrapheneUnionType
     from graphql import FieldNode
 
-    from .typing import PK, GQLInfo, TModel, ToManyField, ToOneField, Union
+    from .ast import Selections
+    from .fields import RelatedField
+    from .typing import PK, GQLInfo, Hashable, Iterable, TModel, ToManyField, ToOneField, Union
+    from .views import PlanCache
 
 
 __all__ = [
     "OptimizationCompiler",
+    "aoptimize",
+    "aoptimize_single",
+    "aoptimize_union",
     "optimize",
+    "optimize_in_chunks",
     "optimize_single",
+    "optimize_union",
 ]
 
 
@@ -46,6 +79,25 @@ def optimize(
     return queryset
 
 
+def optimize_in_chunks(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    chunk_size: int,
+    max_complexity: int | None = None,
+) -> Iterable[TModel]:
+    """
+    Optimize the given queryset according to the field selections received in the GraphQLResolveInfo,
+    but evaluate it lazily in chunks of the given size. Prefetches are made separately for each chunk,
+    so memory usage is proportional to the chunk size rather than the size of the whole result.
+    """
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is not None:
+        queryset = optimizer.optimize_queryset(queryset)
+
+    return chain.from_iterable(evaluate_in_chunks(queryset, chunk_size=chunk_size))
+
+
 def optimize_single(
     queryset: QuerySet[TModel],
     info: GQLInfo,
@@ -67,6 +119,76 @@ def optimize_single(
     return next(iter(queryset), None)
 
 
+def optimize_union(
+    querysets: Iterable[QuerySet],
+    info: GQLInfo,
+    *,
+    max_complexity: int | None = None,
+) -> list[Model]:
+    """
+    Optimize the given querysets for a field that returns a union or an interface of model object types.
+    Each queryset is optimized separately according to the fragments selected for its model's object type.
+    If `CONCURRENT_UNION_MAX_WORKERS` is set, the querysets are evaluated concurrently.
+    Returns the model instances from all querysets, in the order the querysets were given.
+    """
+    querysets = [_optimize_lazily(queryset, info, max_complexity=max_complexity) for queryset in querysets]
+    max_workers = 0 if is_running_async() else optimizer_settings.CONCURRENT_UNION_MAX_WORKERS
+    return list(chain.from_iterable(evaluate_concurrently(querysets, max_workers=max_workers)))
+
+
+def _optimize_lazily(queryset: QuerySet[TModel], info: GQLInfo, *, max_complexity: int | None) -> QuerySet[TModel]:
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is not None:
+        queryset = optimizer.optimize_queryset(queryset)
+    return queryset
+
+
+async def aoptimize(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    max_complexity: int | None = None,
+) -> QuerySet[TModel]:
+    """Async version of `optimize`. Use this during async GraphQL execution."""
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is not None:
+        queryset = optimizer.optimize_queryset(queryset)
+        await aevaluate_with_prefetch_hack(queryset)
+
+    return queryset
+
+
+async def aoptimize_single(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    pk: PK,
+    max_complexity: int | None = None,
+) -> TModel | None:
+    """Async version of `optimize_single`. Use this during async GraphQL execution."""
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is None:  # pragma: no cover
+        return await queryset.filter(pk=pk).afirst()
+
+    queryset = optimizer.optimize_queryset(queryset.filter(pk=pk))
+    instances = await aevaluate_with_prefetch_hack(queryset)
+    return next(iter(instances), None)
+
+
+async def aoptimize_union(
+    querysets: Iterable[QuerySet],
+    info: GQLInfo,
+    *,
+    max_complexity: int | None = None,
+) -> list[Model]:
+    """Async version of `optimize_union`. Use this during async GraphQL execution."""
+    instances: list[Model] = []
+    for queryset in querysets:
+        queryset = _optimize_lazily(queryset, info, max_complexity=max_complexity)  # noqa: PLW2901
+        instances.extend(await aevaluate_with_prefetch_hack(queryset))
+    return instances
+
+
 @swappable_by_subclassing
 class OptimizationCompiler(GraphQLASTWalker):
     """Class for compiling SQL optimizations based on the given query."""
@@ -82,6 +204,7 @@ def __init__(self, info: GQLInfo, max_complexity: int | None = None) -> None:
         self.max_complexity = max_complexity or optimizer_settings.MAX_COMPLEXITY
         self.optimizer: QueryOptimizer = None  # type: ignore[assignment]
         self.to_attr: str | None = None
+        self.field_node: FieldNode | None = None
         super().__init__(info)
 
     def compile(self, queryset: Union[QuerySet, Manager, list[Model]]) -> QueryOptimizer | None:
@@ -97,6 +220,14 @@ def compile(self, queryset: Union[QuerySet, Manager, list[Model]]) -> QueryOptim
         if is_optimized(queryset):
             return None
 
+        # Reuse optimizations compiled during a previous execution of the same GraphQL document, if available.
+        # The plan cache is specific to the document, so plans are identified by the field's path in it.
+        plan_cache: PlanCache | None = getattr(self.info.context, "optimizer_plan_cache", None)
+        plan_key = self.get_plan_key(queryset.model)
+        plan = plan_cache.get(plan_key) if plan_cache is not None else None
+        if plan is not None:
+            return plan.clone(self.info)
+
         # Setup initial state.
         self.model = queryset.model
         self.optimizer = QueryOptimizer(model=queryset.model, info=self.info)
@@ -116,8 +247,20 @@ def compile(self, queryset: Union[QuerySet, Manager, list[Model]]) -> QueryOptim
                 raise
             return None
 
+        # Optimizers are modified when they are used, so cache a clean copy
+        # that isn't bound to this request's GraphQLResolveInfo.
+        if plan_cache is not None:
+            plan_cache.set(plan_key, self.optimizer.clone(info=None))
+
         return self.optimizer
 
+    def get_plan_key(self, model: type[Model]) -> Hashable:
+        """Key for the optimizations compiled for the given model for the current field in the plan cache."""
+        operation_name = getattr(self.info.operation.name, "value", None)
+        # List indices are left out, since the plan is the same for all items in a list.
+        path = tuple(key for key in self.info.path.as_list() if isinstance(key, str))
+        return (operation_name, path, self.info.parent_type.name, model._meta.label, self.max_complexity)
+
     def increase_complexity(self) -> None:
         super().increase_complexity()
         if self.complexity > self.max_complexity:
@@ -134,24 +277,37 @@ def handle_to_one_field(
         related_field: ToOneField,
         related_model: type[Model] | None,
     ) -> None:
-        name = self.get_related_field_name(related_field)
-        optimizer = QueryOptimizer(model=related_model, info=self.info, name=name, parent=self.optimizer)
-
-        if isinstance(related_field, GenericForeignKey):
-            optimizer = self.optimizer.prefetch_related.setdefault(name, optimizer)
-        else:
-            optimizer = self.optimizer.select_related.setdefault(name, optimizer)
-
-        if isinstance(related_field, ForeignKey):
+        # If only the primary key of the related object is needed, it can be read from
+        # the foreign key on this model, so the related table doesn't need to be joined.
+        if self.is_pk_only_to_one_field(field_type, field_node, related_field):
             self.optimizer.related_fields.append(related_field.attname)
+            self.optimizer.pk_only_relations.add(related_field.name)
+            return
 
-        if isinstance(related_field, GenericForeignKey):
-            self.optimizer.related_fields.append(related_field.ct_field)
-            self.optimizer.related_fields.append(related_field.fk_field)
+        optimizer = self.get_to_one_optimizer(related_field, related_model)
+
+        if not isinstance(related_field, GenericForeignKey):
+            # Related fields can define whether they should be joined or prefetched.
+            field = field_type.graphene_type._meta.fields.get(to_snake_case(field_node.name.value))
+            strategy = getattr(field, "strategy", None)
+            if strategy is not None:
+                optimizer.strategy = strategy
 
         with self.use_optimizer(optimizer):
             super().handle_to_one_field(field_type, field_node, related_field, related_model)
 
+    def handle_generic_model(
+        self,
+        field_type: GrapheneUnionType | GrapheneInterfaceType,
+        selections: Selections,
+        model: type[Model],
+    ) -> None:
+        # Each model a generic foreign key can point to gets its own queryset in the generic prefetch.
+        optimizer = QueryOptimizer(model=model, info=self.info, name=self.optimizer.name, parent=self.optimizer)
+        optimizer = self.optimizer.generic_prefetches.setdefault(model, optimizer)
+        with self.use_optimizer(optimizer):
+            return super().handle_generic_model(field_type, selections, model)
+
     def handle_to_many_field(
         self,
         field_type: GrapheneObjectType,
@@ -164,15 +320,23 @@ def handle_to_many_field(
         key = self.to_attr if self.to_attr is not None else alias if alias is not None else name
         self.to_attr = None
 
-        optimizer = QueryOptimizer(model=related_model, info=self.info, name=name, parent=self.optimizer)
-        optimizer = self.optimizer.prefetch_related.setdefault(key, optimizer)
+        optimizer = self.get_to_many_optimizer(related_field, related_model, key)
 
-        if isinstance(related_field, ManyToOneRel):
-            optimizer.related_fields.append(related_field.field.attname)
+        # Object types can define a hook for modifying the prefetched queryset for all parents at once.
+        prefetch_hook = get_prefetch_hook(field_type.graphene_type, field_node.name.value)
+        if prefetch_hook is not None:
+            optimizer.prefetch_hook = prefetch_hook
 
-        if isinstance(related_field, GenericRelation):
-            optimizer.related_fields.append(related_field.object_id_field_name)
-            optimizer.related_fields.append(related_field.content_type_field_name)
+        # Related fields can define whether they should be filtered by a subquery of the parent query.
+        field = field_type.graphene_type._meta.fields.get(to_snake_case(field_node.name.value))
+        if getattr(field, "parent_subquery", False):
+            optimizer.parent_subquery = True
+
+        # Limits set on the field or its object type are tracked with a separate budget for the prefetch.
+        if related_model is not None:
+            return_type = field_type.fields[field_node.name.value].type
+            optimizer.budget_limits = get_limits(field, get_object_type(return_type, related_model))
+            optimizer.budget_field_name = field_node.name.value
 
         with self.use_optimizer(optimizer):
             super().handle_to_many_field(field_type, field_node, related_field, related_model)
@@ -196,6 +360,10 @@ def handle_custom_field(self, field_type: GrapheneObjectType, field_node: FieldN
             optimizer_logger.warning(msg)
             return None
 
+        # Batched related fields are loaded separately after the instances on this level have been fetched.
+        if getattr(field, "batch_by", None) is not None:
+            return self.handle_batched_field(field_type, field_node, field)
+
         # `RelatedField`, `DjangoListField` and `DjangoConnectionField` can define a
         # 'field_name' attribute to specify the actual model field name.
         actual_field_name: str | None = getattr(field, "field_name", None)
@@ -204,10 +372,206 @@ def handle_custom_field(self, field_type: GrapheneObjectType, field_node: FieldN
             return self.handle_model_field(field_type, field_node, actual_field_name)
 
         if hasattr(field, "optimizer_hook") and callable(field.optimizer_hook):
-            field.optimizer_hook(self)
+            # Hooks can use the field node to find the field's alias.
+            self.field_node = field_node
+            try:
+                field.optimizer_hook(self)
+            finally:
+                self.field_node = None
+            return None
+
+        # Plain graphene fields can use the `source` argument to resolve a model field with a different name.
+        source = get_field_source(field)
+        model_field = get_model_field(self.model, source) if source is not None else None
+        if model_field is not None:
+            # Prefetch to the relation's default cache, since the field's resolver will read the relation.
+            if is_to_many(model_field):
+                self.to_attr = self.get_related_field_name(model_field)
+            return self.handle_model_field(field_type, field_node, source)
+
+        # Custom resolvers and model properties can declare the model fields they need.
+        required_fields = self.get_required_fields(field_type, field_node, model=self.model)
+        if required_fields is None:
+            self.report_unoptimized_field(field_type, field_node)
+        else:
+            self.add_required_fields(required_fields)
+        return self.handle_plain_object_selections(field_type, field_node)
+
+    def handle_batched_field(self, field_type: GrapheneObjectType, field_node: FieldNode, field: RelatedField) -> None:
+        """
+        Register a loader for a related field whose resolver returns a key for the related object.
+        The field's selections are compiled when the related objects are loaded, so they are not walked here.
+        """
+        self.add_required_fields(self.get_required_fields(field_type, field_node, model=self.model) or ())
+        self.optimizer.batch_fields[id(field_node)] = field
+
+    def handle_plain_object_type(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        # Fields on plain object types used as wrappers for the model instance
+        # can declare the model fields they need in their resolvers.
+        self.add_required_fields(self.get_required_fields(field_type, field_node, model=None) or ())
+        return self.handle_plain_object_selections(field_type, field_node)
+
+    def handle_plain_object_selections(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        """If the field's type is a plain object type, look for required fields from its selections."""
+        graphene_type = self.get_graphene_type(field_type, field_node)
+        if not isinstance(graphene_type, GrapheneObjectType):
             return None
+        if issubclass(graphene_type.graphene_type, DjangoObjectType | Connection):
+            return None
+
+        selections = get_selections(field_node)
+        return self.handle_selections(graphene_type, selections)
+
+    def get_required_fields(
+        self,
+        field_type: GrapheneObjectType,
+        field_node: FieldNode,
+        model: type[Model] | None,
+    ) -> tuple[str, ...] | None:
+        """
+        Find the model fields the field's resolver has declared it needs with `required_fields`.
+        If the field uses the default resolver, look for the declaration from the model property
+        with the same name as the field (or its `source`), if a model is given.
+        Returns None if no declaration is found.
+        """
+        field_name = to_snake_case(field_node.name.value)
+        field: graphene.Field | None = field_type.graphene_type._meta.fields.get(field_name)
+        resolver = getattr(field, "resolver", None) or getattr(field_type.graphene_type, f"resolve_{field_name}", None)
+
+        source = get_field_source(field)
+        if source is not None:
+            field_name = source
+            resolver = None
+
+        if resolver is None and model is not None:
+            attr = getattr_static(model, field_name, None)
+            if isinstance(attr, property):
+                resolver = attr.fget
+            elif isinstance(attr, cached_property):
+                resolver = attr.func
+
+        return getattr(resolver, "required_fields", None)
+
+    def report_unoptimized_field(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        """Report a custom field that returns model instances, but cannot be optimized."""
+        graphene_type = self.get_graphene_type(field_type, field_node)
+        if not isinstance(graphene_type, GrapheneObjectType):
+            return
+        if not issubclass(graphene_type.graphene_type, DjangoObjectType | Connection):
+            return
+
+        msg = (
+            f"Field '{field_node.name.value}' on object type '{field_type.name}' returns '{graphene_type.name}', "
+            f"but cannot be optimized. Use the optimizer's field classes, the `source` argument, "
+            f"or declare the model fields its resolver needs with `required_fields`."
+        )
+        if optimizer_settings.STRICT_CUSTOM_FIELDS:
+            raise OptimizerError(msg)
+        optimizer_logger.debug(msg)
+
+    def add_required_fields(self, lookups: Iterable[str]) -> None:
+        """Add the given field lookups, relative to the current model, to the current optimizer."""
+        for lookup in lookups:
+            self.add_required_field(lookup)
+
+    def add_required_field(self, lookup: str) -> None:
+        field_name, _, rest = lookup.partition(LOOKUP_SEP)
+        field = get_model_field(self.model, field_name)
+        if field is None:
+            msg = f"Required field '{lookup}' not found from model '{self.model.__name__}'."
+            raise OptimizerError(msg)
+
+        # The primary key and foreign key columns (e.g., 'building_id') can be fetched without the related model.
+        is_column = field_name == "pk" or field_name == getattr(field, "attname", field.name) != field.name
+        if not field.is_relation or is_column:
+            self.optimizer.only_fields.append(field.get_attname())
+            return
+
+        related_model = get_related_model(field, self.model)
+        if is_to_one(field):
+            optimizers = [self.get_to_one_optimizer(field, related_model)]
+        else:
+            name = self.get_related_field_name(field)
+            # If the relation is also selected with filters or pagination, the selection cannot be
+            # prefetched to the relation's default cache, so the required fields are also recorded
+            # for a separate prefetch (see `QueryOptimizer.get_prefetches`).
+            optimizers = [
+                self.get_to_many_optimizer(field, related_model, name),
+                self.get_to_many_optimizer(field, related_model, name, required=True),
+            ]
+
+        # Cannot know which fields to fetch for generic foreign keys.
+        if related_model is None:
+            return
+
+        for optimizer in optimizers:
+            with self.use_optimizer(optimizer), self.use_model(related_model):
+                if rest:
+                    self.add_required_field(rest)
+                else:
+                    optimizer.only_fields.extend(field.attname for field in related_model._meta.concrete_fields)
+
+    def get_to_one_optimizer(self, related_field: ToOneField, related_model: type[Model] | None) -> QueryOptimizer:
+        """Get the optimizer for the given to-one relation from the current optimizer, creating it if needed."""
+        name = self.get_related_field_name(related_field)
+        optimizer = QueryOptimizer(model=related_model, info=self.info, name=name, parent=self.optimizer)
+
+        if isinstance(related_field, GenericForeignKey):
+            optimizer = self.optimizer.prefetch_related.setdefault(name, optimizer)
+            self.optimizer.related_fields.append(related_field.ct_field)
+            self.optimizer.related_fields.append(related_field.fk_field)
+            return optimizer
+
+        optimizer = self.optimizer.select_related.setdefault(name, optimizer)
+        if isinstance(related_field, ForeignKey):
+            self.optimizer.related_fields.append(related_field.attname)
+        return optimizer
+
+    def get_to_many_optimizer(
+        self,
+        related_field: ToManyField,
+        related_model: type[Model] | None,
+        key: str,
+        *,
+        required: bool = False,
+    ) -> QueryOptimizer:
+        """
+        Get the optimizer for the given to-many relation from the current optimizer, creating it if needed.
+        If `required` is set, get the optimizer for the fields required by resolvers instead.
+        """
+        name = self.get_related_field_name(related_field)
+        optimizer = QueryOptimizer(model=related_model, info=self.info, name=name, parent=self.optimizer)
+        prefetches = self.optimizer.required_prefetches if required else self.optimizer.prefetch_related
+        optimizer = prefetches.setdefault(key, optimizer)
+
+        if isinstance(related_field, ManyToOneRel):
+            optimizer.related_fields.append(related_field.field.attname)
+
+        if isinstance(related_field, GenericRelation):
+            optimizer.related_fields.append(related_field.object_id_field_name)
+            optimizer.related_fields.append(related_field.content_type_field_name)
+
+        return optimizer
+
+    def is_pk_only_to_one_field(
+        self,
+        field_type: GrapheneObjectType,
+        field_node: FieldNode,
+        related_field: ToOneField,
+    ) -> bool:
+        from .fields import RelatedField  # noqa: PLC0415
+
+        if not is_pk_foreign_key(related_field):
+            return False
+
+        # Custom resolvers might need more than the primary key from the related object.
+        graphql_field = field_type.fields[field_node.name.value]
+        resolver = getattr(graphql_field.resolve, "__func__", None)
+        if resolver is not RelatedField.related_resolver:
+            return False
 
-        return None  # pragma: no cover
+        graphene_type = get_underlying_type(graphql_field.type).graphene_type
+        return is_pk_only_selection(field_node, graphene_type, self.info.fragments)
 
     @contextlib.contextmanager
     def use_optimizer(self, optimizer: QueryOptimizer) -> None:
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from graphql import ExecutionContext, Undefined
+from graphql.pyutils import Path
+
+from .budgets import create_operation_budget
+from .prefetch_hack import close_thread_connections, in_transaction
+from .settings import optimizer_settings
+from .utils import is_running_async
+
+if TYPE_CHECKING:
+    from graphql import FieldNode, GraphQLObjectType
+
+    from .typing import Any
+
+
+__all__ = [
+    "ConcurrentExecutionContext",
+]
+
+
+class ConcurrentExecutionContext(ExecutionContext):
+    """
+    Execution context that executes the root fields of query operations concurrently on a thread pool.
+
+    Each root field compiles and evaluates its own optimized queryset in its own thread,
+    so the latency of an operation with many root fields is close to that of its slowest root field.
+    Nested fields are resolved in the same thread as their root field, which should only need to read
+    the results prefetched by the optimizer.
+
+    Each thread uses its own database connection, so root fields are executed serially
+    inside a transaction (e.g., with `ATOMIC_REQUESTS`). Mutations are also executed serially.
+    """
+
+    def execute_fields(
+        self,
+        parent_type: GraphQLObjectType,
+        source_value: Any,
+        path: Path | None,
+        fields: dict[str, list[FieldNode]],
+    ) -> Any:
+        max_workers = optimizer_settings.CONCURRENT_ROOT_FIELDS_MAX_WORKERS
+        # Only root fields are executed concurrently (they don't have a path).
+        # Async execution is left to the event loop.
+        if path is not None or len(fields) < 2 or not max_workers or is_running_async() or in_transaction():  # noqa: PLR2004
+            return super().execute_fields(parent_type, source_value, path, fields)
+
+        self.prepare_context()
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(fields))) as executor:
+            futures = {
+                response_name: executor.submit(
+                    self.execute_root_field,
+                    parent_type,
+                    source_value,
+                    field_nodes,
+                    Path(path, response_name, parent_type.name),
+                )
+                for response_name, field_nodes in fields.items()
+            }
+            results = {response_name: future.result() for response_name, future in futures.items()}
+
+        return {response_name: result for response_name, result in results.items() if result is not Undefined}
+
+    def prepare_context(self) -> None:
+        """
+        Add the request-scoped state the optimizer stores in the context before executing the root fields,
+        so that the threads share the same state instead of each creating their own.
+        """
+        context = self.context_value
+        if context is None:
+            return
+
+        if getattr(context, "optimizer_budget", None) is None:
+            context.optimizer_budget = create_operation_budget()
+        if not hasattr(context, "optimizer_batch_loaders"):
+            context.optimizer_batch_loaders = {}
+        if not hasattr(context, "optimizer_pagination"):
+            context.optimizer_pagination = {}
+
+    def execute_root_field(
+        self,
+        parent_type: GraphQLObjectType,
+        source_value: Any,
+        field_nodes: list[FieldNode],
+        path: Path,
+    ) -> Any:
+        try:
+            return self.execute_field(parent_type, source_value, field_nodes, path)
+        finally:
+            close_thread_connections()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from copy import copy
+from typing import TYPE_CHECKING
+
+from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.sql.query import Query
+
+if TYPE_CHECKING:
+    from .typing import Any, ExpressionKind
+
+
+__all__ = [
+    "can_relocate_expression",
+    "relocate_expression",
+]
+
+
+def can_relocate_expression(expression: Any) -> bool:
+    """
+    Can the given expression be moved from a related model's queryset to its parent model's queryset
+    by prefixing its field references with the relation name? This is not possible for expressions
+    that aggregate or partition rows, reference an outer query, or contain raw SQL, since moving
+    them to a joined query would change their results or produce invalid SQL.
+    """
+    if isinstance(expression, models.F):
+        # 'OuterRef' is a subclass of 'F'.
+        return not isinstance(expression, models.OuterRef)
+
+    if isinstance(expression, models.Q):
+        return all(
+            can_relocate_expression(child[1] if isinstance(child, tuple) else child)  # .
+            for child in expression.children
+        )
+
+    if isinstance(expression, models.Subquery | models.Window | models.expressions.RawSQL | Query):
+        return False
+
+    if getattr(expression, "contains_aggregate", False) or getattr(expression, "contains_over_clause", False):
+        return False
+
+    if hasattr(expression, "get_source_expressions"):
+        return all(can_relocate_expression(source) for source in expression.get_source_expressions())
+
+    return True
+
+
+def relocate_expression(expression: ExpressionKind, prefix: str, renames: dict[str, str]) -> ExpressionKind:
+    """
+    Rewrite the given expression so that it can be used in the queryset of a model
+    that has a to-one relation named `prefix` to the model the expression was written for.
+
+    :param expression: The expression to rewrite. Should be checked with `can_relocate_expression` first.
+    :param prefix: The lookup from the parent model to the model the expression was written for.
+    :param renames: Names of other relocated annotations or aliases the expression might refer to,
+                    mapped to their names in the parent model's queryset.
+    """
+    if isinstance(expression, models.F):
+        return models.F(relocate_lookup(expression.name, prefix, renames))
+
+    if isinstance(expression, models.Q):
+        relocated = copy(expression)
+        relocated.children = [
+            (relocate_lookup(child[0], prefix, renames), relocate_expression(child[1], prefix, renames))
+            if isinstance(child, tuple)
+            else relocate_expression(child, prefix, renames)
+            for child in expression.children
+        ]
+        return relocated
+
+    if hasattr(expression, "get_source_expressions"):
+        relocated = expression.copy()
+        relocated.set_source_expressions([
+            relocate_expression(source, prefix, renames)  # .
+            for source in expression.get_source_expressions()
+        ])
+        return relocated
+
+    return expression
+
+
+def relocate_lookup(lookup: str, prefix: str, renames: dict[str, str]) -> str:
+    name, sep, rest = lookup.partition(LOOKUP_SEP)
+    if name in renames:
+        return f"{renames[name]}{sep}{rest}"
+    return f"{prefix}{LOOKUP_SEP}{lookup}"
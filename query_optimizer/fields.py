@@ -2,32 +2,56 @@
 from __future__ import annotations
 
 import warnings
+from abc import ABC, abstractmethod
 from functools import cached_property, partial
+from inspect import isawaitable
+from itertools import chain
 from typing import TYPE_CHECKING, Type  # noqa: UP035
 
 import graphene
+from asgiref.sync import sync_to_async
 from graphene.relay.connection import connection_adapter, page_info_adapter
 from graphene.types.argument import to_arguments
+from graphene.types.utils import get_type
 from graphene.utils.str_converters import to_camel_case, to_snake_case
 from graphene_django.settings import graphene_settings
 from graphene_django.utils.utils import DJANGO_FILTER_INSTALLED
 from graphql_relay.connection.array_connection import offset_to_cursor
 
-from .ast import get_underlying_type
-from .compiler import OptimizationCompiler, optimize
-from .prefetch_hack import evaluate_with_prefetch_hack
+from .ast import (
+    get_model_field,
+    get_prefetch_hook,
+    get_underlying_type,
+    is_pk_foreign_key,
+    is_pk_only_selection,
+    is_to_many,
+)
+from .budgets import acount_with_budget, count_with_budget
+from .compiler import OptimizationCompiler, aoptimize, optimize, optimize_in_chunks
+from .errors import OptimizerError
+from .iterables import (
+    GroupedAggregate,
+    RelatedExists,
+    RelatedValues,
+    get_pk_only_relations,
+    get_shared_prefetch,
+    is_prefetched,
+)
+from .loaders import get_batch_loader
+from .prefetch_hack import aevaluate_with_prefetch_hack, evaluate_in_chunks, evaluate_with_prefetch_hack
 from .settings import optimizer_settings
-from .utils import calculate_queryset_slice, is_optimized, maybe_queryset
-from .validators import validate_pagination_args
+from .utils import calculate_queryset_slice, is_optimized, is_running_async, maybe_queryset
+from .validators import validate_limit_args, validate_pagination_args
 
 if TYPE_CHECKING:
     from django.db import models
-    from django.db.models import Model, QuerySet
+    from django.db.models import Model, Q, QuerySet
     from django.db.models.manager import Manager
     from graphene.relay.connection import Connection
     from graphql_relay import EdgeType
     from graphql_relay.connection.connection import ConnectionType
 
+    from .iterables import RelatedSubquery
     from .optimizer import QueryOptimizer
     from .types import DjangoObjectType
     from .typing import (
@@ -38,21 +62,28 @@
         ExpressionKind,
         GQLInfo,
         Iterable,
+        Literal,
         ManualOptimizerMethod,
         ModelResolver,
         ObjectTypeInput,
         QuerySetResolver,
+        ToManyField,
         Union,
         UnmountedTypeInput,
     )
+    from .validators import PaginationArgs
 
 __all__ = [
+    "AggregateField",
     "AnnotatedField",
     "DjangoConnectionField",
     "DjangoListField",
+    "ExistsField",
     "ManuallyOptimizedField",
     "MultiField",
     "RelatedField",
+    "RelatedSubqueryField",
+    "RelatedValuesField",
 ]
 
 
@@ -65,6 +96,8 @@ def __init__(
         /,
         *,
         field_name: str | None = None,
+        strategy: Literal["select_related", "prefetch_related"] | None = None,
+        batch_by: str | None = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -76,6 +109,14 @@ def __init__(
         :param field_name: The name of the model field or related accessor this related field is for.
                            Only needed if the field name on the ObjectType this field is
                            defined on is different from the field name on the model.
+        :param strategy: Should the related object be fetched by joining it to the parent model's query
+                         ("select_related") or with a separate query ("prefetch_related")? By default,
+                         the relation is joined, unless cost-based planning is enabled and estimates
+                         that a separate query would be cheaper.
+        :param batch_by: If set, the field's custom resolver should return a key for the related object
+                         instead of the object itself. The value is the name of the related model's field
+                         the key refers to, e.g., "pk". Related objects are then loaded by their keys for all
+                         parent objects at once with a single query optimized for the field's selections.
         :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
         """
         if kwargs.pop("reverse", None) is not None:  # pragma: no cover
@@ -86,23 +127,71 @@ def __init__(
             warnings.warn(msg, category=DeprecationWarning, stacklevel=1)
 
         self.field_name = field_name
+        self.strategy = strategy
+        self.batch_by = batch_by
         super().__init__(type_, **kwargs)
 
     def wrap_resolve(self, parent_resolver: ModelResolver) -> ModelResolver:
         # Allow user defined resolvers to override the default behavior.
         if not isinstance(parent_resolver, partial):
-            return parent_resolver
+            if self.batch_by is None:
+                return parent_resolver
+            # Batched resolvers return keys, which are used to load the related objects.
+            self.resolver = parent_resolver
+            return self.batch_resolver
         return self.related_resolver
 
+    def batch_resolver(self, root: models.Model, info: GQLInfo) -> models.Model | None:
+        if is_running_async():
+            return sync_to_async(self.batch_resolver_sync)(root, info)
+        return self.batch_resolver_sync(root, info)
+
+    def batch_resolver_sync(self, root: models.Model, info: GQLInfo) -> models.Model | None:
+        model: type[models.Model] = self.underlying_type._meta.model
+        loader = get_batch_loader(info.context, id(info.field_nodes[0]), model, self.batch_by)
+        related_instance = loader.load(root, info, self.resolver)
+        if related_instance is None:
+            return None
+        self.underlying_type.run_instance_checks(related_instance, info)
+        return related_instance
+
     def related_resolver(self, root: models.Model, info: GQLInfo) -> models.Model | None:
         field_name = self.field_name or to_snake_case(info.field_name)
-        # Related object should be optimized to the root model.
-        related_instance: models.Model | None = getattr(root, field_name, None)
+        model_field = get_model_field(root.__class__, field_name)
+        # If only the primary key was requested, the related object hasn't been fetched,
+        # so use an instance with only the primary key from the foreign key on the root model.
+        if (
+            model_field is not None
+            and is_pk_foreign_key(model_field)
+            and not model_field.is_cached(root)
+            and self.is_pk_only(root, model_field, info)
+        ):
+            related_instance = self.pk_only_instance(root, model_field)
+        else:
+            # Related object should be optimized to the root model.
+            related_instance: models.Model | None = getattr(root, field_name, None)
         if related_instance is None:  # pragma: no cover
             return None
         self.underlying_type.run_instance_checks(related_instance, info)
         return related_instance
 
+    def is_pk_only(self, root: models.Model, model_field: models.ForeignKey, info: GQLInfo) -> bool:
+        # The optimizer records the relations it didn't fetch, since only their primary keys were selected.
+        pk_only_relations = get_pk_only_relations(root)
+        if pk_only_relations is not None:
+            return model_field.name in pk_only_relations
+        # Otherwise, the root wasn't fetched by the optimizer, so check the selections.
+        return all(is_pk_only_selection(node, self.underlying_type, info.fragments) for node in info.field_nodes)
+
+    @staticmethod
+    def pk_only_instance(root: models.Model, model_field: models.ForeignKey) -> models.Model | None:
+        pk = getattr(root, model_field.attname)
+        if pk is None:
+            return None
+        related_model: type[models.Model] = model_field.related_model
+        # Other fields are deferred, so they can still be loaded if accessed.
+        return related_model.from_db(root._state.db, [related_model._meta.pk.attname], [pk])
+
     @cached_property
     def underlying_type(self) -> type[DjangoObjectType]:
         return get_underlying_type(self.type)
@@ -112,6 +201,9 @@ class FilteringMixin:
     # Subclasses should implement the following:
     underlying_type: type[DjangoObjectType]
 
+    resolver: QuerySetResolver
+    field_name: str | None
+
     no_filters: bool = False
     """Should filterset filters be disabled for this field?"""
 
@@ -124,6 +216,44 @@ def args(self, args: dict[str, Any]) -> None:
         # noinspection PyAttributeOutsideInit
         self._base_args = args
 
+    def optimize_queryset(self, queryset: models.QuerySet, info: GQLInfo) -> models.QuerySet:
+        max_complexity: int | None = getattr(self.underlying_type._meta, "max_complexity", None)
+        optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+        if optimizer is not None:
+            queryset = optimizer.optimize_queryset(queryset)
+        return queryset
+
+    def resolve_iterable(self, root: Any, info: GQLInfo, **kwargs: Any) -> Any:
+        # Aliases don't matter at the root level, since we don't need to
+        # distinguish them from a parent model prefetches.
+        if root == info.root_value:
+            return self.resolver(root, info, **kwargs)
+
+        # If field is aliased, a prefetch should have been done to that alias.
+        alias = getattr(info.field_nodes[0].alias, "value", None)
+        # Identical prefetches for several aliases are only made once, to one of the aliases.
+        shared = get_shared_prefetch(root, alias or to_snake_case(info.field_name))
+        if shared is not None:
+            return getattr(root, shared)
+        if alias is not None:
+            return getattr(root, alias)
+
+        # If the ObjectType has a "prefetch_{field_name}" hook, the prefetched queryset has been
+        # modified for all parents at once, so the resolver doesn't need to be called for each row.
+        # If the parent wasn't fetched by the optimizer, the hook is applied to the resolver's result.
+        prefetch_hook = get_prefetch_hook(info.parent_type.graphene_type, info.field_name)
+        if prefetch_hook is not None:
+            if is_prefetched(root, to_snake_case(info.field_name)):
+                return getattr(root, to_snake_case(info.field_name))
+            result = self.resolver(root, info, **kwargs)
+            if result is None and self.field_name is not None:
+                result = getattr(root, self.field_name)
+            return prefetch_hook(self.to_queryset(result), info)
+
+        # Otherwise, call the ObjectType's "resolve_{field_name}" method, if it exists,
+        # or the default resolver (usually `dict_or_attr_resolver`).
+        return self.resolver(root, info, **kwargs)
+
     @cached_property
     def filtering_args(self) -> dict[str, graphene.Argument] | None:
         if not DJANGO_FILTER_INSTALLED or self.no_filters:  # pragma: no cover
@@ -145,8 +275,14 @@ def __init__(
         type_: ObjectTypeInput,
         /,
         *,
+        max_limit: int | None = None,
         no_filters: bool = False,
         field_name: str | None = None,
+        chunk_size: int | None = None,
+        parent_subquery: bool = False,
+        max_queries: int | None = None,
+        max_rows: int | None = None,
+        max_db_time: float | None = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -155,41 +291,101 @@ def __init__(
         :param type_: DjangoObjectType the list field is for.
                       This can also be a dot import path to the object type,
                       or a callable that returns the object type.
+        :param max_limit: Maximum number of items that can be returned for this field. If set, the field
+                          also gets `first` and `offset` arguments for limiting the items further.
+                          Nested lists are limited separately for each parent object.
         :param no_filters: Should filterset filters be disabled for this field?
         :param field_name: The name of the model field or related accessor this list field is for.
                            Only needed if the field name on the ObjectType this field is
                            defined on is different from the field name on the model.
+        :param chunk_size: If set, evaluate the queryset for this field in chunks of this size
+                           when it's used as a root field. Prefetches are made separately for each chunk,
+                           so only a single chunk of model instances needs to be held in memory at a time.
+        :param parent_subquery: When this field is prefetched, should the related objects be filtered
+                                with a subquery of the parent objects' query instead of a list of their primary keys?
+        :param max_queries: Maximum number of SQL queries evaluating this field can make.
+        :param max_rows: Maximum number of model instances evaluating this field can fetch.
+        :param max_db_time: Maximum time in seconds evaluating this field can spend executing SQL queries.
         :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
         """
+        self.max_limit = max_limit
         self.no_filters = no_filters
         self.field_name = field_name
+        self.chunk_size = chunk_size
+        self.parent_subquery = parent_subquery
+        self.max_queries = max_queries
+        self.max_rows = max_rows
+        self.max_db_time = max_db_time
+
+        if self.is_limited:
+            kwargs.setdefault("first", graphene.Int())
+            kwargs.setdefault("offset", graphene.Int())
+
         if isinstance(type_, graphene.NonNull):  # pragma: no cover
             type_ = type_.of_type
         super().__init__(graphene.List(graphene.NonNull(type_)), **kwargs)
 
+    @property
+    def is_limited(self) -> bool:
+        """Is the number of items returned for this field limited?"""
+        return self.max_limit is not None
+
     def wrap_resolve(self, parent_resolver: QuerySetResolver) -> QuerySetResolver:
         self.resolver = parent_resolver
         return self.list_resolver
 
-    def list_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> models.QuerySet:
-        # If field is aliased, a prefetch should have been done to that alias.
-        # If not, call the ObjectType's "resolve_{field_name}" method, if it exists.
-        # Otherwise, call the default resolver (usually `dict_or_attr_resolver`).
-        alias = getattr(info.field_nodes[0].alias, "value", None)
-        result = (
-            getattr(root, alias)
-            # Aliases don't matter at the root level, since we don't need to
-            # distinguish them from a parent model prefetches.
-            if root != info.root_value and alias is not None
-            else self.resolver(root, info, **kwargs)
-        )
+    def list_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> Iterable[models.Model]:
+        if is_running_async():
+            return self.async_list_resolver(root, info, **kwargs)
+
+        cut = self.get_limit(kwargs)
 
+        result = self.resolve_iterable(root, info, **kwargs)
         queryset = self.to_queryset(result)
         queryset = self.underlying_type.get_queryset(queryset, info)
 
         max_complexity: int | None = getattr(self.underlying_type._meta, "max_complexity", None)
+
+        # Prefetched lists have already been limited for each parent object.
+        if cut is not None and not is_optimized(queryset):
+            queryset = self.optimize_queryset(queryset, info)[cut]
+            if self.chunk_size is not None and root == info.root_value:
+                return chain.from_iterable(evaluate_in_chunks(queryset, chunk_size=self.chunk_size))
+            return evaluate_with_prefetch_hack(queryset)
+
+        # Nested list fields are prefetched, so chunking only makes sense at the root level.
+        if self.chunk_size is not None and root == info.root_value:
+            return optimize_in_chunks(queryset, info, chunk_size=self.chunk_size, max_complexity=max_complexity)
+
         return optimize(queryset, info, max_complexity=max_complexity)
 
+    async def async_list_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> Iterable[models.Model]:
+        cut = self.get_limit(kwargs)
+
+        result = self.resolve_iterable(root, info, **kwargs)
+        if isawaitable(result):
+            result = await result
+
+        queryset = self.to_queryset(result)
+        queryset = self.underlying_type.get_queryset(queryset, info)
+
+        if cut is not None and not is_optimized(queryset):
+            queryset = self.optimize_queryset(queryset, info)[cut]
+            return await aevaluate_with_prefetch_hack(queryset)
+
+        max_complexity: int | None = getattr(self.underlying_type._meta, "max_complexity", None)
+        return await aoptimize(queryset, info, max_complexity=max_complexity)
+
+    def get_limit(self, kwargs: dict[str, Any]) -> slice | None:
+        if not self.is_limited:
+            return None
+
+        return validate_limit_args(
+            first=kwargs.pop("first", None),
+            offset=kwargs.pop("offset", None),
+            max_limit=self.max_limit,
+        )
+
     def to_queryset(self, iterable: Union[models.QuerySet, Manager, None]) -> models.QuerySet:
         # Default resolver can return a Manager-instance or None.
         if iterable is None:
@@ -216,6 +412,10 @@ def __init__(
         max_limit: int | None = ...,
         no_filters: bool = False,
         field_name: str | None = None,
+        parent_subquery: bool = False,
+        max_queries: int | None = None,
+        max_rows: int | None = None,
+        max_db_time: float | None = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -230,6 +430,11 @@ def __init__(
         :param field_name: The name of the model field or related accessor this connection is for.
                            Only needed if the field name on the ObjectType this field is
                            defined on is different from the field name on the model.
+        :param parent_subquery: When this connection is prefetched, should the related objects be filtered
+                                with a subquery of the parent objects' query instead of a list of their primary keys?
+        :param max_queries: Maximum number of SQL queries evaluating this connection can make.
+        :param max_rows: Maximum number of model instances evaluating this connection can fetch.
+        :param max_db_time: Maximum time in seconds evaluating this connection can spend executing SQL queries.
         :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
         """
         # Maximum number of items that can be requested in a single query for this connection.
@@ -237,6 +442,10 @@ def __init__(
         self.max_limit = max_limit if max_limit is not ... else graphene_settings.RELAY_CONNECTION_MAX_LIMIT
         self.no_filters = no_filters
         self.field_name = field_name
+        self.parent_subquery = parent_subquery
+        self.max_queries = max_queries
+        self.max_rows = max_rows
+        self.max_db_time = max_db_time
 
         # Default inputs for a connection field
         kwargs.setdefault("first", graphene.Int())
@@ -252,6 +461,57 @@ def wrap_resolve(self, parent_resolver: QuerySetResolver) -> ConnectionResolver:
         return self.connection_resolver
 
     def connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> ConnectionType:
+        if is_running_async():
+            return self.async_connection_resolver(root, info, **kwargs)
+
+        pagination_args = self.get_pagination_args(info, kwargs)
+
+        result = self.resolve_iterable(root, info, **kwargs)
+        queryset = self.to_queryset(result)
+        queryset = self.underlying_type.get_queryset(queryset, info)
+
+        # Note if the queryset has already been optimized.
+        already_optimized = is_optimized(queryset)
+        queryset = self.optimize_queryset(queryset, info)
+
+        # Queryset optimization contains filtering, so we count after optimization.
+        pagination_args["size"] = count = (
+            count_with_budget(queryset) if not already_optimized else self.get_prefetch_count(queryset)
+        )
+        cut = calculate_queryset_slice(**pagination_args)
+
+        # Prefetch queryset has already been sliced.
+        if not already_optimized:
+            queryset = queryset[cut]
+
+        instances = evaluate_with_prefetch_hack(queryset)
+        return self.create_connection(queryset, instances, cut=cut, count=count)
+
+    async def async_connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> ConnectionType:
+        pagination_args = self.get_pagination_args(info, kwargs)
+
+        result = self.resolve_iterable(root, info, **kwargs)
+        if isawaitable(result):
+            result = await result
+
+        queryset = self.to_queryset(result)
+        queryset = self.underlying_type.get_queryset(queryset, info)
+
+        already_optimized = is_optimized(queryset)
+        queryset = self.optimize_queryset(queryset, info)
+
+        pagination_args["size"] = count = (
+            await acount_with_budget(queryset) if not already_optimized else self.get_prefetch_count(queryset)
+        )
+        cut = calculate_queryset_slice(**pagination_args)
+
+        if not already_optimized:
+            queryset = queryset[cut]
+
+        instances = await aevaluate_with_prefetch_hack(queryset)
+        return self.create_connection(queryset, instances, cut=cut, count=count)
+
+    def get_pagination_args(self, info: GQLInfo, kwargs: dict[str, Any]) -> PaginationArgs:
         pagination_args = validate_pagination_args(
             first=kwargs.pop("first", None),
             last=kwargs.pop("last", None),
@@ -267,38 +527,13 @@ def connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> Connec
             info.context.optimizer_pagination = {}
         name = to_snake_case(info.field_name)
         info.context.optimizer_pagination[name] = pagination_args
+        return pagination_args
 
-        # If field is aliased, a prefetch should have been done to that alias.
-        # If not, call the ObjectType's "resolve_{field_name}" method, if it exists.
-        # Otherwise, call the default resolver (usually `dict_or_attr_resolver`).
-        alias = getattr(info.field_nodes[0].alias, "value", None)
-        result = (
-            getattr(root, alias)
-            # Aliases don't matter at the root level, since we don't need to
-            # distinguish them from a parent model prefetches.
-            if root != info.root_value and alias is not None
-            else self.resolver(root, info, **kwargs)
-        )
-
-        queryset = self.to_queryset(result)
-        queryset = self.underlying_type.get_queryset(queryset, info)
-
-        max_complexity: int | None = getattr(self.underlying_type._meta, "max_complexity", None)
-
-        # Note if the queryset has already been optimized.
-        already_optimized = is_optimized(queryset)
-
-        optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
-        if optimizer is not None:
-            queryset = optimizer.optimize_queryset(queryset)
-
-        # Queryset optimization contains filtering, so we count after optimization.
-        pagination_args["size"] = count = (
-            queryset.count()
-            if not already_optimized
+    def get_prefetch_count(self, queryset: Union[models.QuerySet, list[models.Model]]) -> int:
+        return (
             # Prefetch(..., to_attr=...) will return a list of models.
             # TODO: This might be wrong.
-            else len(queryset)
+            len(queryset)
             if isinstance(queryset, list)
             # If this is a nested connection field, prefetch queryset models should have been
             # annotated with the queryset count (pick it from the first one).
@@ -308,14 +543,15 @@ def connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> Connec
                 0,  # QuerySet result cache is empty -> count is 0.
             )
         )
-        cut = calculate_queryset_slice(**pagination_args)
-
-        # Prefetch queryset has already been sliced.
-        if not already_optimized:
-            queryset = queryset[cut]
-
-        instances = evaluate_with_prefetch_hack(queryset)
 
+    def create_connection(
+        self,
+        queryset: Union[models.QuerySet, list[models.Model]],
+        instances: list[models.Model],
+        *,
+        cut: slice,
+        count: int,
+    ) -> ConnectionType:
         edges: list[EdgeType] = [
             # Create a connection from the sliced queryset.
             self.connection_type.Edge(node=value, cursor=offset_to_cursor(cut.start + index))
@@ -411,10 +647,236 @@ def optimizer_hook(self, compiler: OptimizationCompiler) -> None:
             compiler.optimizer.annotations.update(self.extra_annotations)
 
 
+class AggregateField(graphene.Field):
+    """
+    Field for resolving an aggregate over a to-many relation. The optimizer calculates the aggregate
+    for all instances fetched for the same level in the query with a single grouped query.
+    """
+
+    def __init__(
+        self,
+        type_: UnmountedTypeInput,
+        /,
+        relation: str,
+        aggregate: ExpressionKind,
+        filter: Q | None = None,  # noqa: A002
+        **kwargs: Any,
+    ) -> None:
+        """
+        Initialize an aggregate field.
+
+        :param type_: Graphene type of the aggregated value.
+        :param relation: Name of the to-many relation on the model to aggregate over.
+        :param aggregate: Aggregate expression to calculate, relative to the related model, e.g., `Count("pk")`.
+        :param filter: Q-object for filtering the related model's rows before aggregation.
+        :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
+        """
+        self.relation = relation
+        self.aggregate = aggregate
+        self.filter = filter
+        super().__init__(type_, **kwargs)
+
+    def __set_name__(self, owner: type[DjangoObjectType], name: str) -> None:
+        self.name = to_camel_case(name)
+
+    def wrap_resolve(self, parent_resolver: Callable[..., Any]) -> Callable[..., Any]:
+        # `parent_resolver` is either a `resolve_{self.name}` method defined
+        # on the owner class, or a partial of `dict_or_attr_resolver`.
+        self.resolver = parent_resolver
+        return self.aggregate_resolver
+
+    def aggregate_resolver(self, root: Model, info: GQLInfo, **kwargs: Any) -> Any:
+        return self.resolver(root, info, **kwargs)
+
+    def optimizer_hook(self, compiler: OptimizationCompiler) -> None:
+        related_field = get_model_field(compiler.model, self.relation)
+        if related_field is None or not is_to_many(related_field):
+            msg = f"'{self.relation}' is not a to-many relation on model '{compiler.model.__name__}'."
+            raise OptimizerError(msg)
+
+        # Aggregates over the same relation with the same filter are calculated in the same query.
+        grouped = compiler.optimizer.aggregates.setdefault(
+            (self.relation, self.filter),
+            GroupedAggregate(related_field, self.filter),
+        )
+        grouped.aggregates[to_snake_case(self.name)] = self.aggregate
+
+
+class RelatedSubqueryField(FilteringMixin, graphene.Field, ABC):
+    """
+    Base class for fields that resolve a value from the rows of a to-many relation
+    with a subquery, without fetching the related rows as model instances.
+    Subclasses must implement `get_related_subquery`.
+    """
+
+    def __init__(
+        self,
+        type_: UnmountedTypeInput,
+        relation: str,
+        /,
+        related_type: ObjectTypeInput | None = None,
+        *,
+        filter: Q | None = None,  # noqa: A002
+        order_by: list[str] | None = None,
+        no_filters: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        self.relation = relation
+        self.related_type = related_type
+        self.filter = filter
+        self.order_by = order_by
+        self.no_filters = no_filters or related_type is None
+        super().__init__(type_, **kwargs)
+
+    def __set_name__(self, owner: type[DjangoObjectType], name: str) -> None:
+        self.name = to_camel_case(name)
+
+    def wrap_resolve(self, parent_resolver: Callable[..., Any]) -> Callable[..., Any]:
+        # `parent_resolver` is either a `resolve_{self.name}` method defined
+        # on the owner class, or a partial of `dict_or_attr_resolver`.
+        self.resolver = parent_resolver
+        return self.subquery_resolver
+
+    def subquery_resolver(self, root: Model, info: GQLInfo, **kwargs: Any) -> Any:
+        # Aliased fields can have different filters, so the result is stored using the alias.
+        alias = getattr(info.field_nodes[0].alias, "value", None)
+        if alias is not None and isinstance(self.resolver, partial):
+            return getattr(root, alias, None)
+        return self.resolver(root, info, **kwargs)
+
+    def optimizer_hook(self, compiler: OptimizationCompiler) -> None:
+        related_field = get_model_field(compiler.model, self.relation)
+        if related_field is None or not is_to_many(related_field):
+            msg = f"'{self.relation}' is not a to-many relation on model '{compiler.model.__name__}'."
+            raise OptimizerError(msg)
+
+        name = compiler.get_field_name(compiler.field_node)
+        compiler.optimizer.subquery_fields[name] = self
+
+    @abstractmethod
+    def get_related_subquery(self, name: str, related_field: ToManyField, queryset: QuerySet) -> RelatedSubquery:
+        """
+        Create the subquery for the given attribute name from the given queryset of the related model.
+        The queryset has already been filtered and ordered based on the field's arguments.
+        """
+
+    @cached_property
+    def underlying_type(self) -> type[DjangoObjectType] | None:
+        if self.related_type is None:
+            return None
+        return get_underlying_type(get_type(self.related_type))
+
+
+class ExistsField(RelatedSubqueryField):
+    """
+    Field for checking whether there are any rows in a to-many relation, without fetching them.
+    The optimizer adds an `Exists` subquery annotation for the check to the queryset,
+    or checks the existence of the rows for all fetched instances with a single query
+    if the instances are fetched with `select_related`.
+    """
+
+    def __init__(
+        self,
+        relation: str,
+        /,
+        related_type: ObjectTypeInput | None = None,
+        *,
+        filter: Q | None = None,  # noqa: A002
+        no_filters: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Initialize an exists field.
+
+        :param relation: Name of the to-many relation on the model to check.
+        :param related_type: DjangoObjectType for the related model. If given, the field will have the same
+                             filterset filters as a `DjangoListField` for the type would have, and the type's
+                             `filter_queryset` hook is run for the related rows. This can also be a dot import
+                             path to the object type, or a callable that returns the object type.
+        :param filter: Q-object for filtering the related model's rows before checking their existence.
+        :param no_filters: Should filterset filters be disabled for this field?
+        :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
+        """
+        super().__init__(
+            graphene.Boolean,
+            relation,
+            related_type,
+            filter=filter,
+            no_filters=no_filters,
+            **kwargs,
+        )
+
+    def get_related_subquery(self, name: str, related_field: ToManyField, queryset: QuerySet) -> RelatedExists:
+        return RelatedExists(name, related_field, queryset)
+
+
+class RelatedValuesField(RelatedSubqueryField):
+    """
+    Field for resolving a list of the values of a column from the rows in a to-many relation,
+    without fetching the rows as model instances. The optimizer adds a subquery annotation
+    that aggregates the values to an array in the database, or fetches the values for all
+    fetched instances with a single query if the instances are fetched with `select_related`.
+    """
+
+    def __init__(
+        self,
+        relation: str,
+        column: str,
+        /,
+        related_type: ObjectTypeInput | None = None,
+        *,
+        of_type: UnmountedTypeInput = graphene.String,
+        filter: Q | None = None,  # noqa: A002
+        order_by: list[str] | None = None,
+        no_filters: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Initialize a related values field.
+
+        :param relation: Name of the to-many relation on the model to fetch the values from.
+        :param column: Lookup to the column to fetch, relative to the related model, e.g., `"name"`.
+        :param related_type: DjangoObjectType for the related model. If given, the field will have the same
+                             filterset filters as a `DjangoListField` for the type would have, and the type's
+                             `filter_queryset` hook is run for the related rows. This can also be a dot import
+                             path to the object type, or a callable that returns the object type.
+        :param of_type: Graphene type of the values in the list. Values are aggregated as JSON in the database,
+                        so the type should be able to parse the JSON representation of the column's values.
+        :param filter: Q-object for filtering the related model's rows before fetching their values.
+        :param order_by: Ordering for the values, relative to the related model. Filterset ordering overrides this.
+        :param no_filters: Should filterset filters be disabled for this field?
+        :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
+        """
+        self.column = column
+        super().__init__(
+            graphene.List(of_type),
+            relation,
+            related_type,
+            filter=filter,
+            order_by=order_by,
+            no_filters=no_filters,
+            **kwargs,
+        )
+
+    def get_related_subquery(self, name: str, related_field: ToManyField, queryset: QuerySet) -> RelatedValues:
+        return RelatedValues(name, related_field, queryset, self.column)
+
+
 class MultiField(graphene.Field):
-    """Field that requires multiple model fields to resolve. Does not support related lookups."""
+    """
+    Field that requires multiple model fields to resolve. Fields on related models can be required
+    using lookups, e.g., `"building__real_estate__name"`, in which case the relations are added
+    to the `select_related` or `prefetch_related` optimizations for the field's model.
+    """
 
     def __init__(self, type_: UnmountedTypeInput, /, fields: Iterable[str], **kwargs: Any) -> None:
+        """
+        Initialize a multi field.
+
+        :param type_: Graphene type of the field.
+        :param fields: Model field names or lookups to related model fields required to resolve the field.
+        :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
+        """
         self.fields = fields
         super().__init__(type_, **kwargs)
 
@@ -431,7 +893,7 @@ def multi_field_resolver(self, root: Model, info: GQLInfo, **kwargs: Any) -> Any
         return self.resolver(root, info, **kwargs)
 
     def optimizer_hook(self, compiler: OptimizationCompiler) -> None:
-        compiler.optimizer.only_fields.extend(self.fields)
+        compiler.add_required_fields(self.fields)
 
 
 class ManuallyOptimizedField(graphene.Field):
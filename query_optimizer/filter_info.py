@@ -64,11 +64,10 @@ def add_filter_info(self, parent_type: GrapheneObjectType, field_node: FieldNode
         is_connection_ = is_connection(graphene_type)
 
         # Find the field-specific limit, or use the default limit.
-        max_limit: int | None = getattr(
-            getattr(parent_type.graphene_type, orig_field_name, None),
-            "max_limit",
-            graphene_settings.RELAY_CONNECTION_MAX_LIMIT,
-        )
+        field = getattr(parent_type.graphene_type, orig_field_name, None)
+        max_limit: int | None = getattr(field, "max_limit", graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+        # List fields can also be limited, but they don't use the default limit for connections.
+        is_limited_list_ = not is_connection_ and getattr(field, "is_limited", False)
 
         self.filter_info[field_name] = GraphQLFilterInfo(
             name=graphene_type.name,
@@ -77,6 +76,7 @@ def add_filter_info(self, parent_type: GrapheneObjectType, field_node: FieldNode
             children={},
             filterset_class=None,
             is_connection=is_connection_,
+            is_limited_list=is_limited_list_,
             is_node=is_node_,
             max_limit=max_limit,
         )
@@ -91,10 +91,10 @@ def add_filter_info(self, parent_type: GrapheneObjectType, field_node: FieldNode
     def handle_selections(self, field_type: GrapheneType, selections: Selections) -> None:
         super().handle_selections(field_type, selections)
         # Remove filter info that do not have filters or children.
-        # Preserve filter info for connections so that default nested limiting can be applied.
+        # Preserve filter info for connections and limited lists so that default nested limiting can be applied.
         for name in list(self.filter_info):
             info = self.filter_info[name]
-            if not (info["filters"] or info["children"] or info["is_connection"]):
+            if not (info["filters"] or info["children"] or info["is_connection"] or info["is_limited_list"]):
                 del self.filter_info[name]
 
     def handle_query_class(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
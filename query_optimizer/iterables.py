@@ -0,0 +1,534 @@
+from __future__ import annotations
+
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import (
+    Exists,
+    F,
+    ForeignObjectRel,
+    ManyToManyField,
+    OrderBy,
+    OuterRef,
+    Value,
+    Window,
+    prefetch_related_objects,
+)
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import Col
+from django.db.models.query import ModelIterable
+
+from .budgets import count_rows
+from .prefetch_hack import evaluate_with_prefetch_hack, get_prefetch_chunk_size, in_chunks
+from .settings import optimizer_settings
+from .typing import NamedTuple
+from .utils import SubqueryJSONArray, mark_optimized
+
+if TYPE_CHECKING:
+    from django.db.models import ForeignKey, ManyToManyRel, Model, Q, QuerySet
+
+    from .typing import Any, Callable, ExpressionKind, Iterable, Iterator, ToManyField, Union
+
+    PostFetchHook = Callable[[list[Model]], None]
+    RelatedSubquery = Union["RelatedExists", "RelatedValues"]
+
+
+__all__ = [
+    "CoalescedMember",
+    "CoalescedPrefetch",
+    "DeduplicatedManyToManyPrefetch",
+    "GroupedAggregate",
+    "OptimizedModelIterable",
+    "PkOnlyRelations",
+    "PrefetchAliases",
+    "RelatedExists",
+    "RelatedInstancesHook",
+    "RelatedValues",
+    "RelocatedAnnotations",
+    "add_post_fetch_hooks",
+    "can_record_source_queryset",
+    "get_pk_only_relations",
+    "get_shared_prefetch",
+    "is_prefetched",
+]
+
+
+def add_post_fetch_hooks(queryset: QuerySet, hooks: list[PostFetchHook]) -> None:
+    """
+    Add hooks that should be run on the model instances fetched by the given queryset
+    after they have been fetched from the database, but before they are prefetched or returned.
+    """
+    queryset._iterable_class = OptimizedModelIterable
+    queryset._hints[optimizer_settings.POST_FETCH_HOOKS_KEY] = hooks
+
+
+class OptimizedModelIterable(ModelIterable):
+    """
+    Iterable that runs the post-fetch hooks stored in the queryset hints for the fetched model instances.
+    Instances are passed to the hooks in batches: if the queryset is evaluated with `queryset.iterator()`,
+    a batch is the size of a chunk, otherwise the batch contains all instances in the queryset.
+    Fetched instances are also counted towards the resource budget in use, if any.
+    """
+
+    def __iter__(self) -> Iterable[Model]:
+        hooks: list[PostFetchHook] = self.queryset._hints.get(optimizer_settings.POST_FETCH_HOOKS_KEY, [])
+        # When evaluated in chunks, the query would select the instances of all chunks.
+        record = self.queryset._hints.get(optimizer_settings.PREFETCH_SOURCE_QUERYSET_KEY, False)
+        record = record and not self.chunked_fetch and can_record_source_queryset(self.queryset)
+        iterator = count_rows(super().__iter__())
+        if not hooks and not record:
+            yield from iterator
+            return
+
+        batch_size = self.chunk_size if self.chunked_fetch else None
+        while batch := list(islice(iterator, batch_size)):
+            if record:
+                record_source_queryset(batch, self.queryset)
+            # Hooks filter their queries by the instances, so keep the filters within the database's limits.
+            for chunk in in_chunks(batch, self.queryset.db):
+                for hook in hooks:
+                    hook(chunk)
+            yield from batch
+
+
+def record_source_queryset(instances: list[Model], queryset: QuerySet) -> None:
+    """
+    Store the query the given instances were fetched with to the instances, so that their prefetches
+    can be filtered with a subquery of it (see `get_parent_subquery`).
+    """
+    subquery = queryset.values("pk")
+    for instance in instances:
+        instance.__dict__[optimizer_settings.PREFETCH_SOURCE_QUERYSET_KEY] = subquery
+
+
+def can_record_source_queryset(queryset: QuerySet) -> bool:
+    """
+    Does executing the given queryset again as a subquery select the same rows?
+
+    If the queryset is limited (sliced, or paginated with a window function) without a total ordering,
+    the database can pick different rows each time, and prefetches filtered by the subquery would miss
+    the related rows of the instances actually fetched. Then, prefetches use the primary keys instead.
+    """
+    query = queryset.query
+    windows = [
+        expression
+        for annotation in query.annotations.values()
+        for expression in annotation.flatten()
+        if isinstance(expression, Window)
+    ]
+    if query.is_sliced:
+        ordering = query.order_by or (query.get_meta().ordering if query.default_ordering else ())
+        if not has_total_ordering(queryset.model, ordering):
+            return False
+
+    return all(
+        window.order_by is not None and has_total_ordering(queryset.model, window.order_by.get_source_expressions())
+        for window in windows
+    )
+
+
+def has_total_ordering(model: type[Model], ordering: Iterable[Any]) -> bool:
+    """Does the given ordering for the given model contain its primary key or a unique non-null field?"""
+    for item in ordering:
+        expression = item.expression if isinstance(item, OrderBy) else item
+        if isinstance(expression, Col):
+            field = expression.target
+            # Columns of joined models don't identify the rows of this model.
+            if field.model._meta.concrete_model is not model._meta.concrete_model:
+                continue
+        else:
+            name = expression.name if isinstance(expression, F) else str(expression).lstrip("-+")
+            if name == "pk":
+                return True
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+
+        if getattr(field, "primary_key", False) or (getattr(field, "unique", False) and not field.null):
+            return True
+    return False
+
+
+class RelocatedAnnotations:
+    """
+    Copies annotations relocated to the queryset from its `select_related` relations
+    back to the related model instances they were originally made for. The names of the relocated
+    annotations are lookups to the related instance's attribute, e.g., an annotation
+    `building__full_address` is set to `instance.building.full_address`.
+    """
+
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+
+    def __call__(self, instances: list[Model]) -> None:
+        for instance in instances:
+            for name in self.names:
+                path, _, attr = name.rpartition(LOOKUP_SEP)
+                related_instance = instance
+                for related_name in path.split(LOOKUP_SEP):
+                    related_instance = getattr(related_instance, related_name, None)
+                if related_instance is not None:
+                    setattr(related_instance, attr, getattr(instance, name))
+
+
+class RelatedInstancesHook:
+    """Runs a post-fetch hook for the instances of a `select_related` relation of the fetched instances."""
+
+    def __init__(self, name: str, hook: PostFetchHook) -> None:
+        self.name = name
+        self.hook = hook
+
+    def __call__(self, instances: list[Model]) -> None:
+        related_instances: dict[int, Model] = {}
+        for instance in instances:
+            related_instance = getattr(instance, self.name, None)
+            if related_instance is not None:
+                related_instances.setdefault(id(related_instance), related_instance)
+        self.hook(list(related_instances.values()))
+
+
+class PrefetchAliases:
+    """
+    Marks aliases of a to-many relation whose prefetches would have been identical to a prefetch
+    made for another alias. The prefetch is only made once, to the other alias, so the results
+    for the marked aliases should be read from there (see `get_shared_prefetch`).
+    """
+
+    def __init__(self, aliases: dict[str, str]) -> None:
+        self.aliases = aliases
+
+    def __call__(self, instances: list[Model]) -> None:
+        key = optimizer_settings.PREFETCH_ALIASES_KEY
+        for instance in instances:
+            instance.__dict__.setdefault(key, {}).update(self.aliases)
+
+
+def get_shared_prefetch(instance: Any, alias: str) -> str | None:
+    """Get the name of the prefetch the given alias shares with another alias on the instance, if any."""
+    aliases: dict[str, str] = getattr(instance, optimizer_settings.PREFETCH_ALIASES_KEY, {})
+    return aliases.get(alias)
+
+
+class PkOnlyRelations:
+    """
+    Marks the to-one relations for which only the primary key of the related object was selected,
+    so the related objects weren't fetched, and should be resolved from the foreign key instead
+    (see `get_pk_only_relations`).
+    """
+
+    def __init__(self, names: frozenset[str]) -> None:
+        self.names = names
+
+    def __call__(self, instances: list[Model]) -> None:
+        key = optimizer_settings.PK_ONLY_RELATIONS_KEY
+        for instance in instances:
+            instance.__dict__[key] = self.names
+
+
+def get_pk_only_relations(instance: Any) -> frozenset[str] | None:
+    """
+    Get the to-one relations on the instance for which only the primary key of the related object was selected.
+    Returns None if the instance wasn't fetched by the optimizer.
+    """
+    return instance.__dict__.get(optimizer_settings.PK_ONLY_RELATIONS_KEY)
+
+
+class GroupedAggregate:
+    """
+    Calculates aggregates over a to-many relation for all fetched instances with a single grouped query,
+    and sets the results to the attributes with the aggregates' names on each instance.
+    """
+
+    def __init__(self, related_field: ToManyField, filter: Q | None = None) -> None:  # noqa: A002
+        self.related_field = related_field
+        self.filter = filter
+        self.aggregates: dict[str, ExpressionKind] = {}
+
+    def __call__(self, instances: list[Model]) -> None:
+        pks = {instance.pk for instance in instances}
+        values = self.fetch_values(pks) if pks else {}
+        for name, aggregate in self.aggregates.items():
+            default = getattr(aggregate, "empty_result_set_value", None)
+            for instance in instances:
+                setattr(instance, name, values.get(instance.pk, {}).get(name, default))
+
+    def fetch_values(self, pks: set[Any]) -> dict[Any, dict[str, Any]]:
+        lookup = get_reverse_lookup(self.related_field)
+        queryset = self.related_field.related_model._default_manager.filter(**{f"{lookup}__in": pks})
+        if self.filter is not None:
+            queryset = queryset.filter(self.filter)
+
+        prefix = optimizer_settings.AGGREGATE_ALIAS_PREFIX
+        aggregates = {f"{prefix}{name}": aggregate for name, aggregate in self.aggregates.items()}
+        rows = queryset.order_by().values(lookup).annotate(**aggregates)
+        return {
+            row[lookup]: {name: row[f"{prefix}{name}"] for name in self.aggregates}  # .
+            for row in rows
+        }
+
+
+class RelatedExists:
+    """
+    Checks whether instances have any rows in the given queryset for a to-many relation,
+    and sets the result to the attribute with the given name on each instance.
+
+    On the queryset for the instances, this can be done with an `Exists` annotation.
+    For instances fetched with `select_related`, the check is done after they have been fetched,
+    with a single query that only fetches the distinct primary keys of the instances with related rows.
+    """
+
+    def __init__(self, name: str, related_field: ToManyField, queryset: QuerySet) -> None:
+        self.name = name
+        self.related_field = related_field
+        self.queryset = queryset
+
+    def can_annotate(self, using: str) -> bool:
+        return True
+
+    def as_expression(self) -> Exists:
+        lookup = get_reverse_lookup(self.related_field)
+        return Exists(self.queryset.filter(**{lookup: OuterRef("pk")}))
+
+    def __call__(self, instances: list[Model]) -> None:
+        pks = {instance.pk for instance in instances}
+        found = self.fetch_existing(pks) if pks else set()
+        for instance in instances:
+            setattr(instance, self.name, instance.pk in found)
+
+    def fetch_existing(self, pks: set[Any]) -> set[Any]:
+        lookup = get_reverse_lookup(self.related_field)
+        queryset = self.queryset.filter(**{f"{lookup}__in": pks})
+        return set(queryset.order_by().values_list(lookup, flat=True).distinct())
+
+
+class RelatedValues:
+    """
+    Collects the values of a column from the rows in the given queryset for a to-many relation
+    to a list, and sets the list to the attribute with the given name on each instance.
+
+    On the queryset for the instances, this can be done with a subquery annotation that aggregates
+    the values to a JSON array in the database. For instances fetched with `select_related`, the values
+    are fetched after the instances have been fetched, with a single query that only fetches the values
+    and the primary keys of the instances they belong to. The same is done on databases that
+    don't support the subquery annotation.
+    """
+
+    def __init__(self, name: str, related_field: ToManyField, queryset: QuerySet, column: str) -> None:
+        self.name = name
+        self.related_field = related_field
+        self.queryset = queryset
+        self.column = column
+
+    def can_annotate(self, using: str) -> bool:
+        # Other databases can't aggregate the values in a subquery, so they're fetched afterwards.
+        return connections[using].vendor in SubqueryJSONArray.vendors
+
+    def as_expression(self) -> SubqueryJSONArray:
+        lookup = get_reverse_lookup(self.related_field)
+        queryset = self.queryset.filter(**{lookup: OuterRef("pk")})
+        return SubqueryJSONArray(queryset.values(**{SubqueryJSONArray.column: F(self.column)}))
+
+    def __call__(self, instances: list[Model]) -> None:
+        pks = {instance.pk for instance in instances}
+        values = self.fetch_values(pks) if pks else {}
+        for instance in instances:
+            setattr(instance, self.name, values.get(instance.pk, []))
+
+    def fetch_values(self, pks: set[Any]) -> dict[Any, list[Any]]:
+        lookup = get_reverse_lookup(self.related_field)
+        queryset = self.queryset.filter(**{f"{lookup}__in": pks})
+        values: dict[Any, list[Any]] = {}
+        for pk, value in queryset.values_list(lookup, self.column):
+            values.setdefault(pk, []).append(value)
+        return values
+
+
+class CoalescedMember(NamedTuple):
+    to_attr: str
+    related_field: ToManyField
+    queryset: QuerySet
+
+
+class CoalescedPrefetch:
+    """
+    Prefetches several to-many relations to the same model for the fetched instances with a single
+    `UNION ALL` query, instead of making a separate query for each relation. Each member of the union
+    is tagged with its index and the primary key of the instance it belongs to, which are used to split
+    the rows back to the members' prefetch caches. The member querysets should select the same columns.
+    """
+
+    def __init__(self, members: list[CoalescedMember], ordering: tuple[str, ...]) -> None:
+        self.members = members
+        self.ordering = ordering
+
+    def __call__(self, instances: list[Model]) -> None:
+        pks = list(dict.fromkeys(instance.pk for instance in instances))
+        rows: dict[int, dict[Any, list[Model]]] = {}
+        for chunk in self.in_chunks(pks):
+            for index, related_instances in self.fetch_rows(set(chunk)).items():
+                rows.setdefault(index, {}).update(related_instances)
+
+        for index, member in enumerate(self.members):
+            related_instances: dict[Any, list[Model]] = rows.get(index, {})
+            batch = [related for group in related_instances.values() for related in group]
+
+            # Run the hooks and nested prefetches the member's queryset would have run.
+            for chunk in in_chunks(batch, member.queryset.db):
+                for hook in member.queryset._hints.get(optimizer_settings.POST_FETCH_HOOKS_KEY, []):
+                    hook(chunk)
+            if member.queryset._prefetch_related_lookups:
+                prefetch_related_objects(batch, *member.queryset._prefetch_related_lookups)
+
+            for instance in instances:
+                set_prefetched(instance, member.to_attr, related_instances.get(instance.pk, []))
+
+    def in_chunks(self, pks: list[Any]) -> Iterator[list[Any]]:
+        """
+        Split the given primary keys to chunks small enough for the union query. Every member of the union
+        filters by all primary keys in the chunk, in addition to its own filters, so the chunks need to be
+        smaller than for a single prefetch query for the query to stay within the database's parameter limit.
+        """
+        using = self.members[0].queryset.db
+        chunk_size = get_prefetch_chunk_size(using)
+        if chunk_size is None or not pks:
+            yield pks
+            return
+
+        # The index of each member is also a parameter.
+        member_params = sum(len(member.queryset.query.sql_with_params()[1]) + 1 for member in self.members)
+        chunk_size = max((chunk_size - member_params) // len(self.members), 1)
+        for start in range(0, len(pks), chunk_size):
+            yield pks[start : start + chunk_size]
+
+    def fetch_rows(self, pks: set[Any]) -> dict[int, dict[Any, list[Model]]]:
+        index_key = optimizer_settings.PREFETCH_COALESCE_INDEX
+        parent_key = optimizer_settings.PREFETCH_COALESCE_PARENT
+
+        querysets: list[QuerySet] = []
+        for index, member in enumerate(self.members):
+            lookup = get_reverse_lookup(member.related_field)
+            queryset = member.queryset.filter(**{f"{lookup}__in": pks}).prefetch_related(None).order_by()
+            queryset = queryset.annotate(**{index_key: Value(index), parent_key: F(lookup)})
+            querysets.append(queryset)
+
+        queryset = querysets[0].union(*querysets[1:], all=True)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        # Hooks are run separately for each member's rows. Hints are shared with the member querysets.
+        queryset._iterable_class = ModelIterable
+        queryset._hints = {
+            key: value  # .
+            for key, value in queryset._hints.items()
+            if key != optimizer_settings.POST_FETCH_HOOKS_KEY
+        }
+
+        rows: dict[int, dict[Any, list[Model]]] = {}
+        for related_instance in count_rows(queryset):
+            index = getattr(related_instance, index_key)
+            parent_pk = getattr(related_instance, parent_key)
+            rows.setdefault(index, {}).setdefault(parent_pk, []).append(related_instance)
+        return rows
+
+
+class DeduplicatedManyToManyPrefetch:
+    """
+    Prefetches a many-to-many relation for the fetched instances in two steps: first, the pairs of
+    primary keys for the related rows are fetched from the through table, and then each distinct
+    related row is fetched once with the given queryset. Related instances are shared between
+    the instances they are related to. When many instances share the same related rows, this fetches
+    much less data than a normal prefetch, which fetches a related row for each pair.
+    """
+
+    def __init__(self, to_attr: str, related_field: ManyToManyField | ManyToManyRel, queryset: QuerySet) -> None:
+        self.to_attr = to_attr
+        self.related_field = related_field
+        self.queryset = queryset
+
+    def __call__(self, instances: list[Model]) -> None:
+        pks = {instance.pk for instance in instances}
+        if not pks:
+            return
+
+        source, target = get_through_fields(self.related_field)
+        through_queryset = source.model._default_manager.filter(**{f"{source.attname}__in": pks}).order_by()
+        pairs = list(through_queryset.values_list(source.attname, target.attname))
+
+        # Filter the related rows with a subquery to the through table instead of the related primary keys,
+        # so that the number of query parameters is bounded by the number of instances.
+        queryset = self.queryset.filter(pk__in=through_queryset.values(target.attname))
+        related_instances = evaluate_with_prefetch_hack(queryset)
+
+        # Keep the ordering of the related queryset for each instance.
+        positions = {related.pk: position for position, related in enumerate(related_instances)}
+        related_by_pk = {related.pk: related for related in related_instances}
+        related_pks_by_instance: dict[Any, list[Any]] = {}
+        for pk, related_pk in pairs:
+            if related_pk in related_by_pk:
+                related_pks_by_instance.setdefault(pk, []).append(related_pk)
+
+        for instance in instances:
+            related_pks_for_instance = sorted(related_pks_by_instance.get(instance.pk, []), key=positions.__getitem__)
+            set_prefetched(instance, self.to_attr, [related_by_pk[pk] for pk in related_pks_for_instance])
+
+
+def get_through_fields(related_field: ManyToManyField | ManyToManyRel) -> tuple[ForeignKey, ForeignKey]:
+    """
+    Get the foreign keys on the through model of the given many-to-many relation
+    to the relation's model and to the related model, in that order.
+    """
+    field: ManyToManyField = related_field if isinstance(related_field, ManyToManyField) else related_field.field
+    through: type[Model] = field.remote_field.through
+    source = through._meta.get_field(field.m2m_field_name())
+    target = through._meta.get_field(field.m2m_reverse_field_name())
+    if not isinstance(related_field, ManyToManyField):
+        source, target = target, source
+    return source, target
+
+
+def set_prefetched(instance: Model, to_attr: str, related_instances: list[Model]) -> None:
+    """
+    Set the given related instances as the prefetched results for the given to-many relation of the instance.
+    If `to_attr` is the name of the relation, the results are set to its prefetch cache, like Django would.
+    """
+    manager = getattr(type(instance), to_attr, None)
+    if manager is None or not hasattr(manager, "related_manager_cls"):
+        setattr(instance, to_attr, related_instances)
+        return
+
+    related_manager = getattr(instance, to_attr)
+    cache_name: str | None = getattr(related_manager, "prefetch_cache_name", None)
+    if cache_name is None:
+        remote_field = related_manager.field.remote_field
+        # New in Django 5.1
+        cache_name = remote_field.cache_name if hasattr(remote_field, "cache_name") else remote_field.get_cache_name()
+
+    queryset = related_manager.get_queryset()
+    queryset._result_cache = related_instances
+    queryset._prefetch_done = True
+    mark_optimized(queryset)
+    if not hasattr(instance, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[cache_name] = queryset
+
+
+def is_prefetched(instance: Any, to_attr: str) -> bool:
+    """Have the results for the given to-many relation or `to_attr` been prefetched to the instance?"""
+    if to_attr in getattr(instance, "__dict__", {}):
+        return True
+
+    manager = getattr(type(instance), to_attr, None)
+    if manager is None or not hasattr(manager, "related_manager_cls"):
+        return False
+
+    cache_name: str | None = getattr(getattr(instance, to_attr), "prefetch_cache_name", None)
+    return cache_name in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def get_reverse_lookup(related_field: ToManyField) -> str:
+    """Get the lookup from the related model of the given to-many relation back to the relation's model."""
+    if isinstance(related_field, ForeignObjectRel):
+        return related_field.field.name
+    return related_field.related_query_name()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+from .ast import get_model_field
+from .errors import OptimizerError
+from .prefetch_hack import evaluate_with_prefetch_hack, in_chunks
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+
+    from .typing import Any, Callable, GQLInfo, Hashable
+
+    KeyResolver = Callable[[Model, GQLInfo], Any]
+
+
+__all__ = [
+    "BatchLoader",
+    "get_batch_loader",
+]
+
+
+class BatchLoader:
+    """
+    Loads related instances for a to-one field with a custom resolver for all parent instances
+    fetched on the same level of the query with a single optimized query.
+
+    The loader is registered as a post-fetch hook for the parent instances. When the field is resolved
+    for the first parent instance, the field's resolver is called for all registered parent instances
+    to get the keys of their related instances, and all related instances are fetched by their keys.
+    The related instances for the rest of the parent instances are then read from the loaded results.
+    """
+
+    def __init__(self, model: type[Model], key_field: str) -> None:
+        self.model = model
+        self.key_field = key_field
+        self.pending: dict[int, Model] = {}
+        self.results: dict[int, tuple[Model, Model | None]] = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, instances: list[Model]) -> None:
+        with self.lock:
+            for instance in instances:
+                if id(instance) not in self.results:
+                    self.pending.setdefault(id(instance), instance)
+
+    def load(self, root: Model, info: GQLInfo, key_resolver: KeyResolver) -> Model | None:
+        """Load the related instance for the given parent instance, loading all pending instances at the same time."""
+        with self.lock:
+            if id(root) not in self.results:
+                self.pending.setdefault(id(root), root)
+                roots, self.pending = self.pending, {}
+                keys = {root_id: key_resolver(parent, info) for root_id, parent in roots.items()}
+                instances = self.fetch({key for key in keys.values() if key is not None}, info)
+                for root_id, key in keys.items():
+                    # Keep a reference to the parent instance, so that its id is not reused.
+                    self.results[root_id] = (roots[root_id], instances.get(key))
+
+            return self.results[id(root)][1]
+
+    def fetch(self, keys: set[Any], info: GQLInfo) -> dict[Any, Model]:
+        """Fetch the related instances with the given keys, optimizing the queryset for the field's selections."""
+        from .compiler import OptimizationCompiler  # noqa: PLC0415
+
+        if not keys:
+            return {}
+
+        key_field = get_model_field(self.model, self.key_field)
+        if key_field is None or (key_field.is_relation and not key_field.concrete):
+            msg = f"Cannot load '{self.model.__name__}' instances by '{self.key_field}'."
+            raise OptimizerError(msg)
+
+        queryset = self.model._default_manager.all()
+        optimizer = OptimizationCompiler(info).compile(queryset)
+        if optimizer is not None:
+            optimizer.only_fields.append(key_field.attname)
+            queryset = optimizer.optimize_queryset(queryset)
+
+        instances: dict[Any, Model] = {}
+        for chunk in in_chunks(list(keys), queryset.db):
+            for instance in evaluate_with_prefetch_hack(queryset.filter(**{f"{self.key_field}__in": chunk})):
+                instances[getattr(instance, key_field.attname)] = instance
+        return instances
+
+
+def get_batch_loader(context: Any, key: Hashable, model: type[Model], key_field: str) -> BatchLoader:
+    """Get the request-scoped batch loader stored with the given key in the request context, creating it if needed."""
+    if not hasattr(context, "optimizer_batch_loaders"):
+        context.optimizer_batch_loaders = {}
+    return context.optimizer_batch_loaders.setdefault(key, BatchLoader(model, key_field))
@@ -2,11 +2,13 @@
 
 import dataclasses
 from copy import copy
+from itertools import chain
 from typing import TYPE_CHECKING
 
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, router
 from django.db.models import ManyToManyField, ManyToManyRel, Prefetch
 from django.db.models.constants import LOOKUP_SEP
 from django.db.models.functions import RowNumber
@@ -15,10 +17,25 @@
 from graphene_django.settings import graphene_settings
 
 from .ast import get_model_field
+from .budgets import create_field_budget, get_budget, set_budget
+from .expressions import can_relocate_expression, relocate_expression
 from .filter_info import get_filter_info
+from .iterables import (
+    CoalescedMember,
+    CoalescedPrefetch,
+    DeduplicatedManyToManyPrefetch,
+    PkOnlyRelations,
+    PrefetchAliases,
+    RelatedInstancesHook,
+    RelocatedAnnotations,
+    add_post_fetch_hooks,
+    get_through_fields,
+)
+from .loaders import get_batch_loader
+from .planner import should_prefetch_to_one
 from .prefetch_hack import register_for_prefetch_hack
 from .settings import optimizer_settings
-from .typing import Generic, TModel
+from .typing import Generic, GraphQLFilterInfo, TModel
 from .utils import (
     SubqueryCount,
     add_slice_to_queryset,
@@ -28,13 +45,17 @@
     optimizer_logger,
     swappable_by_subclassing,
 )
-from .validators import validate_pagination_args
+from .validators import validate_limit_args, validate_pagination_args
 
 if TYPE_CHECKING:
     from django.db.models import Model, QuerySet
 
+    from .budgets import ResourceBudget
+    from .fields import RelatedField, RelatedSubqueryField
+    from .iterables import GroupedAggregate, PostFetchHook, RelatedSubquery
+    from .loaders import BatchLoader
     from .types import DjangoObjectType
-    from .typing import Any, ExpressionKind, GQLInfo, GraphQLFilterInfo, Literal, QuerySetResolver, ToManyField
+    from .typing import Any, ExpressionKind, GQLInfo, Hashable, Literal, PrefetchHook, QuerySetResolver, ToManyField
 
 __all__ = [
     "QueryOptimizer",
@@ -49,9 +70,25 @@ class OptimizationResults(Generic[TModel]):
     related_fields: list[str] = dataclasses.field(default_factory=list)
     select_related: list[str] = dataclasses.field(default_factory=list)
     prefetch_related: list[Prefetch | str] = dataclasses.field(default_factory=list)
+    aliases: dict[str, ExpressionKind] = dataclasses.field(default_factory=dict)
+    annotations: dict[str, ExpressionKind] = dataclasses.field(default_factory=dict)
+    post_fetch_hooks: list[PostFetchHook] = dataclasses.field(default_factory=list)
+    related_subqueries: list[RelatedSubquery] = dataclasses.field(default_factory=list)
+    record_queryset: bool = False
 
     def __add__(self, other: OptimizationResults) -> OptimizationResults:
         """Adding two compilation results together means extending the lookups to the other model."""
+        # Annotations are relocated to this model by prefixing them with the relation name.
+        renames = {name: f"{other.name}{LOOKUP_SEP}{name}" for name in chain(other.aliases, other.annotations)}
+        for name, expression in other.aliases.items():
+            self.aliases[renames[name]] = relocate_expression(expression, other.name, renames)
+        for name, expression in other.annotations.items():
+            self.annotations[renames[name]] = relocate_expression(expression, other.name, renames)
+
+        self.post_fetch_hooks.extend(RelatedInstancesHook(other.name, hook) for hook in other.post_fetch_hooks)
+        # Subqueries to related rows cannot be relocated, so run them for the related instances after fetching.
+        self.post_fetch_hooks.extend(RelatedInstancesHook(other.name, hook) for hook in other.related_subqueries)
+
         self.select_related.append(other.name)
         self.only_fields.extend(f"{other.name}{LOOKUP_SEP}{only}" for only in other.only_fields)
         self.related_fields.extend(f"{other.name}{LOOKUP_SEP}{only}" for only in other.related_fields)
@@ -66,6 +103,14 @@ def __add__(self, other: OptimizationResults) -> OptimizationResults:
 
         return self
 
+    @property
+    def can_relocate_annotations(self) -> bool:
+        """Can the annotations in these results be relocated to a model that joins this model?"""
+        return all(
+            can_relocate_expression(expression)
+            for expression in chain(self.aliases.values(), self.annotations.values())
+        )
+
 
 @swappable_by_subclassing
 class QueryOptimizer:
@@ -82,15 +127,69 @@ def __init__(
         self.info = info
         self.only_fields: list[str] = []
         self.related_fields: list[str] = []
+        self.pk_only_relations: set[str] = set()
         self.aliases: dict[str, ExpressionKind] = {}
         self.annotations: dict[str, ExpressionKind] = {}
         self.select_related: dict[str, QueryOptimizer] = {}
         self.prefetch_related: dict[str, QueryOptimizer] = {}
+        self.required_prefetches: dict[str, QueryOptimizer] = {}
         self.manual_optimizers: dict[str, QuerySetResolver] = {}
+        self.aggregates: dict[Hashable, GroupedAggregate] = {}
+        self.subquery_fields: dict[str, RelatedSubqueryField] = {}
+        self.batch_fields: dict[Hashable, RelatedField] = {}
+        self.generic_prefetches: dict[type[Model], QueryOptimizer] = {}
         self.total_count: bool = False
+        self.strategy: Literal["select_related", "prefetch_related"] | None = None
+        self.prefetch_hook: PrefetchHook | None = None
+        self.parent_subquery: bool = False
+        self.budget_limits: dict[str, Any] = {}
+        self.budget_field_name: str | None = None
+        # Budget the optimized queryset is evaluated with, set when the optimizations are processed.
+        self.budget: ResourceBudget | None = None
         self.name = name
         self.parent: QueryOptimizer | None = parent
 
+    def clone(self, info: GQLInfo | None, parent: QueryOptimizer | None = None) -> QueryOptimizer:
+        """
+        Create a copy of this optimizer and its child optimizers for the given GraphQLResolveInfo.
+        Used for reusing compiled optimizations between executions of the same GraphQL document.
+        Cached optimizers are cloned without a GraphQLResolveInfo, so that they don't keep
+        a reference to the request they were compiled for.
+        """
+        optimizer = QueryOptimizer(model=self.model, info=info, name=self.name, parent=parent)
+        optimizer.only_fields = copy(self.only_fields)
+        optimizer.related_fields = copy(self.related_fields)
+        optimizer.pk_only_relations = copy(self.pk_only_relations)
+        optimizer.aliases = copy(self.aliases)
+        optimizer.annotations = copy(self.annotations)
+        optimizer.manual_optimizers = copy(self.manual_optimizers)
+        optimizer.aggregates = copy(self.aggregates)
+        optimizer.subquery_fields = copy(self.subquery_fields)
+        optimizer.batch_fields = copy(self.batch_fields)
+        optimizer.total_count = self.total_count
+        optimizer.strategy = self.strategy
+        optimizer.prefetch_hook = self.prefetch_hook
+        optimizer.parent_subquery = self.parent_subquery
+        optimizer.budget_limits = copy(self.budget_limits)
+        optimizer.budget_field_name = self.budget_field_name
+        optimizer.select_related = {
+            name: child.clone(info, parent=optimizer)  # .
+            for name, child in self.select_related.items()
+        }
+        optimizer.prefetch_related = {
+            name: child.clone(info, parent=optimizer)  # .
+            for name, child in self.prefetch_related.items()
+        }
+        optimizer.required_prefetches = {
+            name: child.clone(info, parent=optimizer)  # .
+            for name, child in self.required_prefetches.items()
+        }
+        optimizer.generic_prefetches = {
+            model: child.clone(info, parent=optimizer)  # .
+            for model, child in self.generic_prefetches.items()
+        }
+        return optimizer
+
     def optimize_queryset(self, queryset: QuerySet[TModel]) -> QuerySet[TModel]:
         """
         Add the optimizations in this optimizer to the given queryset.
@@ -98,6 +197,7 @@ def optimize_queryset(self, queryset: QuerySet[TModel]) -> QuerySet[TModel]:
         :param queryset: QuerySet to optimize.
         """
         filter_info = get_filter_info(self.info, queryset.model)
+        self.budget = get_budget(self.info, queryset.model)
         results = self.process(queryset, filter_info)
         return self.optimize(results, filter_info)
 
@@ -119,15 +219,24 @@ def process(self, queryset: QuerySet[TModel], filter_info: GraphQLFilterInfo) ->
             queryset=queryset,
             only_fields=self.only_fields,
             related_fields=self.related_fields,
+            aliases=copy(self.aliases),
+            annotations=copy(self.annotations),
+            post_fetch_hooks=[*self.aggregates.values(), *self.get_batch_loaders(), *self.get_pk_only_hooks()],
+            related_subqueries=[
+                self.process_subquery_field(name, field, filter_info)  # .
+                for name, field in self.subquery_fields.items()
+            ],
         )
 
         for name, optimizer in self.select_related.items():
+            optimizer.budget = self.budget
             queryset = optimizer.model._default_manager.all()
             nested_filter_info = filter_info.get("children", {}).get(name, {})
             nested_results = optimizer.process(queryset, nested_filter_info)
 
-            # Promote `select_related` to `prefetch_related` if any annotations are needed.
-            if optimizer.annotations:
+            # Promote `select_related` to `prefetch_related` if any annotations are needed that
+            # cannot be relocated to this model, or if a separate query is estimated to be cheaper.
+            if not nested_results.can_relocate_annotations or optimizer.should_prefetch(nested_results):
                 prefetch = optimizer.process_prefetch(name, nested_results, nested_filter_info)
                 results.prefetch_related.append(prefetch)
                 continue
@@ -135,21 +244,240 @@ def process(self, queryset: QuerySet[TModel], filter_info: GraphQLFilterInfo) ->
             # Otherwise extend lookups to this model.
             results += nested_results
 
-        for name, optimizer in self.prefetch_related.items():
-            # For generic foreign keys, we don't know the model, so we can't optimize the queryset.
+        shared_prefetches: dict[str, str] = {}
+        coalesce_candidates: list[tuple[str, QueryOptimizer, QuerySet]] = []
+        prefetches = self.get_prefetches(filter_info, shared_prefetches)
+
+        # Aliases can also share the prefetch to the relation's default cache, even if it's selected after them.
+        fingerprints: list[tuple[tuple[Any, ...], str]] = [
+            ((optimizer.fingerprint(), nested_filter_info), name)
+            for name, optimizer, nested_filter_info in prefetches
+            if name == optimizer.name and optimizer.model is not None
+        ]
+
+        for name, optimizer, nested_filter_info in prefetches:
+            # Prefetches count towards the budget of this model's query, and optionally to their own budget.
+            optimizer.budget = create_field_budget(
+                optimizer.budget_limits,
+                optimizer.budget_field_name or optimizer.name,
+                parent=self.budget,
+            )
+
+            # Generic foreign keys are optimized separately for each model they can point to.
             if optimizer.model is None:
-                results.prefetch_related.append(optimizer.name)
+                results.prefetch_related.append(optimizer.process_generic_prefetch(nested_filter_info))
                 continue
 
+            # Aliases for the same relation with identical selections and arguments can share a single prefetch.
+            # Prefetches to the relation's default cache are read by the default resolver, so they are always made,
+            # and aliases with the same fingerprint share them instead.
+            fingerprint = (optimizer.fingerprint(), nested_filter_info)
+            shared = next((to_attr for other, to_attr in fingerprints if other == fingerprint), None)
+            if shared is not None and name != optimizer.name:
+                shared_prefetches[name] = shared
+                continue
+            fingerprints.append((fingerprint, name))
+
             queryset = optimizer.model._default_manager.all()
-            nested_filter_info = filter_info.get("children", {}).get(name, {})
+            if optimizer.prefetch_hook is not None:
+                queryset = optimizer.prefetch_hook(queryset, self.info)
+
             nested_results = optimizer.process(queryset, nested_filter_info)
 
+            # Prefetches filtered by a subquery of this model's query need the instances to record their query.
+            if optimizer.parent_subquery and optimizer.can_filter_by_parent_subquery():
+                prefetch = optimizer.process_prefetch(name, nested_results, nested_filter_info)
+                prefetch.queryset._hints[optimizer_settings.PREFETCH_PARENT_SUBQUERY_KEY] = True
+                results.prefetch_related.append(prefetch)
+                results.record_queryset = True
+                continue
+
+            # Many-to-many relations with many shared related rows can be fetched in two steps.
+            if optimizer_settings.DEDUPLICATE_MANY_TO_MANY_PREFETCHES and optimizer.can_deduplicate(nested_filter_info):
+                queryset = optimizer.optimize(nested_results, nested_filter_info)
+                field = get_model_field(self.model, optimizer.name)
+                results.post_fetch_hooks.append(DeduplicatedManyToManyPrefetch(name, field, queryset))
+                continue
+
+            # Prefetches to the same model can be combined into a single query after all of them are known.
+            if optimizer_settings.COALESCE_PREFETCHES and optimizer.can_coalesce(nested_filter_info):
+                coalesce_candidates.append((name, optimizer, optimizer.optimize(nested_results, nested_filter_info)))
+                continue
+
             prefetch = optimizer.process_prefetch(name, nested_results, nested_filter_info)
             results.prefetch_related.append(prefetch)
 
+        if coalesce_candidates:
+            self.coalesce_prefetches(coalesce_candidates, results)
+        self.add_prefetch_aliases(shared_prefetches, results)
+
         return results
 
+    def add_prefetch_aliases(self, shared_prefetches: dict[str, str], results: OptimizationResults) -> None:
+        """Mark the aliases that share a prefetch with another alias on the fetched instances."""
+        if not shared_prefetches:
+            return
+        # Selections prefetched to a separate attribute can also share the prefetch of an alias.
+        shared_prefetches = {name: shared_prefetches.get(shared, shared) for name, shared in shared_prefetches.items()}
+        results.post_fetch_hooks.append(PrefetchAliases(shared_prefetches))
+
+    def get_prefetches(
+        self,
+        filter_info: GraphQLFilterInfo,
+        shared_prefetches: dict[str, str],
+    ) -> list[tuple[str, QueryOptimizer, GraphQLFilterInfo]]:
+        """
+        Get the to-many relations to prefetch with the attributes to prefetch them to and their filter info.
+
+        Resolvers requiring the rows of a relation read them from the relation's default cache. If the relation
+        is also selected with filters or pagination, the selection is prefetched to a separate attribute
+        (marked in the given shared prefetches), and the required fields to the relation's default cache.
+        """
+        prefetches: list[tuple[str, QueryOptimizer, GraphQLFilterInfo]] = []
+        for name, optimizer in self.prefetch_related.items():
+            nested_filter_info = filter_info.get("children", {}).get(name, {})
+
+            required = self.required_prefetches.get(name)
+            if required is not None and optimizer.modifies_relation(nested_filter_info):
+                to_attr = f"{optimizer_settings.PREFETCH_SELECTION_PREFIX}{name}"
+                shared_prefetches[name] = to_attr
+                prefetches.append((to_attr, optimizer, nested_filter_info))
+                prefetches.append((name, required, GraphQLFilterInfo()))
+                continue
+
+            prefetches.append((name, optimizer, nested_filter_info))
+        return prefetches
+
+    def modifies_relation(self, filter_info: GraphQLFilterInfo) -> bool:
+        """Does the prefetch for this to-many relation not contain all of the relation's rows?"""
+        return bool(filter_info.get("filters")) or is_paginated(filter_info) or self.prefetch_hook is not None
+
+    def can_coalesce(self, filter_info: GraphQLFilterInfo) -> bool:
+        """Can the prefetch for this to-many relation be combined with other prefetches to the same model?"""
+        # Paginated prefetches use window functions that cannot be combined.
+        # Prefetches with their own resource limits need their own query to be tracked separately.
+        if is_paginated(filter_info) or self.budget_limits:
+            return False
+
+        field: ToManyField | None = get_model_field(self.parent.model, self.name)
+        if not isinstance(field, models.ManyToOneRel | ManyToManyField | ManyToManyRel):
+            return False
+
+        connection = connections[router.db_for_read(self.model)]
+        return connection.features.supports_select_union
+
+    def can_filter_by_parent_subquery(self) -> bool:
+        """Can the prefetch for this to-many relation be filtered with a subquery of the parent model's query?"""
+        field: ToManyField | None = get_model_field(self.parent.model, self.name)
+        if isinstance(field, models.ManyToOneRel):
+            through_field = field.field
+        elif isinstance(field, ManyToManyField | ManyToManyRel):
+            through_field = get_through_fields(field)[0]
+        else:
+            return False
+
+        # The subquery selects the primary keys of the parent model.
+        return through_field.target_field == self.parent.model._meta.pk
+
+    def can_deduplicate(self, filter_info: GraphQLFilterInfo) -> bool:
+        """Can this many-to-many relation be prefetched by fetching each distinct related row only once?"""
+        # Paginated prefetches need to be limited separately for each parent.
+        # Prefetches with their own resource limits are tracked when Django makes the prefetch.
+        if is_paginated(filter_info) or self.budget_limits:
+            return False
+
+        field: ToManyField | None = get_model_field(self.parent.model, self.name)
+        if not isinstance(field, ManyToManyField | ManyToManyRel):
+            return False
+
+        # Through table rows are matched to the primary keys of the parent and related instances.
+        return all(
+            through_field.target_field == through_field.related_model._meta.pk
+            for through_field in get_through_fields(field)
+        )
+
+    def coalesce_prefetches(
+        self,
+        candidates: list[tuple[str, QueryOptimizer, QuerySet]],
+        results: OptimizationResults,
+    ) -> None:
+        """
+        Combine the prefetch querysets that select the same columns from the same model to a single
+        `UNION ALL` query, which is made in a post-fetch hook. Other querysets are prefetched normally.
+        """
+        groups: dict[Hashable, list[tuple[str, QueryOptimizer, QuerySet]]] = {}
+        for name, optimizer, queryset in candidates:
+            key = get_coalesce_key(queryset)
+            if key is None:
+                groups[name] = [(name, optimizer, queryset)]
+                continue
+            groups.setdefault(key, []).append((name, optimizer, queryset))
+
+        for key, group in groups.items():
+            if len(group) == 1:
+                name, optimizer, queryset = group[0]
+                to_attr = name if name != optimizer.name else None
+                results.prefetch_related.append(Prefetch(optimizer.name, queryset, to_attr=to_attr))
+                continue
+
+            ordering: tuple[str, ...] = key[-1]
+            members = [
+                CoalescedMember(
+                    to_attr=name,
+                    related_field=get_model_field(self.model, optimizer.name),
+                    queryset=queryset,
+                )
+                for name, optimizer, queryset in group
+            ]
+            results.post_fetch_hooks.append(CoalescedPrefetch(align_loaded_fields(members, ordering), ordering))
+
+    def fingerprint(self) -> tuple[Any, ...]:
+        """
+        Get a value identifying the optimizations in this optimizer and its child optimizers.
+        Optimizers with equal fingerprints make identical queries, even if they are for different aliases.
+        """
+        return (
+            self.model,
+            self.name,
+            frozenset(self.only_fields),
+            frozenset(self.related_fields),
+            self.aliases,
+            self.annotations,
+            self.manual_optimizers,
+            {key: (aggregate.filter, aggregate.aggregates) for key, aggregate in self.aggregates.items()},
+            self.subquery_fields,
+            self.batch_fields,
+            self.total_count,
+            self.strategy,
+            self.prefetch_hook,
+            self.parent_subquery,
+            {name: child.fingerprint() for name, child in self.select_related.items()},
+            {name: child.fingerprint() for name, child in self.prefetch_related.items()},
+            {model: child.fingerprint() for model, child in self.generic_prefetches.items()},
+        )
+
+    def get_batch_loaders(self) -> list[BatchLoader]:
+        """Get the loaders for the batched related fields, which collect the instances fetched by this optimizer."""
+        return [
+            get_batch_loader(self.info.context, key, field.underlying_type._meta.model, field.batch_by)
+            for key, field in self.batch_fields.items()
+        ]
+
+    def get_pk_only_hooks(self) -> list[PkOnlyRelations]:
+        """Mark the relations where only the primary key was selected, so that they're resolved from the foreign key."""
+        if not self.pk_only_relations:
+            return []
+        return [PkOnlyRelations(frozenset(self.pk_only_relations))]
+
+    def should_prefetch(self, results: OptimizationResults) -> bool:
+        """Should this to-one relation be fetched with 'prefetch_related' instead of 'select_related'?"""
+        if self.strategy is not None:
+            return self.strategy == "prefetch_related"
+        if not optimizer_settings.COST_BASED_TO_ONE_PLANNING:
+            return False
+        lookups = [*results.only_fields, *results.related_fields]
+        return should_prefetch_to_one(self.parent.model, self.model, lookups)
+
     def optimize(self, results: OptimizationResults[TModel], filter_info: GraphQLFilterInfo) -> QuerySet[TModel]:
         """Optimize the given queryset based on the optimization results."""
         queryset = results.queryset
@@ -159,27 +487,82 @@ def optimize(self, results: OptimizationResults[TModel], filter_info: GraphQLFil
         if results.prefetch_related:
             queryset = queryset.prefetch_related(*results.prefetch_related)
         if not optimizer_settings.DISABLE_ONLY_FIELDS_OPTIMIZATION and (results.only_fields or results.related_fields):
-            queryset = queryset.only(*results.only_fields, *results.related_fields)
-        if self.aliases:
-            queryset = queryset.alias(**self.aliases)
-        if self.annotations:
-            queryset = queryset.annotate(**self.annotations)
+            # Querysets from related managers set the parent instance to the fetched instances,
+            # which reads the foreign key, so it shouldn't be deferred.
+            known_related = [field.attname for field in queryset._known_related_objects]
+            queryset = queryset.only(*results.only_fields, *results.related_fields, *known_related)
+        if results.aliases:
+            queryset = queryset.alias(**results.aliases)
+        if results.annotations:
+            queryset = queryset.annotate(**results.annotations)
+        subqueries = [sub for sub in results.related_subqueries if sub.can_annotate(queryset.db)]
+        if subqueries:
+            queryset = queryset.annotate(**{sub.name: sub.as_expression() for sub in subqueries})
 
         queryset = self.filter_queryset(queryset, filter_info)
 
+        post_fetch_hooks = list(results.post_fetch_hooks)
+        post_fetch_hooks += [sub for sub in results.related_subqueries if sub not in subqueries]
+        # Annotations relocated from joined models need to be copied to their related model instances.
+        relocated = [name for name in results.annotations if name not in self.annotations]
+        if relocated:
+            post_fetch_hooks.insert(0, RelocatedAnnotations(relocated))
+        # Also adds the iterable counting fetched rows towards resource budgets.
+        add_post_fetch_hooks(queryset, post_fetch_hooks)
+        set_budget(queryset, self.budget)
+        if results.record_queryset:
+            queryset._hints[optimizer_settings.PREFETCH_SOURCE_QUERYSET_KEY] = True
+
         mark_optimized(queryset)
         return queryset
 
+    def process_subquery_field(
+        self,
+        name: str,
+        field: RelatedSubqueryField,
+        filter_info: GraphQLFilterInfo,
+    ) -> RelatedSubquery:
+        """Process a subquery field, filtering and ordering the related queryset based on the given filter info."""
+        related_field: ToManyField = get_model_field(self.model, field.relation)
+        queryset = related_field.related_model._default_manager.all()
+        if field.filter is not None:
+            queryset = queryset.filter(field.filter)
+        if field.order_by:
+            queryset = queryset.order_by(*field.order_by)
+
+        subquery_filter_info = GraphQLFilterInfo(
+            filters=filter_info.get("children", {}).get(name, {}).get("filters", {}),
+            filterset_class=getattr(getattr(field.underlying_type, "_meta", None), "filterset_class", None),
+        )
+        queryset = self.filter_queryset(queryset, subquery_filter_info)
+        return field.get_related_subquery(name, related_field, queryset)
+
     def process_prefetch(self, to_attr: str, results: OptimizationResults, filter_info: GraphQLFilterInfo) -> Prefetch:
         """Process a prefetch, optimizing its queryset based on the given filter info."""
         queryset = self.optimize(results, filter_info)
         queryset = self.paginate_prefetch_queryset(queryset, filter_info)
         return Prefetch(self.name, queryset, to_attr=to_attr if to_attr != self.name else None)
 
+    def process_generic_prefetch(self, filter_info: GraphQLFilterInfo) -> Prefetch | str:
+        """
+        Process a prefetch for a generic foreign key, optimizing a queryset for each model
+        it can point to based on the fragments selected for the model's object type.
+        """
+        if not self.generic_prefetches:
+            return self.name
+
+        querysets: list[QuerySet] = []
+        for model, optimizer in self.generic_prefetches.items():
+            optimizer.budget = self.budget
+            queryset = model._default_manager.all()
+            results = optimizer.process(queryset, filter_info)
+            querysets.append(optimizer.optimize(results, filter_info))
+        return GenericPrefetch(self.name, querysets)
+
     def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFilterInfo) -> QuerySet:
         """Paginate prefetch queryset based on the given filter info after it has been filtered."""
-        # Only paginate nested connection fields.
-        if not filter_info.get("is_connection", False):
+        # Only paginate nested connection fields and limited list fields.
+        if not is_paginated(filter_info):
             return queryset
 
         field: ToManyField | None = get_model_field(self.parent.model, self.name)
@@ -200,6 +583,14 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
 
         order_by = self.get_prefetch_ordering(filter_info, model=queryset.model)
 
+        if filter_info.get("is_limited_list", False):
+            cut = validate_limit_args(
+                first=filter_info.get("filters", {}).get("first"),
+                offset=filter_info.get("filters", {}).get("offset"),
+                max_limit=filter_info.get("max_limit"),
+            )
+            return self.partition_prefetch_queryset(queryset, field, field_name, order_by, cut=cut)
+
         pagination_args = validate_pagination_args(
             after=filter_info.get("filters", {}).get("after"),
             before=filter_info.get("filters", {}).get("before"),
@@ -243,9 +634,31 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
             cut = calculate_queryset_slice(**pagination_args)
             queryset = add_slice_to_queryset(queryset, start=models.Value(cut.start), stop=models.Value(cut.stop))
 
+        return self.partition_prefetch_queryset(queryset, field, field_name, order_by)
+
+    def partition_prefetch_queryset(
+        self,
+        queryset: QuerySet,
+        field: ToManyField,
+        field_name: str,
+        order_by: list[str],
+        *,
+        cut: slice | None = None,
+    ) -> QuerySet:
+        """
+        Limit the rows of the prefetch queryset for each parent to the slice aliased to the queryset,
+        or the given slice, using a row number partitioned by the parent.
+        """
         if isinstance(field, ManyToManyField | ManyToManyRel):
             register_for_prefetch_hack(queryset, field)
 
+        start = models.F(optimizer_settings.PREFETCH_SLICE_START) if cut is None else models.Value(cut.start)
+        stop = models.F(optimizer_settings.PREFETCH_SLICE_STOP) if cut is None else models.Value(cut.stop)
+
+        filters = {f"{optimizer_settings.PREFETCH_PARTITION_INDEX}__gte": start}
+        if cut is None or cut.stop is not None:
+            filters[f"{optimizer_settings.PREFETCH_PARTITION_INDEX}__lt"] = stop
+
         return (
             queryset
             # Add a row number to the queryset, and limit the rows for each
@@ -261,12 +674,7 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
                         - models.Value(1)  # Start from zero.
                     )
                 },
-            ).filter(**{
-                f"{optimizer_settings.PREFETCH_PARTITION_INDEX}__gte": models.F(
-                    optimizer_settings.PREFETCH_SLICE_START
-                ),
-                f"{optimizer_settings.PREFETCH_PARTITION_INDEX}__lt": models.F(optimizer_settings.PREFETCH_SLICE_STOP),
-            })
+            ).filter(**filters)
         )
 
     def get_prefetch_ordering(self, filter_info: GraphQLFilterInfo, model: type[Model]) -> list[str]:
@@ -360,3 +768,42 @@ def get_or_set_child_optimizer(  # pragma: no cover
             return maybe_optimizer
         getattr(self, set_as)[name] = optimizer
         return optimizer
+
+
+def get_coalesce_key(queryset: QuerySet) -> tuple[Any, ...] | None:
+    """
+    Get a key for grouping prefetch querysets that can be combined into a single `UNION ALL` query.
+    Returns None if the queryset cannot be combined with other querysets.
+    """
+    query = queryset.query
+    # Joined models and distinct rows would change the columns and rows of a union member.
+    if query.select_related or query.distinct or query.extra or query.is_sliced:
+        return None
+
+    ordering = tuple(query.order_by or (queryset.model._meta.ordering if query.default_ordering else ()))
+    # The ordering is applied to the combined query, so it can only refer to the selected columns.
+    if any(not isinstance(order, str) or LOOKUP_SEP in order for order in ordering):
+        return None
+
+    return queryset.model, tuple(query.annotation_select), ordering
+
+
+def align_loaded_fields(members: list[CoalescedMember], ordering: tuple[str, ...]) -> list[CoalescedMember]:
+    """Make the members of a coalesced prefetch load the same fields, so that they select the same columns."""
+    only_fields: set[str] = set()
+    for member in members:
+        fields, defer = member.queryset.query.deferred_loading
+        # If any member loads all fields, all members need to.
+        if defer:
+            return [member._replace(queryset=member.queryset.defer(None)) for member in members]
+        only_fields.update(fields)
+
+    # The combined query is ordered by the selected columns.
+    model = members[0].queryset.model
+    only_fields.update(name for order in ordering if get_model_field(model, name := order.lstrip("-")) is not None)
+    return [member._replace(queryset=member.queryset.only(*sorted(only_fields))) for member in members]
+
+
+def is_paginated(filter_info: GraphQLFilterInfo) -> bool:
+    """Is the prefetch for the given filter info limited separately for each parent?"""
+    return filter_info.get("is_connection", False) or filter_info.get("is_limited_list", False)
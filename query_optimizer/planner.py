@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models.constants import LOOKUP_SEP
+
+from .ast import get_model_field
+from .settings import optimizer_settings
+from .utils import is_running_async, optimizer_logger
+
+if TYPE_CHECKING:
+    from django.db.models import Field, Model
+
+    from .typing import Iterable
+
+
+__all__ = [
+    "clear_table_statistics",
+    "estimate_row_count",
+    "estimate_row_width",
+    "should_prefetch_to_one",
+]
+
+
+# Estimated average width in bytes for values of different internal field types.
+FIELD_WIDTHS: dict[str, int] = {
+    "AutoField": 4,
+    "BigAutoField": 8,
+    "BigIntegerField": 8,
+    "BinaryField": 1024,
+    "BooleanField": 1,
+    "DateField": 4,
+    "DateTimeField": 8,
+    "DecimalField": 16,
+    "DurationField": 8,
+    "FloatField": 8,
+    "IntegerField": 4,
+    "JSONField": 1024,
+    "PositiveBigIntegerField": 8,
+    "PositiveIntegerField": 4,
+    "PositiveSmallIntegerField": 2,
+    "SmallAutoField": 2,
+    "SmallIntegerField": 2,
+    "TextField": 1024,
+    "TimeField": 8,
+    "UUIDField": 16,
+}
+DEFAULT_FIELD_WIDTH: int = 32
+
+_row_counts: dict[tuple[str, str], tuple[float, int | None]] = {}
+_row_counts_lock = threading.Lock()
+
+
+def should_prefetch_to_one(parent_model: type[Model], related_model: type[Model], lookups: list[str]) -> bool:
+    """
+    Estimate whether fetching a to-one relation with a separate prefetch query would be cheaper
+    than joining it to the parent model's query with `select_related`.
+
+    A join repeats the related row for every parent row, while a prefetch fetches each related row
+    only once, but costs an extra round trip to the database. For this reason, prefetching is preferred
+    when many parent rows share the same related rows (high fan-out), and the related rows are wide.
+
+    Note that this is a heuristic based on the sizes of the whole tables from the database statistics,
+    not on the number of rows the filtered query will actually return.
+
+    :param parent_model: The model the relation is from.
+    :param related_model: The model the relation is to.
+    :param lookups: The fields that would be selected from the related model, relative to it.
+    """
+    parent_rows = estimate_row_count(parent_model)
+    related_rows = estimate_row_count(related_model)
+    # Without statistics, keep the default behavior of joining the relation.
+    if not parent_rows or related_rows is None:
+        return False
+
+    width = estimate_row_width(related_model, lookups)
+    key_width = estimate_field_width(related_model._meta.pk)
+
+    join_cost = parent_rows * width
+    prefetch_cost = (
+        min(parent_rows, related_rows) * width  # Each related row is fetched once.
+        + parent_rows * key_width  # The parent keys are sent in the prefetch query.
+        + optimizer_settings.PREFETCH_ROUND_TRIP_COST
+    )
+    return prefetch_cost < join_cost
+
+
+def estimate_row_count(model: type[Model]) -> int | None:
+    """
+    Get the estimated number of rows in the given model's table from the database statistics.
+    Returns None if the statistics are not available. Results are cached for the time
+    defined by the `TABLE_STATISTICS_CACHE_SECONDS` setting.
+
+    Statistics are not fetched when running inside an event loop, since database queries
+    cannot be made there synchronously. Instead, previously cached statistics are used,
+    even if they have expired, or None if there are none.
+    """
+    using = router.db_for_read(model)
+    key = (using, model._meta.db_table)
+    now = time.monotonic()
+
+    with _row_counts_lock:
+        cached = _row_counts.get(key)
+        if cached is not None and now - cached[0] < optimizer_settings.TABLE_STATISTICS_CACHE_SECONDS:
+            return cached[1]
+
+    if is_running_async():
+        return None if cached is None else cached[1]
+
+    row_count = fetch_row_count(using, model._meta.db_table)
+
+    with _row_counts_lock:
+        _row_counts[key] = (now, row_count)
+
+    return row_count
+
+
+def fetch_row_count(using: str, db_table: str) -> int | None:
+    """Fetch the estimated number of rows in the given table from the statistics of the given database."""
+    connection = connections[using]
+
+    if connection.vendor == "postgresql":
+        # 'reltuples' is -1 if the table has not been vacuumed or analyzed yet.
+        # 'to_regclass' parses its argument as an identifier, so mixed case names need to be quoted.
+        sql = "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)"
+        name = connection.ops.quote_name(db_table)
+    elif connection.vendor == "sqlite":
+        # Only exists after 'ANALYZE' has been run. The first number in the 'stat' column
+        # is the number of rows in the table for both table and index statistics.
+        sql = "SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+        name = db_table
+    else:
+        return None
+
+    try:
+        # The query can be made inside the request's transaction, so use a savepoint
+        # to keep the transaction usable if the query fails.
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [name])
+            row = cursor.fetchone()
+    except DatabaseError as error:
+        optimizer_logger.debug("Could not fetch table statistics for %r.", db_table, exc_info=error)
+        return None
+
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def clear_table_statistics() -> None:
+    """Clear the cached table statistics."""
+    with _row_counts_lock:
+        _row_counts.clear()
+
+
+def estimate_row_width(model: type[Model], lookups: Iterable[str]) -> int:
+    """
+    Estimate the width of the row fetched from the given model in bytes.
+
+    :param model: The model the lookups are relative to.
+    :param lookups: The selected field lookups. If empty, all concrete fields of the model are selected.
+    """
+    fields = [field for field in (resolve_lookup(model, lookup) for lookup in lookups) if field is not None]
+    if not fields:
+        fields = model._meta.concrete_fields
+    return sum(estimate_field_width(field) for field in fields)
+
+
+def resolve_lookup(model: type[Model], lookup: str) -> Field | None:
+    field: Field | None = None
+    for name in lookup.split(LOOKUP_SEP):
+        if model is None:
+            return None
+        field = get_model_field(model, name)
+        if field is None:
+            return None
+        model = field.related_model if field.is_relation else None
+    return field
+
+
+def estimate_field_width(field: Field) -> int:
+    if field.is_relation:
+        target_field = getattr(field, "target_field", None)
+        return DEFAULT_FIELD_WIDTH if target_field is None else estimate_field_width(target_field)
+
+    max_length: int | None = getattr(field, "max_length", None)
+    if max_length is not None:
+        return max_length
+    return FIELD_WIDTHS.get(field.get_internal_type(), DEFAULT_FIELD_WIDTH)
@@ -1,33 +1,277 @@
 from __future__ import annotations
 
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import islice
 from typing import TYPE_CHECKING, TypeAlias
 from unittest.mock import patch
 
-from django.db.models import ManyToManyField
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import ManyToManyField, Prefetch, prefetch_related_objects
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models.fields.related_descriptors import _filter_prefetch_queryset
+from django.db.models.query import prefetch_one_level
 
+from .budgets import use_budget
 from .settings import optimizer_settings
 
 if TYPE_CHECKING:
+    from types import TracebackType
+
     from django.db.models import ManyToManyRel, Model, QuerySet
 
-    from .typing import TModel
+    from .typing import Any, Generator, Iterable, Iterator, TModel, Union
 
 __all__ = [
+    "aevaluate_with_prefetch_hack",
+    "close_thread_connections",
+    "evaluate_concurrently",
+    "evaluate_in_chunks",
     "evaluate_with_prefetch_hack",
+    "get_parent_subquery",
+    "get_prefetch_chunk_size",
+    "in_chunks",
+    "in_transaction",
+    "prefetch_concurrently",
+    "prefetch_hack_patch",
     "register_for_prefetch_hack",
 ]
 
 
 PrefetchHackCacheType: TypeAlias = defaultdict[str, defaultdict[str, set[str]]]
 _PATH = f"{_filter_prefetch_queryset.__module__}.{_filter_prefetch_queryset.__name__}"
+_CHUNK_PATH = f"{prefetch_one_level.__module__}.{prefetch_one_level.__name__}"
 
 
 def evaluate_with_prefetch_hack(queryset: QuerySet[TModel]) -> list[TModel]:
-    """Evaluates the given queryset with the prefetch hack applied."""
-    with patch(_PATH, side_effect=_prefetch_hack):
-        return list(queryset)  # If the optimizer did its job, the database query is executed here.
+    """
+    Evaluates the given queryset with the prefetch hack applied. If the optimizer has set a resource budget
+    for the queryset, the queries made and rows fetched during the evaluation are counted towards it.
+    """
+    # Queryset has already been evaluated, e.g., by a custom resolver.
+    if isinstance(queryset, list):
+        return list(queryset)
+
+    budget = queryset._hints.get(optimizer_settings.RESOURCE_BUDGET_KEY)
+    with prefetch_hack_patch, use_budget(budget, queryset.db):
+        if not _use_concurrent_prefetch(queryset):
+            return list(queryset)  # If the optimizer did its job, the database query is executed here.
+
+        # Prevent Django from making the prefetches so that they can be made concurrently.
+        lookups = queryset._prefetch_related_lookups
+        queryset._prefetch_done = True
+        instances = list(queryset)
+        prefetch_concurrently(instances, *lookups)
+        return instances
+
+
+async def aevaluate_with_prefetch_hack(queryset: QuerySet[TModel]) -> list[TModel]:
+    """
+    Evaluates the given queryset with the prefetch hack applied in an async context.
+
+    Like Django's own async queryset methods, the evaluation happens in a thread sensitive
+    `sync_to_async` call, so that the database connection is used from the correct thread.
+    """
+    return await sync_to_async(evaluate_with_prefetch_hack)(queryset)
+
+
+def evaluate_in_chunks(queryset: QuerySet[TModel], *, chunk_size: int) -> Generator[list[TModel], None, None]:
+    """
+    Evaluates the given queryset in chunks of the given size with the prefetch hack applied.
+    Prefetches are made separately for each chunk, so that only a single chunk of model instances
+    (and their prefetch caches) needs to be held in memory at a time.
+    """
+    # Queryset has already been evaluated, e.g., by a custom resolver.
+    if isinstance(queryset, list) or queryset._result_cache is not None:
+        yield list(queryset)
+        return
+
+    budget = queryset._hints.get(optimizer_settings.RESOURCE_BUDGET_KEY)
+    lookups = queryset._prefetch_related_lookups
+    # The prefetch hack removes its cache from a prefetch queryset when it's used,
+    # but the same prefetch querysets are used for every chunk.
+    caches = _get_prefetch_hack_caches(lookups)
+    iterator = queryset.prefetch_related(None).iterator(chunk_size=chunk_size)
+    try:
+        while True:
+            # Only track the budget while fetching, not while the consumer handles the chunk.
+            with use_budget(budget, queryset.db):
+                chunk = list(islice(iterator, chunk_size))
+                if chunk and lookups:
+                    _restore_prefetch_hack_caches(caches)
+                    with prefetch_hack_patch:
+                        prefetch_concurrently(chunk, *lookups)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        _clear_prefetch_hack_caches(caches)
+
+
+def evaluate_concurrently(querysets: list[QuerySet[TModel]], *, max_workers: int) -> list[list[TModel]]:
+    """
+    Evaluates the given querysets with the prefetch hack applied, concurrently on a thread pool
+    of the given size. Returns the results in the same order as the querysets were given.
+
+    Each thread uses its own database connection, so the querysets are evaluated serially
+    if a transaction is open, since queries made in other threads would be outside it.
+    """
+    if max_workers < 1 or len(querysets) < 2 or in_transaction():  # noqa: PLR2004
+        return [evaluate_with_prefetch_hack(queryset) for queryset in querysets]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(querysets))) as executor:
+        futures = [executor.submit(_evaluate_in_thread, queryset) for queryset in querysets]
+        return [future.result() for future in futures]
+
+
+def _evaluate_in_thread(queryset: QuerySet[TModel]) -> list[TModel]:
+    try:
+        return evaluate_with_prefetch_hack(queryset)
+    finally:
+        close_thread_connections()
+
+
+def prefetch_concurrently(instances: list[Model], *lookups: Union[Prefetch, str]) -> None:
+    """
+    Prefetch the given lookups for the given model instances. If `CONCURRENT_PREFETCH_MAX_WORKERS`
+    is set, lookups for different relations are prefetched concurrently on a thread pool.
+    Otherwise, this is the same as calling `prefetch_related_objects`.
+
+    Each thread uses its own database connection, so the lookups are prefetched serially
+    if a transaction is open, since queries made in other threads would be outside it.
+    """
+    max_workers = optimizer_settings.CONCURRENT_PREFETCH_MAX_WORKERS
+    if not max_workers or not instances or in_transaction():
+        prefetch_related_objects(instances, *lookups)
+        return
+
+    # Lookups through the same relation depend on each other,
+    # so they need to be made in the same thread in the given order.
+    groups: defaultdict[str, list[Union[Prefetch, str]]] = defaultdict(list)
+    for lookup in lookups:
+        path = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        groups[path.split(LOOKUP_SEP, maxsplit=1)[0]].append(lookup)
+
+    if len(groups) < 2:  # noqa: PLR2004
+        prefetch_related_objects(instances, *lookups)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+        # Copy the context for each thread so that the resource budget in use is tracked in the threads.
+        futures = [
+            executor.submit(copy_context().run, _prefetch_in_thread, instances, group)  # .
+            for group in groups.values()
+        ]
+        for future in futures:
+            future.result()  # Re-raise any errors from the threads.
+
+
+def _prefetch_in_thread(instances: list[Model], lookups: list[Union[Prefetch, str]]) -> None:
+    try:
+        with use_budget(None, instances[0]._state.db):
+            prefetch_related_objects(instances, *lookups)
+    finally:
+        close_thread_connections()
+
+
+def in_transaction() -> bool:
+    """Is a transaction open in any database connection of the current thread?"""
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+def close_thread_connections() -> None:
+    """Close database connections opened by a worker thread, since they would otherwise be left open."""
+    connections.close_all()
+
+
+def _use_concurrent_prefetch(queryset: QuerySet) -> bool:
+    return (
+        bool(optimizer_settings.CONCURRENT_PREFETCH_MAX_WORKERS)
+        and queryset._result_cache is None
+        and len(queryset._prefetch_related_lookups) > 1
+    )
+
+
+def get_prefetch_chunk_size(using: str | None) -> int | None:
+    """
+    Get the maximum number of values to filter a prefetch with in a single `IN` list on the given database.
+    Returns None if the values don't need to be chunked. See the `PREFETCH_CHUNK_SIZE` setting.
+    """
+    if optimizer_settings.PREFETCH_CHUNK_SIZE:
+        return optimizer_settings.PREFETCH_CHUNK_SIZE
+
+    max_params: int | None = connections[using or DEFAULT_DB_ALIAS].features.max_query_params
+    if not max_params:
+        return None
+    # Leave room for the other parameters of the prefetch query, e.g., its filters.
+    return max(max_params // 2, 1)
+
+
+def in_chunks(values: list[Any], using: str | None) -> Iterator[list[Any]]:
+    """Split the given values to chunks small enough to be used in an `IN` list on the given database."""
+    chunk_size = get_prefetch_chunk_size(using)
+    if chunk_size is None or len(values) <= chunk_size:
+        yield values
+        return
+
+    for start in range(0, len(values), chunk_size):
+        yield values[start : start + chunk_size]
+
+
+def _prefetch_in_chunks(instances: list[Model], prefetcher: Any, lookup: Prefetch, level: int) -> tuple[list, list]:
+    """
+    Patches the prefetch mechanism to prefetch a relation for the given instances in chunks.
+
+    Django filters the prefetch queryset with an `IN` list containing a parameter for each instance,
+    which fails when the number of parameters exceeds the database's limit (e.g., on SQLite),
+    and slows down query parsing and planning on databases without a limit. Chunking the instances
+    makes a prefetch query for each chunk. Nested prefetches are chunked the same way on their own level.
+
+    Prefetches are made with the resource budget the optimizer has set for the prefetch queryset, if any,
+    so that limits set for nested fields are checked.
+    """
+    querysets = lookup.get_current_querysets(level)
+    budget = querysets[0]._hints.get(optimizer_settings.RESOURCE_BUDGET_KEY) if querysets else None
+    with use_budget(budget, querysets[0].db if querysets else DEFAULT_DB_ALIAS):
+        return _prefetch_level_in_chunks(instances, prefetcher, lookup, level, querysets)
+
+
+def _prefetch_level_in_chunks(
+    instances: list[Model],
+    prefetcher: Any,
+    lookup: Prefetch,
+    level: int,
+    querysets: list[QuerySet] | None,
+) -> tuple[list, list]:
+    # Prefetches filtered by a subquery of their parent query don't have parameters for the instances.
+    if (
+        querysets
+        and querysets[0]._hints.get(optimizer_settings.PREFETCH_PARENT_SUBQUERY_KEY, False)
+        and get_parent_subquery(instances) is not None
+    ):
+        return prefetch_one_level(instances, prefetcher, lookup, level)
+
+    chunks = list(in_chunks(instances, instances[0]._state.db if instances else None))
+    if len(chunks) < 2:  # noqa: PLR2004
+        return prefetch_one_level(instances, prefetcher, lookup, level)
+
+    # The same prefetch querysets are used for every chunk, so the prefetch hack cache needs to be restored.
+    key = optimizer_settings.PREFETCH_HACK_CACHE_KEY
+    caches = [(queryset, queryset._hints[key]) for queryset in querysets or [] if key in queryset._hints]
+
+    all_related_objects: list[Model] = []
+    additional_lookups: list[Prefetch] = []
+    try:
+        for chunk in chunks:
+            _restore_prefetch_hack_caches(caches)
+            related_objects, additional_lookups = prefetch_one_level(chunk, prefetcher, lookup, level)
+            all_related_objects.extend(related_objects)
+    finally:
+        _clear_prefetch_hack_caches(caches)
+    return all_related_objects, additional_lookups
 
 
 def register_for_prefetch_hack(queryset: QuerySet, field: ManyToManyField | ManyToManyRel) -> None:
@@ -50,6 +294,35 @@ def register_for_prefetch_hack(queryset: QuerySet, field: ManyToManyField | Many
     queryset._hints.setdefault(key, cache)
 
 
+def _get_prefetch_hack_caches(lookups: Iterable[Prefetch | str]) -> list[tuple[QuerySet, PrefetchHackCacheType]]:
+    """
+    Get the prefetch hack caches registered for the querysets of the given prefetch lookups,
+    including the lookups nested in them, so that they can be restored if the lookups are used again.
+    """
+    key = optimizer_settings.PREFETCH_HACK_CACHE_KEY
+    caches: list[tuple[QuerySet, PrefetchHackCacheType]] = []
+    for lookup in lookups:
+        queryset: QuerySet | None = getattr(lookup, "queryset", None)
+        if queryset is None:
+            continue
+        if key in queryset._hints:
+            caches.append((queryset, queryset._hints[key]))
+        caches.extend(_get_prefetch_hack_caches(queryset._prefetch_related_lookups))
+    return caches
+
+
+def _restore_prefetch_hack_caches(caches: list[tuple[QuerySet, PrefetchHackCacheType]]) -> None:
+    """Restore the given prefetch hack caches to the hints of their querysets."""
+    for queryset, cache in caches:
+        queryset._hints[optimizer_settings.PREFETCH_HACK_CACHE_KEY] = cache
+
+
+def _clear_prefetch_hack_caches(caches: list[tuple[QuerySet, PrefetchHackCacheType]]) -> None:
+    """Remove the given prefetch hack caches from the hints of their querysets."""
+    for queryset, _ in caches:
+        queryset._hints.pop(optimizer_settings.PREFETCH_HACK_CACHE_KEY, None)
+
+
 def _prefetch_hack(queryset: QuerySet, field_name: str, instances: list[Model]) -> QuerySet:
     """
     Patches the prefetch mechanism to not create duplicate joins in the SQL query.
@@ -79,4 +352,61 @@ def _prefetch_hack(queryset: QuerySet, field_name: str, instances: list[Model])
         # There, this should prevent the method from adding a duplicate join.
         queryset.query.used_aliases = cache[queryset.model._meta.db_table][field_name]
 
+    # Prefetches can be marked to filter by a subquery of the parent query instead of the parent instances.
+    if queryset._hints.get(optimizer_settings.PREFETCH_PARENT_SUBQUERY_KEY, False):
+        parent_subquery = get_parent_subquery(instances)
+        if parent_subquery is not None:
+            return _filter_prefetch_queryset(queryset, field_name, parent_subquery)
+
     return _filter_prefetch_queryset(queryset, field_name, instances)
+
+
+def get_parent_subquery(instances: list[Model]) -> QuerySet | None:
+    """
+    Get the subquery selecting the primary keys of the given instances from the query they were fetched with,
+    if all of them were fetched with the same query and recorded it. See `record_source_queryset`.
+    """
+    key = optimizer_settings.PREFETCH_SOURCE_QUERYSET_KEY
+    subquery: QuerySet | None = instances[0].__dict__.get(key) if instances else None
+    if subquery is None or any(instance.__dict__.get(key) is not subquery for instance in instances):
+        return None
+    return subquery
+
+
+class PrefetchHackPatch:
+    """
+    Applies the prefetch hack patches while any thread is inside this context.
+
+    `unittest.mock.patch` is not safe to enter from multiple threads at once, since
+    exiting the patches in a different order than they were entered in would leave
+    the patched function in a wrong state. Therefore, the patch is applied only when the
+    first thread enters the context, and removed when the last thread exits it.
+    """
+
+    def __init__(self) -> None:
+        self.patcher = patch(_PATH, side_effect=_prefetch_hack)
+        self.chunk_patcher = patch(_CHUNK_PATH, new=_prefetch_in_chunks)
+        self.lock = threading.Lock()
+        self.count: int = 0
+
+    def __enter__(self) -> None:
+        with self.lock:
+            if self.count == 0:
+                self.patcher.start()
+                self.chunk_patcher.start()
+            self.count += 1
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        with self.lock:
+            self.count -= 1
+            if self.count == 0:
+                self.chunk_patcher.stop()
+                self.patcher.stop()
+
+
+prefetch_hack_patch = PrefetchHackPatch()
@@ -27,36 +27,165 @@ class DefaultSettings(NamedTuple):
     Doesn't prevent defining a DjangoConnectionField on the ObjectType manually.
     """
 
+    AGGREGATE_ALIAS_PREFIX: str = "_optimizer_aggregate_"
+    """Prefix used for annotating the aggregated values in grouped aggregate queries."""
+
+    CACHE_OPTIMIZATION_PLANS: bool = False
+    """
+    Should 'OptimizedGraphQLView' cache the optimizations compiled for a GraphQL document,
+    so that they can be reused when the same document is executed again?
+    """
+
+    COALESCE_PREFETCHES: bool = False
+    """
+    Should prefetches for different relations or aliases that fetch the same model at the same level
+    be combined into a single `UNION ALL` query? Saves database round trips when the prefetched
+    querysets select the same columns, and are not paginated.
+    """
+
+    CONCURRENT_PREFETCH_MAX_WORKERS: int = 0
+    """
+    Maximum number of threads to use for making prefetches for different relations concurrently.
+    Each thread uses its own database connection. Set to 0 (default) to make prefetches sequentially.
+    """
+
+    CONCURRENT_ROOT_FIELDS_MAX_WORKERS: int = 4
+    """
+    Maximum number of threads to use for executing root fields concurrently
+    when using the `ConcurrentExecutionContext`.
+    """
+
+    CONCURRENT_UNION_MAX_WORKERS: int = 0
+    """
+    Maximum number of threads to use for evaluating the querysets given to `optimize_union` concurrently.
+    Each thread uses its own database connection. Set to 0 (default) to evaluate the querysets sequentially.
+    """
+
+    COST_BASED_TO_ONE_PLANNING: bool = False
+    """
+    Should the optimizer use database table statistics to choose between 'select_related'
+    and 'prefetch_related' for to-one relations? If False (default), 'select_related' is always used,
+    unless the relation requires annotations or the related field defines otherwise.
+    """
+
+    DEDUPLICATE_MANY_TO_MANY_PREFETCHES: bool = False
+    """
+    Should many-to-many relations be prefetched in two steps, first fetching the related primary keys
+    from the through table, and then each distinct related row only once? Reduces the amount of data
+    fetched when many instances share the same related rows, at the cost of an extra query.
+    """
+
     DEFAULT_FILTERSET_CLASS: str = ""
     """The default filterset class to use."""
 
     DISABLE_ONLY_FIELDS_OPTIMIZATION: bool = False
     """Disable optimizing fetched fields with `queryset.only()`."""
 
+    DOCUMENT_CACHE_MAX_SIZE: int = 256
+    """Maximum number of parsed and validated GraphQL documents 'OptimizedGraphQLView' should cache."""
+
     MAX_COMPLEXITY: int = 10
     """Default max number of 'select_related' and 'prefetch related' joins optimizer is allowed to optimize."""
 
+    MAX_DB_TIME: float = 0
+    """
+    Maximum time in seconds a single GraphQL operation can spend executing the SQL queries
+    of optimized querysets. Set to 0 (default) for no limit.
+    """
+
+    MAX_QUERIES: int = 0
+    """
+    Maximum number of SQL queries a single GraphQL operation can make when evaluating optimized querysets,
+    including their prefetches. Set to 0 (default) for no limit.
+    """
+
+    MAX_ROWS: int = 0
+    """
+    Maximum number of model instances a single GraphQL operation can fetch when evaluating optimized querysets,
+    including their prefetches. Set to 0 (default) for no limit.
+    """
+
     OPTIMIZER_MARK: str = "_optimized"
     """Key used mark if a queryset has been optimized by the query optimizer."""
 
     PREFETCH_HACK_CACHE_KEY: str = "_optimizer_prefetch_hack_cache"
     """Key used to store the prefetch hack cache in queryset hints."""
 
+    PK_ONLY_RELATIONS_KEY: str = "_optimizer_pk_only_relations"
+    """
+    Name of the attribute storing the to-one relations on model instances for which only the primary key
+    of the related object was selected, so the related object wasn't fetched.
+    """
+
+    POST_FETCH_HOOKS_KEY: str = "_optimizer_post_fetch_hooks"
+    """Key used to store hooks that should be run for fetched model instances in queryset hints."""
+
+    PREFETCH_ALIASES_KEY: str = "_optimizer_prefetch_aliases"
+    """Name of the attribute storing the aliases that share a prefetch with another alias on model instances."""
+
+    PREFETCH_CHUNK_SIZE: int = 0
+    """
+    Maximum number of instances to prefetch related objects for with a single query. Larger sets of instances
+    are prefetched in chunks, so that the `IN` lists filtering the prefetch queries stay small. Set to `0`
+    to derive the chunk size from the maximum number of query parameters the database supports,
+    or to not chunk prefetches if the database doesn't have a limit (e.g., PostgreSQL).
+    """
+
+    PREFETCH_COALESCE_INDEX: str = "_optimizer_coalesce_index"
+    """Name used for annotating the index of the prefetch a row belongs to in a coalesced prefetch."""
+
+    PREFETCH_COALESCE_PARENT: str = "_optimizer_coalesce_parent"
+    """Name used for annotating the primary key of the instance a row belongs to in a coalesced prefetch."""
+
     PREFETCH_COUNT_KEY: str = "_optimizer_count"
     """Name used for annotating the prefetched queryset total count."""
 
+    PREFETCH_PARENT_SUBQUERY_KEY: str = "_optimizer_parent_subquery"
+    """Key used for marking prefetch querysets that should be filtered with a subquery of their parent query."""
+
     PREFETCH_PARTITION_INDEX: str = "_optimizer_partition_index"
     """Name used for aliasing the prefetched queryset partition index."""
 
+    PREFETCH_ROUND_TRIP_COST: int = 50_000
+    """
+    Estimated cost of making an additional database query for a prefetch, expressed as the number of bytes
+    that could be transferred in the same time. Used in cost-based planning of to-one relations.
+    """
+
+    PREFETCH_SOURCE_QUERYSET_KEY: str = "_optimizer_source_queryset"
+    """
+    Key used for marking querysets whose instances should record the query they were fetched with,
+    and the name of the attribute the query is stored in on the instances.
+    """
+
+    PREFETCH_SELECTION_PREFIX: str = "_optimizer_selection_"
+    """
+    Prefix for the attribute a to-many relation selected with filters or pagination is prefetched to,
+    if resolvers also require the relation's rows from its default cache.
+    """
+
     PREFETCH_SLICE_START: str = "_optimizer_slice_start"
     """Name used for aliasing the prefetched queryset slice start."""
 
     PREFETCH_SLICE_STOP: str = "_optimizer_slice_stop"
     """Name used for aliasing the prefetched queryset slice end."""
 
+    RESOURCE_BUDGET_KEY: str = "_optimizer_resource_budget"
+    """Key used to store the resource budget a queryset should be evaluated with in queryset hints."""
+
     SKIP_OPTIMIZATION_ON_ERROR: bool = False
     """If there is an unexpected error, should the optimizer skip optimization (True) or throw an error (False)?"""
 
+    STRICT_CUSTOM_FIELDS: bool = False
+    """
+    Should the optimizer raise an error for custom fields that return DjangoObjectTypes,
+    but cannot be optimized, since they don't map to a model relation and don't declare
+    the model fields they need? If False (default), such fields are only logged.
+    """
+
+    TABLE_STATISTICS_CACHE_SECONDS: int = 300
+    """How long the table statistics used in cost-based planning of to-one relations should be cached for."""
+
     TOTAL_COUNT_FIELD: str = "totalCount"
     """The field name to use for fetching total count in connection fields."""
 
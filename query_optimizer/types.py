@@ -7,15 +7,16 @@
 from django_filters.constants import ALL_FIELDS
 from graphene_django.utils import is_valid_django_model
 
-from .compiler import optimize_single
+from .compiler import aoptimize_single, optimize_single
 from .settings import optimizer_settings
 from .typing import OptimizedDjangoOptions
+from .utils import is_running_async
 
 if TYPE_CHECKING:
     from django.db.models import Model, QuerySet
 
     from .optimizer import QueryOptimizer
-    from .typing import PK, Any, GQLInfo, Literal, TModel, Union
+    from .typing import PK, Any, Awaitable, GQLInfo, Literal, TModel, Union
 
 
 __all__ = [
@@ -32,12 +33,15 @@ class Meta:
         abstract = True
 
     @classmethod
-    def __init_subclass_with_meta__(
+    def __init_subclass_with_meta__(  # noqa: PLR0917
         cls,
         _meta: OptimizedDjangoOptions | None = None,
         model: type[Model] | None = None,
         fields: Union[list[str], Literal["__all__"], None] = None,
         max_complexity: int | None = None,
+        max_queries: int | None = None,
+        max_rows: int | None = None,
+        max_db_time: float | None = None,
         **options: Any,
     ) -> None:
         if not is_valid_django_model(model):  # pragma: no cover
@@ -65,6 +69,9 @@ def __init_subclass_with_meta__(
             replace_csv_filters(filterset_class)
 
         _meta.max_complexity = max_complexity or optimizer_settings.MAX_COMPLEXITY
+        _meta.max_queries = max_queries
+        _meta.max_rows = max_rows
+        _meta.max_db_time = max_db_time
         super().__init_subclass_with_meta__(_meta=_meta, model=model, fields=fields, **options)
 
     @classmethod
@@ -82,13 +89,29 @@ def get_queryset(cls, queryset: QuerySet[TModel], info: GQLInfo) -> QuerySet[TMo
         return queryset
 
     @classmethod
-    def get_node(cls, info: GQLInfo, pk: PK) -> TModel | None:
+    def get_node(cls, info: GQLInfo, pk: PK) -> Union[TModel, Awaitable[TModel | None], None]:
+        if is_running_async():
+            return cls.async_get_node(info, pk)
+
         queryset = cls._meta.model._default_manager.all()
         maybe_instance = optimize_single(queryset, info, pk=pk, max_complexity=cls._meta.max_complexity)
         if maybe_instance is not None:  # pragma: no cover
             cls.run_instance_checks(maybe_instance, info)
         return maybe_instance
 
+    @classmethod
+    async def async_get_node(cls, info: GQLInfo, pk: PK) -> TModel | None:
+        queryset = cls._meta.model._default_manager.all()
+        maybe_instance = await aoptimize_single(queryset, info, pk=pk, max_complexity=cls._meta.max_complexity)
+        if maybe_instance is not None:  # pragma: no cover
+            cls.run_instance_checks(maybe_instance, info)
+        return maybe_instance
+
     @classmethod
     def run_instance_checks(cls, instance: TModel, info: GQLInfo) -> None:
-        """A hook for running checks after getting a single instance."""
+        """
+        A hook for running checks after getting a single instance.
+
+        Note that instances of related objects where only the primary key was selected only
+        have their primary key loaded. Accessing other fields loads them with a database query.
+        """
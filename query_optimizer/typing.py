@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Callable, Collection, Generator, Hashable, Iterable
+from collections.abc import Awaitable, Callable, Collection, Generator, Hashable, Iterable, Iterator
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -48,14 +48,17 @@
     from django.db.models.sql import Query
     from django_filters import FilterSet
 
+    from query_optimizer.budgets import ResourceBudget
     from query_optimizer.optimizer import QueryOptimizer
     from query_optimizer.validators import PaginationArgs
+    from query_optimizer.views import PlanCache
 
 __all__ = [
     "GRAPHQL_BUILTIN",
     "PK",
     "Any",
     "ArgTypeInput",
+    "Awaitable",
     "Callable",
     "Collection",
     "ConnectionResolver",
@@ -67,6 +70,7 @@
     "GraphQLFilterInfo",
     "Hashable",
     "Iterable",
+    "Iterator",
     "Literal",
     "ManualOptimizerMethod",
     "ModelField",
@@ -76,6 +80,7 @@
     "OptimizedDjangoOptions",
     "Optional",
     "ParamSpec",
+    "PrefetchHook",
     "QuerySetResolver",
     "ToManyField",
     "ToOneField",
@@ -141,6 +146,18 @@ class UserHintedWSGIRequest(WSGIRequest):
     and needs to be evaluated before the optimizer does so.
     """
 
+    optimizer_plan_cache: PlanCache
+    """
+    This attribute is only present if it was set in 'OptimizedGraphQLView'.
+    Contains optimizations compiled during previous executions of the same GraphQL document.
+    """
+
+    optimizer_budget: ResourceBudget
+    """
+    This attribute is only present if any of the operation's resource limits have been set in the settings.
+    Tracks the database resources used by the operation.
+    """
+
 
 class GQLInfo(GraphQLResolveInfo):
     context: UserHintedWSGIRequest
@@ -148,6 +165,9 @@ class GQLInfo(GraphQLResolveInfo):
 
 class OptimizedDjangoOptions(DjangoObjectTypeOptions):
     max_complexity: int
+    max_queries: int | None
+    max_rows: int | None
+    max_db_time: float | None
 
 
 class GraphQLFilterInfo(TypedDict, total=False):
@@ -156,6 +176,7 @@ class GraphQLFilterInfo(TypedDict, total=False):
     children: dict[str, GraphQLFilterInfo]
     filterset_class: type[FilterSet] | None
     is_connection: bool
+    is_limited_list: bool
     is_node: bool
     max_limit: int | None
 
@@ -173,3 +194,7 @@ def resolve_expression(
 
 class ManualOptimizerMethod(Protocol):
     def __call__(self, queryset: QuerySet, optimizer: QueryOptimizer, **kwargs: Any) -> QuerySet: ...
+
+
+class PrefetchHook(Protocol):
+    def __call__(self, queryset: QuerySet, info: GQLInfo) -> QuerySet: ...
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import TYPE_CHECKING
 
@@ -9,7 +10,7 @@
 from .settings import optimizer_settings
 
 if TYPE_CHECKING:
-    from .typing import Any, ParamSpec, TypeVar, Union
+    from .typing import Any, Callable, ParamSpec, TypeVar, Union
 
     T = TypeVar("T")
     P = ParamSpec("P")
@@ -18,12 +19,15 @@
 
 __all__ = [
     "SubqueryCount",
+    "SubqueryJSONArray",
     "add_slice_to_queryset",
     "calculate_slice_for_queryset",
     "is_optimized",
+    "is_running_async",
     "mark_optimized",
     "optimizer_logger",
     "remove_optimized_mark",
+    "required_fields",
     "swappable_by_subclassing",
 ]
 
@@ -49,6 +53,15 @@ def is_optimized(queryset: Union[models.QuerySet, list[models.Model]]) -> bool:
     return queryset._hints.get(optimizer_settings.OPTIMIZER_MARK, False)
 
 
+def is_running_async() -> bool:
+    """Is the current code being run inside an event loop, e.g., during async GraphQL execution?"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
 def maybe_queryset(value: BaseManager | models.QuerySet) -> models.QuerySet:
     if isinstance(value, BaseManager):
         value = value.get_queryset()
@@ -200,6 +213,39 @@ class SubqueryCount(models.Subquery):
     output_field = models.BigIntegerField()
 
 
+class SubqueryJSONArray(models.Subquery):
+    """
+    Aggregates the values of the subquery to a JSON array in the order the subquery returns them.
+    The subquery should select a single column named with the `column` attribute.
+    Only the database vendors in the `vendors` attribute are supported.
+    """
+
+    column = "_value"
+    vendors = ("sqlite", "postgresql")
+    template = "(SELECT JSON_GROUP_ARRAY(_array._value) FROM (%(subquery)s) _array)"
+    output_field = models.JSONField()
+
+    def as_postgresql(self, compiler: Any, connection: Any, **extra_context: Any) -> tuple[str, tuple[Any, ...]]:
+        # 'ARRAY(subquery)' keeps the order of the subquery rows, and is an empty array if there are no rows.
+        return self.as_sql(compiler, connection, template="TO_JSONB(ARRAY(%(subquery)s))", **extra_context)
+
+
+def required_fields(*lookups: str) -> Callable[[T], T]:
+    """
+    Declare the model fields the decorated resolver or model property needs to resolve its value,
+    so that the optimizer can fetch them with the rest of the query. Lookups are relative to the model
+    of the object type the field is on, and can span relations, e.g., `"building__real_estate__name"`.
+    A lookup ending in a relation fetches all fields of the related model. Declaring no lookups marks
+    the resolver as not needing any, e.g., if it optimizes its own queryset.
+    """
+
+    def decorator(func: T) -> T:
+        func.required_fields = lookups
+        return func
+
+    return decorator
+
+
 def swappable_by_subclassing(obj: Ttype) -> Ttype:
     """Makes the decorated class return the most recently created direct subclass when it is instantiated."""
     orig_init_subclass = obj.__init_subclass__
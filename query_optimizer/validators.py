@@ -6,6 +6,7 @@
 from .typing import TypedDict
 
 __all__ = [
+    "validate_limit_args",
     "validate_pagination_args",
 ]
 
@@ -98,3 +99,30 @@ def validate_pagination_args(  # noqa: C901, PLR0912
     # Size is changed later with `queryset.count()`.
     size = max_limit if isinstance(max_limit, int) else None
     return PaginationArgs(after=after, before=before, first=first, last=last, size=size)
+
+
+def validate_limit_args(first: int | None, offset: int | None, max_limit: int | None = None) -> slice:
+    """
+    Validate the limiting arguments of a list field and return the slice of records to return.
+
+    :param first: Number of records to return from the beginning.
+    :param offset: Number of records to skip from the beginning.
+    :param max_limit: Maximum limit for the number of records that can be requested.
+    :raises ValueError: Validation error.
+    """
+    if first is not None:
+        if not isinstance(first, int) or first <= 0:
+            msg = "Argument 'first' must be a positive integer."
+            raise ValueError(msg)
+
+        if isinstance(max_limit, int) and first > max_limit:
+            msg = f"Requesting first {first} records exceeds the limit of {max_limit}."
+            raise ValueError(msg)
+
+    if offset is not None and (not isinstance(offset, int) or offset < 0):
+        msg = "Argument `offset` must be a positive integer."
+        raise ValueError(msg)
+
+    start = offset or 0
+    limit = first if first is not None else max_limit
+    return slice(start, start + limit if limit is not None else None)
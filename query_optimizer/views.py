@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from django.db import connection, transaction
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, parse, validate, validate_schema
+
+from .budgets import create_operation_budget
+from .settings import optimizer_settings
+from .typing import NamedTuple
+
+if TYPE_CHECKING:
+    from django.http import HttpRequest
+    from graphql import ASTValidationRule, DocumentNode, GraphQLError, GraphQLSchema, OperationDefinitionNode
+
+    from .optimizer import QueryOptimizer
+    from .typing import Any, Collection, Hashable
+
+
+__all__ = [
+    "CacheInfo",
+    "DocumentCache",
+    "OptimizedGraphQLView",
+    "PlanCache",
+    "document_cache",
+]
+
+
+class PlanCache:
+    """
+    Optimizations compiled for the fields of a single cached GraphQL document.
+    Plans are stored without the GraphQLResolveInfo they were compiled with,
+    and should be cloned for the current request's GraphQLResolveInfo when used.
+    """
+
+    def __init__(self) -> None:
+        self.plans: dict[Hashable, QueryOptimizer] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> QueryOptimizer | None:
+        with self.lock:
+            return self.plans.get(key)
+
+    def set(self, key: Hashable, plan: QueryOptimizer) -> None:
+        with self.lock:
+            self.plans.setdefault(key, plan)
+
+
+class CachedDocument(NamedTuple):
+    document: DocumentNode | None
+    errors: list[GraphQLError]
+    plans: PlanCache
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class DocumentCache:
+    """Least-recently-used cache for parsed and validated GraphQL documents."""
+
+    def __init__(self) -> None:
+        self.cache: OrderedDict[Hashable, CachedDocument] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(
+        self,
+        query: str,
+        schema: GraphQLSchema,
+        validation_rules: Collection[type[ASTValidationRule]] | None = None,
+    ) -> CachedDocument:
+        """
+        Get the parsed document and its validation errors for the given query string,
+        parsing and validating it if it's not in the cache yet.
+        """
+        digest = hashlib.sha256(query.encode()).hexdigest()
+        key = (digest, id(schema), tuple(validation_rules or ()))
+
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return cached
+            self.misses += 1
+
+        cached = self.parse_and_validate(query, schema, validation_rules)
+
+        with self.lock:
+            self.cache[key] = cached
+            while len(self.cache) > optimizer_settings.DOCUMENT_CACHE_MAX_SIZE:
+                self.cache.popitem(last=False)
+
+        return cached
+
+    def parse_and_validate(
+        self,
+        query: str,
+        schema: GraphQLSchema,
+        validation_rules: Collection[type[ASTValidationRule]] | None = None,
+    ) -> CachedDocument:
+        try:
+            document = parse(query)
+        except Exception as error:  # noqa: BLE001
+            return CachedDocument(document=None, errors=[error], plans=PlanCache())
+
+        errors = validate(schema, document, validation_rules, graphene_settings.MAX_VALIDATION_ERRORS)
+        return CachedDocument(document=document, errors=errors, plans=PlanCache())
+
+    def cache_info(self) -> CacheInfo:
+        """Get statistics about the cache usage."""
+        with self.lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=optimizer_settings.DOCUMENT_CACHE_MAX_SIZE,
+                currsize=len(self.cache),
+            )
+
+    def clear(self) -> None:
+        """Clear the cache and its statistics."""
+        with self.lock:
+            self.cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+document_cache = DocumentCache()
+
+
+class OptimizedGraphQLView(GraphQLView):
+    """
+    GraphQLView that caches parsed and validated GraphQL documents.
+
+    Parsing and validating large documents can take more time than optimizing and executing them,
+    so repeated operations skip these steps by using the documents stored in the `document_cache`.
+    If the `CACHE_OPTIMIZATION_PLANS` setting is enabled, optimizations compiled for a document
+    are also cached, and reused when the same document is executed again.
+    """
+
+    def execute_graphql_request(  # noqa: PLR0917
+        self,
+        request: HttpRequest,
+        data: dict[str, Any],
+        query: str | None,
+        variables: dict[str, Any] | None,
+        operation_name: str | None,
+        show_graphiql: bool = False,  # noqa: FBT001, FBT002
+    ) -> ExecutionResult | None:
+        # Same as 'GraphQLView.execute_graphql_request', but the document is parsed and validated using the cache.
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        cached = document_cache.get(query, schema, self.validation_rules)
+        if cached.document is None:
+            return ExecutionResult(errors=cached.errors)
+
+        operation_ast = get_operation_ast(cached.document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            msg = f"Can only perform a {operation_ast.operation.value} operation from a POST request."
+            raise HttpError(HttpResponseNotAllowed(["POST"], msg))
+
+        if cached.errors:
+            return ExecutionResult(data=None, errors=cached.errors)
+
+        return self.execute_document(request, cached, operation_ast, variables, operation_name)
+
+    def execute_document(
+        self,
+        request: HttpRequest,
+        cached: CachedDocument,
+        operation_ast: OperationDefinitionNode | None,
+        variables: dict[str, Any] | None,
+        operation_name: str | None,
+    ) -> ExecutionResult:
+        """Execute the given cached document, which has been parsed and validated without errors."""
+        schema = self.schema.graphql_schema
+        try:
+            context = self.get_context(request)
+            if optimizer_settings.CACHE_OPTIMIZATION_PLANS:
+                context.optimizer_plan_cache = cached.plans
+
+            execute_options: dict[str, Any] = {
+                "root_value": self.get_root_value(request),
+                "context_value": context,
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, cached.document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, cached.document, **execute_options)
+        except Exception as error:  # noqa: BLE001
+            return ExecutionResult(errors=[error])
+
+    def get_context(self, request: HttpRequest) -> Any:
+        context = super().get_context(request)
+        # Create the budget before executing the operation, so that all fields share it.
+        if getattr(context, "optimizer_budget", None) is None:
+            context.optimizer_budget = create_operation_budget()
+        return context
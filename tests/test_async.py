@@ -0,0 +1,148 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from graphql_relay import to_global_id
+
+from example_project.app.schema import schema
+from example_project.app.utils import capture_database_queries
+from tests.factories import ApartmentFactory, BuildingFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def execute_async(query: str):
+    request = RequestFactory().post("/graphql/")
+    # Run async execution in the same thread so that test database transaction is visible.
+    with capture_database_queries() as queries:
+        result = async_to_sync(schema.execute_async)(query, context_value=request)
+    return result, queries
+
+
+def test_async__list_field():
+    ApartmentFactory.create(street_address="1", building__name="1")
+    ApartmentFactory.create(street_address="2", building__name="2")
+    ApartmentFactory.create(street_address="3", building__name="3")
+
+    query = """
+        query {
+          allBuildings {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    result, queries = execute_async(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert queries.count == 2, queries.log
+
+    assert queries[0] == has('FROM "app_building"')
+    assert queries[1] == has('FROM "app_apartment"')
+
+    assert result.data["allBuildings"] == [
+        {"name": "1", "apartments": [{"streetAddress": "1"}]},
+        {"name": "2", "apartments": [{"streetAddress": "2"}]},
+        {"name": "3", "apartments": [{"streetAddress": "3"}]},
+    ]
+
+
+def test_async__connection_field():
+    ApartmentFactory.create(street_address="1", building__name="1")
+    ApartmentFactory.create(street_address="2", building__name="2")
+    ApartmentFactory.create(street_address="3", building__name="3")
+
+    query = """
+        query {
+          pagedApartments(first: 2) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+                building {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    result, queries = execute_async(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for counting apartments.
+    # 1 query for fetching apartments with their buildings.
+    assert queries.count == 2, queries.log
+
+    assert queries[0] == has("COUNT(*)", 'FROM "app_apartment"')
+    assert queries[1] == has('FROM "app_apartment"', 'INNER JOIN "app_building"')
+
+    assert result.data["pagedApartments"] == {
+        "totalCount": 3,
+        "edges": [
+            {"node": {"streetAddress": "1", "building": {"name": "1"}}},
+            {"node": {"streetAddress": "2", "building": {"name": "2"}}},
+        ],
+    }
+
+
+def test_async__relay_node():
+    building = BuildingFactory.create(name="1", real_estate__name="2")
+
+    global_id = to_global_id("BuildingNode", building.pk)
+    query = """
+        query {
+          building(id: "%s") {
+            name
+            realEstate {
+              name
+            }
+          }
+        }
+    """ % (global_id,)
+
+    result, queries = execute_async(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching the building with its real estate.
+    assert queries.count == 1, queries.log
+
+    assert queries[0] == has('FROM "app_building"', 'INNER JOIN "app_realestate"')
+
+    assert result.data["building"] == {"name": "1", "realEstate": {"name": "2"}}
+
+
+def test_async__cost_based_to_one_planning(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"COST_BASED_TO_ONE_PLANNING": True}
+
+    BuildingFactory.create(name="1", real_estate__name="1")
+
+    query = """
+        query {
+          allBuildings {
+            name
+            realEstate {
+              name
+            }
+          }
+        }
+    """
+
+    result, queries = execute_async(query)
+    assert result.errors is None, result.errors
+
+    # Table statistics are not fetched inside the event loop, so the real estate is joined.
+    # 1 query for fetching buildings and real estates.
+    assert queries.count == 1, queries.log
+
+    assert queries[0] == has('FROM "app_building"', 'INNER JOIN "app_realestate"')
+
+    assert result.data["allBuildings"] == [{"name": "1", "realEstate": {"name": "1"}}]
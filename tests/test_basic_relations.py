@@ -1,5 +1,6 @@
 import pytest
 
+from query_optimizer import fields
 from tests.factories import ApartmentFactory, DeveloperFactory, HousingCompanyFactory, RealEstateFactory
 from tests.helpers import has
 
@@ -50,6 +51,105 @@ def test_relations__to_one_relations(graphql_client):
     ]
 
 
+def test_relations__to_one_relations__only_pk(graphql_client):
+    apartment_1 = ApartmentFactory.create()
+    apartment_2 = ApartmentFactory.create()
+
+    query = """
+        query {
+          allApartments {
+            building {
+              pk
+              __typename
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Apartments, Building primary keys are read from the foreign key.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has('FROM "app_apartment"')
+    assert response.queries[0] != has("JOIN")
+
+    assert response.content == [
+        {"building": {"pk": apartment_1.building.pk, "__typename": "BuildingType"}},
+        {"building": {"pk": apartment_2.building.pk, "__typename": "BuildingType"}},
+    ]
+
+
+def test_relations__to_one_relations__only_pk__decided_when_compiling(graphql_client, monkeypatch):
+    apartment_1 = ApartmentFactory.create()
+    apartment_2 = ApartmentFactory.create()
+
+    # The resolver shouldn't need to check the selections again for each apartment.
+    def is_pk_only_selection(*args, **kwargs):
+        msg = "Selections checked in the resolver"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(fields, "is_pk_only_selection", is_pk_only_selection)
+
+    query = """
+        query {
+          allApartments {
+            building {
+              pk
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Apartments, Building primary keys are read from the foreign key.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.content == [
+        {"building": {"pk": apartment_1.building.pk}},
+        {"building": {"pk": apartment_2.building.pk}},
+    ]
+
+
+def test_relations__to_one_relations__only_pk__other_fields_in_another_selection(graphql_client):
+    apartment = ApartmentFactory.create(building__name="1")
+
+    query = """
+        fragment BuildingPk on BuildingType {
+          pk
+        }
+
+        query {
+          allApartments {
+            building {
+              ...BuildingPk
+            }
+            otherBuilding: building {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Apartments and related Buildings
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_apartment"',
+        'INNER JOIN "app_building"',
+    )
+
+    assert response.content == [
+        {"building": {"pk": apartment.building.pk}, "otherBuilding": {"name": "1"}},
+    ]
+
+
 def test_relations__one_to_many_relations(graphql_client):
     ApartmentFactory.create(sales__ownerships__owner__name="1")
     ApartmentFactory.create(sales__ownerships__owner__name="2")
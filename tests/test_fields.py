@@ -2,6 +2,7 @@
 
 import pytest
 
+from query_optimizer.utils import SubqueryJSONArray
 from tests.factories import (
     ApartmentFactory,
     BuildingFactory,
@@ -12,6 +13,7 @@
     PropertyManagerFactory,
     RealEstateFactory,
     SaleFactory,
+    ShareholderFactory,
 )
 from tests.helpers import has
 
@@ -120,26 +122,65 @@ def test_fields__annotated_field__in_relations(graphql_client):
     ]
 
 
-def test_fields__annotated_field__select_related_promoted_to_prefetch(graphql_client):
-    SaleFactory.create(
-        purchase_date=datetime.date(2024, 1, 1),
-        apartment__completion_date=datetime.date(2020, 1, 1),
-    )
-    SaleFactory.create(
-        purchase_date=datetime.date(2024, 1, 2),
-        apartment__completion_date=datetime.date(2021, 1, 1),
+def test_fields__aggregate_field(graphql_client):
+    building_1 = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building_1, rooms=1)
+    ApartmentFactory.create(building=building_1, rooms=3, sales__purchase_price=1)
+    building_2 = BuildingFactory.create(name="2")
+    ApartmentFactory.create(building=building_2, rooms=2)
+    BuildingFactory.create(name="3")
+
+    query = """
+        query {
+          allBuildings {
+            name
+            numberOfApartments
+            maxApartmentRooms
+            numberOfApartmentsWithSales
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all buildings.
+    # 1 query for the aggregates over all apartments, grouped by building.
+    # 1 query for the aggregate over apartments with sales, grouped by building.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[0] == has('FROM "app_building"')
+    assert response.queries[1] == has(
+        'COUNT("app_apartment"."id")',
+        'MAX("app_apartment"."rooms")',
+        'GROUP BY',
     )
-    SaleFactory.create(
-        purchase_date=datetime.date(2024, 1, 3),
-        apartment__completion_date=datetime.date(2022, 1, 1),
+    assert response.queries[2] == has(
+        'COUNT(DISTINCT "app_apartment"."id")',
+        'INNER JOIN "app_sale"',
+        'GROUP BY',
     )
 
+    assert response.content == [
+        {"name": "1", "numberOfApartments": 2, "maxApartmentRooms": 3, "numberOfApartmentsWithSales": 1},
+        {"name": "2", "numberOfApartments": 1, "maxApartmentRooms": 2, "numberOfApartmentsWithSales": 0},
+        {"name": "3", "numberOfApartments": 0, "maxApartmentRooms": None, "numberOfApartmentsWithSales": 0},
+    ]
+
+
+def test_fields__aggregate_field__nested(graphql_client):
+    building_1 = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building_1, street_address="1")
+    ApartmentFactory.create(building=building_1, street_address="2")
+    building_2 = BuildingFactory.create(name="2")
+    ApartmentFactory.create(building=building_2, street_address="3")
+
     query = """
         query {
-          allSales {
-            purchaseDate
-            apartment {
-              completionYear
+          allApartments {
+            streetAddress
+            building {
+              numberOfApartments
             }
           }
         }
@@ -148,60 +189,36 @@ def test_fields__annotated_field__select_related_promoted_to_prefetch(graphql_cl
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for all sales.
-    # 1 query for all related apartments.
+    # 1 query for all apartments with their buildings.
+    # 1 query for the aggregate over the apartments of all the buildings, grouped by building.
     assert response.queries.count == 2, response.queries.log
 
-    assert response.queries[0] == has(
-        'FROM "app_sale"',
-    )
+    assert response.queries[0] == has('FROM "app_apartment"', 'INNER JOIN "app_building"')
     assert response.queries[1] == has(
-        'FROM "app_apartment"',
-        'django_date_extract(year, "app_apartment"."completion_date") AS "completion_year"',
+        'COUNT("app_apartment"."id")',
+        'GROUP BY',
     )
 
     assert response.content == [
-        {
-            "purchaseDate": "2024-01-01",
-            "apartment": {"completionYear": 2020},
-        },
-        {
-            "purchaseDate": "2024-01-02",
-            "apartment": {"completionYear": 2021},
-        },
-        {
-            "purchaseDate": "2024-01-03",
-            "apartment": {"completionYear": 2022},
-        },
+        {"streetAddress": "1", "building": {"numberOfApartments": 2}},
+        {"streetAddress": "2", "building": {"numberOfApartments": 2}},
+        {"streetAddress": "3", "building": {"numberOfApartments": 1}},
     ]
 
 
-def test_fields__annotated_field__select_related_promoted_to_prefetch__in_related(graphql_client):
-    OwnershipFactory.create(
-        percentage=1,
-        sale__purchase_date=datetime.date(2024, 1, 1),
-        sale__apartment__completion_date=datetime.date(2020, 1, 1),
-    )
-    OwnershipFactory.create(
-        percentage=2,
-        sale__purchase_date=datetime.date(2024, 1, 2),
-        sale__apartment__completion_date=datetime.date(2021, 1, 1),
-    )
-    OwnershipFactory.create(
-        percentage=3,
-        sale__purchase_date=datetime.date(2024, 1, 3),
-        sale__apartment__completion_date=datetime.date(2022, 1, 1),
-    )
+def test_fields__aggregate_field__in_prefetch(graphql_client):
+    building = BuildingFactory.create(name="1", real_estate__name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    BuildingFactory.create(name="2", real_estate=building.real_estate)
 
     query = """
         query {
-          allOwnerships {
-            percentage
-            sale {
-              purchaseDate
-              apartment {
-                completionYear
-              }
+          allRealEstates {
+            name
+            buildingSet {
+              name
+              numberOfApartments
             }
           }
         }
@@ -210,53 +227,36 @@ def test_fields__annotated_field__select_related_promoted_to_prefetch__in_relate
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for all ownerships with sales
-    # 1 query for all apartments on sales with the annotated field.
-    assert response.queries.count == 2, response.queries.log
+    # 1 query for all real estates.
+    # 1 query for all buildings of the real estates.
+    # 1 query for the aggregate over the apartments of all the buildings, grouped by building.
+    assert response.queries.count == 3, response.queries.log
 
-    assert response.queries[0] == has(
-        'FROM "app_ownership"',
-        'INNER JOIN "app_sale"',
-    )
-    assert response.queries[1] == has(
-        'FROM "app_apartment"',
-        'django_date_extract(year, "app_apartment"."completion_date") AS "completion_year"',
+    assert response.queries[2] == has(
+        'COUNT("app_apartment"."id")',
+        'GROUP BY',
     )
 
     assert response.content == [
         {
-            "percentage": "1",
-            "sale": {
-                "purchaseDate": "2024-01-01",
-                "apartment": {"completionYear": 2020},
-            },
-        },
-        {
-            "percentage": "2",
-            "sale": {
-                "purchaseDate": "2024-01-02",
-                "apartment": {"completionYear": 2021},
-            },
-        },
-        {
-            "percentage": "3",
-            "sale": {
-                "purchaseDate": "2024-01-03",
-                "apartment": {"completionYear": 2022},
-            },
+            "name": "1",
+            "buildingSet": [
+                {"name": "1", "numberOfApartments": 2},
+                {"name": "2", "numberOfApartments": 0},
+            ],
         },
     ]
 
 
-def test_fields__annotated_field__aliases(graphql_client):
-    HousingCompanyFactory.create(name="1")
-    HousingCompanyFactory.create(name="2")
-    HousingCompanyFactory.create(name="3")
+def test_fields__aggregate_field__in_chunks(graphql_client):
+    for name in ("1", "2", "3"):
+        ApartmentFactory.create(building__name=name)
 
     query = """
         query {
-          allHousingCompanies {
-            aliasGreeting
+          allBuildingsInChunks {
+            name
+            numberOfApartments
           }
         }
     """
@@ -264,36 +264,64 @@ def test_fields__annotated_field__aliases(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for fetching housing companies with the annotated field.
+    # 1 query for all buildings.
+    # 2 queries for the aggregates, one for each chunk of buildings.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[1] == has('COUNT("app_apartment"."id")', '"app_apartment"."building_id" IN (1, 2)')
+    assert response.queries[2] == has('COUNT("app_apartment"."id")', '"app_apartment"."building_id" IN (3)')
+
+    assert response.content == [
+        {"name": "1", "numberOfApartments": 1},
+        {"name": "2", "numberOfApartments": 1},
+        {"name": "3", "numberOfApartments": 1},
+    ]
+
+
+def test_fields__exists_field(graphql_client):
+    OwnershipFactory.create(owner__name="1", sale__purchase_price=1)
+    OwnershipFactory.create(owner__name="2", sale__purchase_price=0)
+    OwnerFactory.create(name="3")
+
+    query = """
+        query {
+          allOwners {
+            name
+            hasSales
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all owners with the existence check as a subquery.
     assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        'FROM "app_housingcompany"',
-        '"app_housingcompany"."name" AS "alias_greeting"',
+        'FROM "app_owner"',
+        'EXISTS(SELECT 1 AS "a" FROM "app_sale"',
+        'U0."purchase_price" >= 1',  # From `SaleType.filter_queryset`.
     )
 
     assert response.content == [
-        {"aliasGreeting": "Hello 1!"},
-        {"aliasGreeting": "Hello 2!"},
-        {"aliasGreeting": "Hello 3!"},
+        {"name": "1", "hasSales": True},
+        {"name": "2", "hasSales": False},
+        {"name": "3", "hasSales": False},
     ]
 
 
-def test_fields__alternate_field__to_one_related(graphql_client):
-    HousingCompanyFactory.create(property_manager__name="1")
-    HousingCompanyFactory.create(property_manager__name="2")
-    HousingCompanyFactory.create(property_manager__name="3")
+def test_fields__exists_field__filters(graphql_client):
+    real_estate = RealEstateFactory.create(name="1")
+    BuildingFactory.create(name="foo", real_estate=real_estate)
+    RealEstateFactory.create(name="2")
 
     query = """
         query {
-          pagedHousingCompanies {
-            edges {
-              node {
-                propertyManagerAlt {
-                  name
-                }
-              }
-            }
+          allRealEstates {
+            name
+            hasFoo: hasBuildings(name: "foo")
+            hasBar: hasBuildings(name: "bar")
           }
         }
     """
@@ -301,48 +329,31 @@ def test_fields__alternate_field__to_one_related(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
-    # 1 query for fetching housing companies and related property managers.
-    assert response.queries.count == 2, response.queries.log
+    # 1 query for all real estates with the existence check as a subquery.
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "app_housingcompany"',
-    )
-    assert response.queries[1] == has(
-        'FROM "app_housingcompany"',
-        'INNER JOIN "app_propertymanager"',
+        'FROM "app_realestate"',
+        'EXISTS(SELECT 1 AS "a" FROM "app_building" U0 WHERE (U0."name" = foo',
+        'EXISTS(SELECT 1 AS "a" FROM "app_building" U0 WHERE (U0."name" = bar',
     )
 
-    assert response.content == {
-        "edges": [
-            {"node": {"propertyManagerAlt": {"name": "1"}}},
-            {"node": {"propertyManagerAlt": {"name": "2"}}},
-            {"node": {"propertyManagerAlt": {"name": "3"}}},
-        ]
-    }
+    assert response.content == [
+        {"name": "1", "hasFoo": True, "hasBar": False},
+        {"name": "2", "hasFoo": False, "hasBar": False},
+    ]
 
 
-def test_fields__alternate_field__one_to_many_related(graphql_client):
-    housing_company_1 = HousingCompanyFactory.create()
-    housing_company_2 = HousingCompanyFactory.create()
-    housing_company_3 = HousingCompanyFactory.create()
-    RealEstateFactory.create(name="1", housing_company=housing_company_1)
-    RealEstateFactory.create(name="2", housing_company=housing_company_1)
-    RealEstateFactory.create(name="3", housing_company=housing_company_1)
-    RealEstateFactory.create(name="4", housing_company=housing_company_2)
-    RealEstateFactory.create(name="5", housing_company=housing_company_2)
-    RealEstateFactory.create(name="6", housing_company=housing_company_3)
+def test_fields__exists_field__select_related(graphql_client):
+    OwnershipFactory.create(owner__name="1", sale__purchase_price=1)
+    OwnershipFactory.create(owner__name="2", sale__purchase_price=0)
 
     query = """
         query {
-          pagedHousingCompanies {
-            edges {
-              node {
-                realEstatesAlt {
-                  name
-                }
-              }
+          allOwnerships {
+            owner {
+              name
+              hasSales
             }
           }
         }
@@ -351,73 +362,43 @@ def test_fields__alternate_field__one_to_many_related(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies
-    # 1 query for fetching housing companies
-    # 1 query for fetching nested developers (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    # 1 query for all ownerships with owners.
+    # 1 query for the primary keys of the owners with sales.
+    assert response.queries.count == 2, response.queries.log
 
-    assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "app_housingcompany"',
-    )
+    assert response.queries[0] == has('FROM "app_ownership"', 'INNER JOIN "app_owner"')
+    assert response.queries[0] != has("EXISTS")
     assert response.queries[1] == has(
-        'FROM "app_housingcompany"',
-    )
-    assert response.queries[2] == has(
-        'FROM "app_realestate"',
+        'SELECT DISTINCT "app_ownership"."owner_id"',
+        'FROM "app_sale"',
     )
 
-    assert response.content == {
-        "edges": [
-            {
-                "node": {
-                    "realEstatesAlt": [
-                        {"name": "1"},
-                        {"name": "2"},
-                        {"name": "3"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "realEstatesAlt": [
-                        {"name": "4"},
-                        {"name": "5"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "realEstatesAlt": [
-                        {"name": "6"},
-                    ],
-                },
-            },
-        ],
-    }
-
+    assert response.content == [
+        {"owner": {"name": "1", "hasSales": True}},
+        {"owner": {"name": "2", "hasSales": False}},
+    ]
 
-def test_fields__alternate_field__many_to_many_related(graphql_client):
-    developer_1 = DeveloperFactory.create(name="1")
-    developer_2 = DeveloperFactory.create(name="2")
-    developer_3 = DeveloperFactory.create(name="3")
-    developer_4 = DeveloperFactory.create(name="4")
-    developer_5 = DeveloperFactory.create(name="5")
 
-    HousingCompanyFactory.create(developers=[developer_1, developer_2, developer_3])
-    HousingCompanyFactory.create(developers=[developer_3, developer_4, developer_5])
-    HousingCompanyFactory.create(developers__name="6")
+def test_fields__related_values_field(graphql_client):
+    developer_1 = DeveloperFactory.create(name="b")
+    developer_2 = DeveloperFactory.create(name="a")
+    shareholder_1 = ShareholderFactory.create(name="x", share=1)
+    shareholder_2 = ShareholderFactory.create(name="y", share=2)
+    shareholder_3 = ShareholderFactory.create(name="z", share=0)
+    HousingCompanyFactory.create(
+        name="1",
+        developers=[developer_1, developer_2],
+        shareholders=[shareholder_1, shareholder_2, shareholder_3],
+    )
+    HousingCompanyFactory.create(name="2", developers=[developer_1])
+    HousingCompanyFactory.create(name="3")
 
     query = """
         query {
-          pagedHousingCompanies {
-            edges {
-              node {
-                developersAlt {
-                  name
-                }
-              }
-            }
+          allHousingCompanies {
+            name
+            developerNames
+            shareholderNames
           }
         }
     """
@@ -425,75 +406,79 @@ def test_fields__alternate_field__many_to_many_related(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies
-    # 1 query for fetching housing companies
-    # 1 query for fetching nested developers (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    # 1 query for all housing companies with the values aggregated in subqueries.
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "app_housingcompany"',
+        'JSON_GROUP_ARRAY(_array._value)',
+        'U0."name" AS "_value" FROM "app_developer" U0',
+        'U0."name" AS "_value" FROM "app_shareholder" U0',
     )
-    assert response.queries[1] == has(
-        'FROM "app_housingcompany"',
+
+    assert response.content == [
+        {"name": "1", "developerNames": ["a", "b"], "shareholderNames": ["y", "x"]},
+        {"name": "2", "developerNames": ["b"], "shareholderNames": []},
+        {"name": "3", "developerNames": [], "shareholderNames": []},
+    ]
+
+
+def test_fields__related_values_field__unsupported_database(graphql_client, monkeypatch):
+    # Simulate a database that can't aggregate the values to a JSON array in a subquery.
+    monkeypatch.setattr(SubqueryJSONArray, "vendors", ())
+
+    developer_1 = DeveloperFactory.create(name="b")
+    developer_2 = DeveloperFactory.create(name="a")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_1])
+    HousingCompanyFactory.create(name="3")
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developerNames
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all housing companies.
+    # 1 query for the developer names of all housing companies.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_housingcompany"',
     )
-    assert response.queries[2] == has(
+    assert response.queries[0] != has(
+        "JSON_GROUP_ARRAY",
+    )
+    assert response.queries[1] == has(
         'FROM "app_developer"',
     )
 
-    assert response.content == {
-        "edges": [
-            {
-                "node": {
-                    "developersAlt": [
-                        {"name": "1"},
-                        {"name": "2"},
-                        {"name": "3"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "developersAlt": [
-                        {"name": "3"},
-                        {"name": "4"},
-                        {"name": "5"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "developersAlt": [
-                        {"name": "6"},
-                    ],
-                },
-            },
-        ],
-    }
-
+    assert response.content == [
+        {"name": "1", "developerNames": ["a", "b"]},
+        {"name": "2", "developerNames": ["b"]},
+        {"name": "3", "developerNames": []},
+    ]
 
-def test_fields__alternate_field__many_to_many_related__reverse(graphql_client):
-    housing_company_1 = HousingCompanyFactory.create(name="1")
-    housing_company_2 = HousingCompanyFactory.create(name="2")
-    housing_company_3 = HousingCompanyFactory.create(name="3")
-    housing_company_4 = HousingCompanyFactory.create(name="4")
-    housing_company_5 = HousingCompanyFactory.create(name="5")
-    housing_company_6 = HousingCompanyFactory.create(name="6")
 
-    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_2, housing_company_3])
-    DeveloperFactory.create(housingcompany_set=[housing_company_3, housing_company_4, housing_company_5])
-    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_3, housing_company_6])
+def test_fields__related_values_field__filters(graphql_client):
+    real_estate = RealEstateFactory.create(name="1")
+    BuildingFactory.create(name="foo", real_estate=real_estate)
+    BuildingFactory.create(name="bar", real_estate=real_estate)
+    RealEstateFactory.create(name="2")
 
     query = """
         query {
-          pagedDevelopers {
-            edges {
-              node {
-                housingCompanies {
-                  name
-                }
-              }
-            }
+          allRealEstates {
+            name
+            buildingNames
+            fooNames: buildingNames(name: "foo")
+            reversedNames: buildingNames(orderBy: "-name")
           }
         }
     """
@@ -501,76 +486,139 @@ def test_fields__alternate_field__many_to_many_related__reverse(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting developers
-    # 1 query for fetching developers
-    # 1 query for fetching nested housing companies (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    # 1 query for all real estates with the values aggregated in subqueries.
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "app_developer"',
+        'FROM "app_realestate"',
+        'U0."name" = foo',
+        'ORDER BY U0."name" DESC',
     )
+
+    assert response.content == [
+        {"name": "1", "buildingNames": ["bar", "foo"], "fooNames": ["foo"], "reversedNames": ["foo", "bar"]},
+        {"name": "2", "buildingNames": [], "fooNames": [], "reversedNames": []},
+    ]
+
+
+def test_fields__related_values_field__select_related(graphql_client):
+    real_estate_1 = RealEstateFactory.create(name="1")
+    real_estate_2 = RealEstateFactory.create(name="2")
+    BuildingFactory.create(name="foo", real_estate=real_estate_1)
+    BuildingFactory.create(name="bar", real_estate=real_estate_1)
+    BuildingFactory.create(name="baz", real_estate=real_estate_2)
+
+    query = """
+        query {
+          allBuildings {
+            name
+            realEstate {
+              buildingNames
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all buildings with real estates.
+    # 1 query for the building names of the real estates.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has('FROM "app_building"', 'INNER JOIN "app_realestate"')
+    assert response.queries[0] != has("JSON_GROUP_ARRAY")
     assert response.queries[1] == has(
-        'FROM "app_developer"',
+        'SELECT "app_building"."real_estate_id" AS "real_estate", "app_building"."name" AS "name"',
+        'FROM "app_building"',
     )
-    assert response.queries[2] == has(
-        'FROM "app_housingcompany"',
+
+    assert response.content == [
+        {"name": "foo", "realEstate": {"buildingNames": ["bar", "foo"]}},
+        {"name": "bar", "realEstate": {"buildingNames": ["bar", "foo"]}},
+        {"name": "baz", "realEstate": {"buildingNames": ["baz"]}},
+    ]
+
+
+def test_fields__required_fields__model_property(graphql_client):
+    HousingCompanyFactory.create(name="1", street_address="Foo 1", postal_code__code="00001", city="Bar")
+    HousingCompanyFactory.create(name="2", street_address="Foo 2", postal_code__code="00002", city="Baz")
+
+    query = """
+        query {
+          allHousingCompanies {
+            address
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all housing companies with their postal codes.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        '"app_housingcompany"."street_address"',
+        '"app_housingcompany"."city"',
+        'INNER JOIN "app_postalcode"',
     )
+    assert response.queries[0] != has('"app_housingcompany"."name"')
 
-    assert response.content == {
-        "edges": [
-            {
-                "node": {
-                    "housingCompanies": [
-                        {"name": "1"},
-                        {"name": "2"},
-                        {"name": "3"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "housingCompanies": [
-                        {"name": "3"},
-                        {"name": "4"},
-                        {"name": "5"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "housingCompanies": [
-                        {"name": "1"},
-                        {"name": "3"},
-                        {"name": "6"},
-                    ],
-                },
-            },
-        ]
-    }
+    assert response.content == [
+        {"address": "Foo 1, 00001 Bar"},
+        {"address": "Foo 2, 00002 Baz"},
+    ]
 
 
-def test_fields__alternate_field__many_to_many_related__with_original(graphql_client):
-    developer_1 = DeveloperFactory.create(name="1")
-    developer_2 = DeveloperFactory.create(name="2")
-    developer_3 = DeveloperFactory.create(name="3")
-    developer_4 = DeveloperFactory.create(name="4")
-    developer_5 = DeveloperFactory.create(name="5")
-    developer_6 = DeveloperFactory.create(name="6")
+def test_fields__required_fields__resolvers(graphql_client):
+    developer_1 = DeveloperFactory.create(name="a")
+    developer_2 = DeveloperFactory.create(name="b")
+    HousingCompanyFactory.create(property_manager__email="foo@example.com", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(property_manager__email="bar@example.com", developers=[developer_2])
 
-    HousingCompanyFactory.create(developers=[developer_1, developer_2, developer_3])
-    HousingCompanyFactory.create(developers=[developer_3, developer_4, developer_5])
-    HousingCompanyFactory.create(developers=[developer_1, developer_3, developer_6])
+    query = """
+        query {
+          allHousingCompanies {
+            managerEmail
+            developerList
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all housing companies with their property managers.
+    # 1 query for the developers of the housing companies.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has(
+        '"app_propertymanager"."email"',
+        'INNER JOIN "app_propertymanager"',
+    )
+    assert response.queries[1] == has('"app_developer"."name"', 'FROM "app_developer"')
+
+    assert response.content == [
+        {"managerEmail": "foo@example.com", "developerList": "a, b"},
+        {"managerEmail": "bar@example.com", "developerList": "b"},
+    ]
+
+
+def test_fields__required_fields__resolvers__paginated_selection(graphql_client):
+    developer_1 = DeveloperFactory.create(name="a")
+    developer_2 = DeveloperFactory.create(name="b")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
 
     query = """
         query {
           pagedHousingCompanies {
             edges {
               node {
-                developersAlt {
-                  name
-                }
-                developers {
+                name
+                developerList
+                developers(first: 1) {
                   edges {
                     node {
                       name
@@ -586,111 +634,1148 @@ def test_fields__alternate_field__many_to_many_related__with_original(graphql_cl
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies
-    # 1 query for fetching housing companies
-    # 1 query for fetching nested developers
-    # 1 query for fetching nested developers (to the alternate field)
+    # 1 query for counting housing companies.
+    # 1 query for all housing companies.
+    # 1 query for the first developer of each housing company.
+    # 1 query for all developers of the housing companies required by the resolver.
     assert response.queries.count == 4, response.queries.log
 
-    assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "app_housingcompany"',
-    )
-    assert response.queries[1] == has(
-        'FROM "app_housingcompany"',
-    )
-    assert response.queries[2] == has(
-        'FROM "app_developer"',
-    )
-    assert response.queries[3] == has(
-        'FROM "app_developer"',
-        (
-            "ROW_NUMBER() OVER "
-            '(PARTITION BY "app_housingcompany_developers"."housingcompany_id" ORDER BY "app_developer"."id")'
-        ),
-    )
+    assert response.queries[2] == has('FROM "app_developer"', "ROW_NUMBER() OVER")
+    assert response.queries[3] == has('FROM "app_developer"')
+    assert response.queries[3] != has("ROW_NUMBER() OVER")
 
+    # The resolver gets all developers, even though the selection is paginated.
     assert response.content == {
         "edges": [
             {
                 "node": {
-                    "developers": {
-                        "edges": [
-                            {"node": {"name": "1"}},
-                            {"node": {"name": "2"}},
-                            {"node": {"name": "3"}},
-                        ],
-                    },
-                    "developersAlt": [
-                        {"name": "1"},
-                        {"name": "2"},
-                        {"name": "3"},
-                    ],
-                },
-            },
-            {
-                "node": {
-                    "developers": {
-                        "edges": [
-                            {"node": {"name": "3"}},
-                            {"node": {"name": "4"}},
-                            {"node": {"name": "5"}},
-                        ],
-                    },
-                    "developersAlt": [
-                        {"name": "3"},
-                        {"name": "4"},
-                        {"name": "5"},
-                    ],
+                    "name": "1",
+                    "developerList": "a, b",
+                    "developers": {"edges": [{"node": {"name": "a"}}]},
                 },
             },
             {
                 "node": {
-                    "developers": {
-                        "edges": [
-                            {"node": {"name": "1"}},
-                            {"node": {"name": "3"}},
-                            {"node": {"name": "6"}},
-                        ],
-                    },
-                    "developersAlt": [
-                        {"name": "1"},
-                        {"name": "3"},
-                        {"name": "6"},
-                    ],
+                    "name": "2",
+                    "developerList": "b",
+                    "developers": {"edges": [{"node": {"name": "b"}}]},
                 },
             },
         ],
     }
 
 
-def test_fields__alternate_field__many_to_many_related__reverse__with_original(graphql_client):
-    housing_company_1 = HousingCompanyFactory.create(name="1")
+def test_fields__required_fields__plain_object_type(graphql_client):
+    HousingCompanyFactory.create(property_manager__name="foo")
+    HousingCompanyFactory.create(property_manager__name="bar")
+
+    query = """
+        query {
+          allHousingCompanies {
+            contact {
+              managerName
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all housing companies with their property managers.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has('"app_propertymanager"."name"', 'INNER JOIN "app_propertymanager"')
+
+    assert response.content == [
+        {"contact": {"managerName": "foo"}},
+        {"contact": {"managerName": "bar"}},
+    ]
+
+
+def test_fields__annotated_field__select_related_annotation_relocated(graphql_client):
+    SaleFactory.create(
+        purchase_date=datetime.date(2024, 1, 1),
+        apartment__completion_date=datetime.date(2020, 1, 1),
+    )
+    SaleFactory.create(
+        purchase_date=datetime.date(2024, 1, 2),
+        apartment__completion_date=datetime.date(2021, 1, 1),
+    )
+    SaleFactory.create(
+        purchase_date=datetime.date(2024, 1, 3),
+        apartment__completion_date=datetime.date(2022, 1, 1),
+    )
+
+    query = """
+        query {
+          allSales {
+            purchaseDate
+            apartment {
+              completionYear
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all sales with related apartments and the annotated field.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_sale"',
+        'INNER JOIN "app_apartment"',
+        'django_date_extract(year, "app_apartment"."completion_date") AS "apartment__completion_year"',
+    )
+
+    assert response.content == [
+        {
+            "purchaseDate": "2024-01-01",
+            "apartment": {"completionYear": 2020},
+        },
+        {
+            "purchaseDate": "2024-01-02",
+            "apartment": {"completionYear": 2021},
+        },
+        {
+            "purchaseDate": "2024-01-03",
+            "apartment": {"completionYear": 2022},
+        },
+    ]
+
+
+def test_fields__annotated_field__select_related_annotation_relocated__with_alias(graphql_client):
+    RealEstateFactory.create(housing_company__name="1")
+
+    query = """
+        query {
+          allRealEstates {
+            housingCompany {
+              aliasGreeting
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all real estates with housing companies and the annotated field.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_realestate"',
+        'INNER JOIN "app_housingcompany"',
+        '"app_housingcompany"."name" AS "housing_company__alias_greeting"',
+    )
+
+    assert response.content == [{"housingCompany": {"aliasGreeting": "Hello 1!"}}]
+
+
+def test_fields__annotated_field__select_related_promoted_to_prefetch(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building__name="2")
+
+    query = """
+        query {
+          allApartments {
+            building {
+              apartmentCount
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all apartments.
+    # 1 query for all related buildings with the aggregate, which cannot be relocated to the apartments query.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has('FROM "app_apartment"')
+    assert response.queries[0] != has("JOIN")
+    assert response.queries[1] == has(
+        'FROM "app_building"',
+        'COUNT("app_apartment"."id") AS "apartment_count"',
+    )
+
+    assert response.content == [
+        {"building": {"apartmentCount": 2}},
+        {"building": {"apartmentCount": 2}},
+        {"building": {"apartmentCount": 1}},
+    ]
+
+
+def test_fields__annotated_field__select_related_annotation_relocated__in_related(graphql_client):
+    OwnershipFactory.create(
+        percentage=1,
+        sale__purchase_date=datetime.date(2024, 1, 1),
+        sale__apartment__completion_date=datetime.date(2020, 1, 1),
+    )
+    OwnershipFactory.create(
+        percentage=2,
+        sale__purchase_date=datetime.date(2024, 1, 2),
+        sale__apartment__completion_date=datetime.date(2021, 1, 1),
+    )
+    OwnershipFactory.create(
+        percentage=3,
+        sale__purchase_date=datetime.date(2024, 1, 3),
+        sale__apartment__completion_date=datetime.date(2022, 1, 1),
+    )
+
+    query = """
+        query {
+          allOwnerships {
+            percentage
+            sale {
+              purchaseDate
+              apartment {
+                completionYear
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for all ownerships with sales, apartments, and the annotated field.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_ownership"',
+        'INNER JOIN "app_sale"',
+        'INNER JOIN "app_apartment"',
+        'django_date_extract(year, "app_apartment"."completion_date") AS "sale__apartment__completion_year"',
+    )
+
+    assert response.content == [
+        {
+            "percentage": "1",
+            "sale": {
+                "purchaseDate": "2024-01-01",
+                "apartment": {"completionYear": 2020},
+            },
+        },
+        {
+            "percentage": "2",
+            "sale": {
+                "purchaseDate": "2024-01-02",
+                "apartment": {"completionYear": 2021},
+            },
+        },
+        {
+            "percentage": "3",
+            "sale": {
+                "purchaseDate": "2024-01-03",
+                "apartment": {"completionYear": 2022},
+            },
+        },
+    ]
+
+
+def test_fields__annotated_field__aliases(graphql_client):
+    HousingCompanyFactory.create(name="1")
+    HousingCompanyFactory.create(name="2")
+    HousingCompanyFactory.create(name="3")
+
+    query = """
+        query {
+          allHousingCompanies {
+            aliasGreeting
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies with the annotated field.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_housingcompany"',
+        '"app_housingcompany"."name" AS "alias_greeting"',
+    )
+
+    assert response.content == [
+        {"aliasGreeting": "Hello 1!"},
+        {"aliasGreeting": "Hello 2!"},
+        {"aliasGreeting": "Hello 3!"},
+    ]
+
+
+def test_fields__alternate_field__to_one_related(graphql_client):
+    HousingCompanyFactory.create(property_manager__name="1")
+    HousingCompanyFactory.create(property_manager__name="2")
+    HousingCompanyFactory.create(property_manager__name="3")
+
+    query = """
+        query {
+          pagedHousingCompanies {
+            edges {
+              node {
+                propertyManagerAlt {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies.
+    # 1 query for fetching housing companies and related property managers.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_housingcompany"',
+        'INNER JOIN "app_propertymanager"',
+    )
+
+    assert response.content == {
+        "edges": [
+            {"node": {"propertyManagerAlt": {"name": "1"}}},
+            {"node": {"propertyManagerAlt": {"name": "2"}}},
+            {"node": {"propertyManagerAlt": {"name": "3"}}},
+        ]
+    }
+
+
+def test_fields__alternate_field__one_to_many_related(graphql_client):
+    housing_company_1 = HousingCompanyFactory.create()
+    housing_company_2 = HousingCompanyFactory.create()
+    housing_company_3 = HousingCompanyFactory.create()
+    RealEstateFactory.create(name="1", housing_company=housing_company_1)
+    RealEstateFactory.create(name="2", housing_company=housing_company_1)
+    RealEstateFactory.create(name="3", housing_company=housing_company_1)
+    RealEstateFactory.create(name="4", housing_company=housing_company_2)
+    RealEstateFactory.create(name="5", housing_company=housing_company_2)
+    RealEstateFactory.create(name="6", housing_company=housing_company_3)
+
+    query = """
+        query {
+          pagedHousingCompanies {
+            edges {
+              node {
+                realEstatesAlt {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies
+    # 1 query for fetching housing companies
+    # 1 query for fetching nested developers (to the alternate field)
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_realestate"',
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "realEstatesAlt": [
+                        {"name": "1"},
+                        {"name": "2"},
+                        {"name": "3"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "realEstatesAlt": [
+                        {"name": "4"},
+                        {"name": "5"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "realEstatesAlt": [
+                        {"name": "6"},
+                    ],
+                },
+            },
+        ],
+    }
+
+
+def test_fields__alternate_field__many_to_many_related(graphql_client):
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    developer_3 = DeveloperFactory.create(name="3")
+    developer_4 = DeveloperFactory.create(name="4")
+    developer_5 = DeveloperFactory.create(name="5")
+
+    HousingCompanyFactory.create(developers=[developer_1, developer_2, developer_3])
+    HousingCompanyFactory.create(developers=[developer_3, developer_4, developer_5])
+    HousingCompanyFactory.create(developers__name="6")
+
+    query = """
+        query {
+          pagedHousingCompanies {
+            edges {
+              node {
+                developersAlt {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies
+    # 1 query for fetching housing companies
+    # 1 query for fetching nested developers (to the alternate field)
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_developer"',
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "developersAlt": [
+                        {"name": "1"},
+                        {"name": "2"},
+                        {"name": "3"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "developersAlt": [
+                        {"name": "3"},
+                        {"name": "4"},
+                        {"name": "5"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "developersAlt": [
+                        {"name": "6"},
+                    ],
+                },
+            },
+        ],
+    }
+
+
+def test_fields__alternate_field__many_to_many_related__reverse(graphql_client):
+    housing_company_1 = HousingCompanyFactory.create(name="1")
+    housing_company_2 = HousingCompanyFactory.create(name="2")
+    housing_company_3 = HousingCompanyFactory.create(name="3")
+    housing_company_4 = HousingCompanyFactory.create(name="4")
+    housing_company_5 = HousingCompanyFactory.create(name="5")
+    housing_company_6 = HousingCompanyFactory.create(name="6")
+
+    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_2, housing_company_3])
+    DeveloperFactory.create(housingcompany_set=[housing_company_3, housing_company_4, housing_company_5])
+    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_3, housing_company_6])
+
+    query = """
+        query {
+          pagedDevelopers {
+            edges {
+              node {
+                housingCompanies {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting developers
+    # 1 query for fetching developers
+    # 1 query for fetching nested housing companies (to the alternate field)
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_developer"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_developer"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_housingcompany"',
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "housingCompanies": [
+                        {"name": "1"},
+                        {"name": "2"},
+                        {"name": "3"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "housingCompanies": [
+                        {"name": "3"},
+                        {"name": "4"},
+                        {"name": "5"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "housingCompanies": [
+                        {"name": "1"},
+                        {"name": "3"},
+                        {"name": "6"},
+                    ],
+                },
+            },
+        ]
+    }
+
+
+def test_fields__alternate_field__many_to_many_related__with_original(graphql_client):
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    developer_3 = DeveloperFactory.create(name="3")
+    developer_4 = DeveloperFactory.create(name="4")
+    developer_5 = DeveloperFactory.create(name="5")
+    developer_6 = DeveloperFactory.create(name="6")
+
+    HousingCompanyFactory.create(developers=[developer_1, developer_2, developer_3])
+    HousingCompanyFactory.create(developers=[developer_3, developer_4, developer_5])
+    HousingCompanyFactory.create(developers=[developer_1, developer_3, developer_6])
+
+    query = """
+        query {
+          pagedHousingCompanies {
+            edges {
+              node {
+                developersAlt {
+                  name
+                }
+                developers {
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies
+    # 1 query for fetching housing companies
+    # 1 query for fetching nested developers
+    # 1 query for fetching nested developers (to the alternate field)
+    assert response.queries.count == 4, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_developer"',
+    )
+    assert response.queries[3] == has(
+        'FROM "app_developer"',
+        (
+            "ROW_NUMBER() OVER "
+            '(PARTITION BY "app_housingcompany_developers"."housingcompany_id" ORDER BY "app_developer"."id")'
+        ),
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "developers": {
+                        "edges": [
+                            {"node": {"name": "1"}},
+                            {"node": {"name": "2"}},
+                            {"node": {"name": "3"}},
+                        ],
+                    },
+                    "developersAlt": [
+                        {"name": "1"},
+                        {"name": "2"},
+                        {"name": "3"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "developers": {
+                        "edges": [
+                            {"node": {"name": "3"}},
+                            {"node": {"name": "4"}},
+                            {"node": {"name": "5"}},
+                        ],
+                    },
+                    "developersAlt": [
+                        {"name": "3"},
+                        {"name": "4"},
+                        {"name": "5"},
+                    ],
+                },
+            },
+            {
+                "node": {
+                    "developers": {
+                        "edges": [
+                            {"node": {"name": "1"}},
+                            {"node": {"name": "3"}},
+                            {"node": {"name": "6"}},
+                        ],
+                    },
+                    "developersAlt": [
+                        {"name": "1"},
+                        {"name": "3"},
+                        {"name": "6"},
+                    ],
+                },
+            },
+        ],
+    }
+
+
+def test_fields__alternate_field__many_to_many_related__reverse__with_original(graphql_client):
+    housing_company_1 = HousingCompanyFactory.create(name="1")
     housing_company_2 = HousingCompanyFactory.create(name="2")
     housing_company_3 = HousingCompanyFactory.create(name="3")
     housing_company_4 = HousingCompanyFactory.create(name="4")
     housing_company_5 = HousingCompanyFactory.create(name="5")
     housing_company_6 = HousingCompanyFactory.create(name="6")
 
-    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_2, housing_company_3])
-    DeveloperFactory.create(housingcompany_set=[housing_company_3, housing_company_4, housing_company_5])
-    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_3, housing_company_6])
+    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_2, housing_company_3])
+    DeveloperFactory.create(housingcompany_set=[housing_company_3, housing_company_4, housing_company_5])
+    DeveloperFactory.create(housingcompany_set=[housing_company_1, housing_company_3, housing_company_6])
+
+    query = """
+        query {
+          pagedDevelopers {
+            edges {
+              node {
+                housingCompanies {
+                  name
+                }
+                housingcompanySet {
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting developers
+    # 1 query for fetching developers
+    # 1 query for fetching nested housing companies
+    # 1 query for fetching nested housing companies (to the alternate field)
+    assert response.queries.count == 4, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_developer"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_developer"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_housingcompany"',
+    )
+    assert response.queries[3] == has(
+        'FROM "app_housingcompany"',
+        (
+            "ROW_NUMBER() OVER "
+            '(PARTITION BY "app_housingcompany_developers"."developer_id" ORDER BY "app_housingcompany"."id"'
+        ),
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "housingCompanies": [
+                        {"name": "1"},
+                        {"name": "2"},
+                        {"name": "3"},
+                    ],
+                    "housingcompanySet": {
+                        "edges": [
+                            {"node": {"name": "1"}},
+                            {"node": {"name": "2"}},
+                            {"node": {"name": "3"}},
+                        ]
+                    },
+                }
+            },
+            {
+                "node": {
+                    "housingCompanies": [
+                        {"name": "3"},
+                        {"name": "4"},
+                        {"name": "5"},
+                    ],
+                    "housingcompanySet": {
+                        "edges": [
+                            {"node": {"name": "3"}},
+                            {"node": {"name": "4"}},
+                            {"node": {"name": "5"}},
+                        ]
+                    },
+                }
+            },
+            {
+                "node": {
+                    "housingCompanies": [
+                        {"name": "1"},
+                        {"name": "3"},
+                        {"name": "6"},
+                    ],
+                    "housingcompanySet": {
+                        "edges": [
+                            {"node": {"name": "1"}},
+                            {"node": {"name": "3"}},
+                            {"node": {"name": "6"}},
+                        ]
+                    },
+                }
+            },
+        ]
+    }
+
+
+def test_fields__alternate_field__connection(graphql_client):
+    PropertyManagerFactory.create(housing_companies__name="1")
+    PropertyManagerFactory.create(housing_companies__name="2")
+    PropertyManagerFactory.create(housing_companies__name="3")
+
+    query = """
+        query {
+          pagedPropertyManagers {
+            edges {
+              node {
+                housingCompaniesAlt {
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting property managers
+    # 1 query for fetching property managers
+    # 1 query for fetching nested housing companies (to the alternate field)
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "app_propertymanager"',
+    )
+    assert response.queries[1] == has(
+        'FROM "app_propertymanager"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_housingcompany"',
+    )
+
+    assert response.content == {
+        "edges": [
+            {"node": {"housingCompaniesAlt": {"edges": [{"node": {"name": "1"}}]}}},
+            {"node": {"housingCompaniesAlt": {"edges": [{"node": {"name": "2"}}]}}},
+            {"node": {"housingCompaniesAlt": {"edges": [{"node": {"name": "3"}}]}}},
+        ]
+    }
+
+
+def test_fields__multi_field(graphql_client):
+    ApartmentFactory.create(shares_start=1, shares_end=2)
+    ApartmentFactory.create(shares_start=3, shares_end=4)
+    ApartmentFactory.create(shares_start=5, shares_end=6)
+
+    query = """
+        query {
+          allApartments {
+            shareRange
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Apartments
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_apartment"',
+        '"app_apartment"."shares_start"',
+        '"app_apartment"."shares_end"',
+    )
+
+    assert response.content == [
+        {"shareRange": "1 - 2"},
+        {"shareRange": "3 - 4"},
+        {"shareRange": "5 - 6"},
+    ]
+
+
+def test_fields__multi_field__related_lookups(graphql_client):
+    ApartmentFactory.create(
+        apartment_number=1,
+        building__street_address="foo",
+        building__real_estate__name="bar",
+    )
+    ApartmentFactory.create(
+        apartment_number=2,
+        building__street_address="baz",
+        building__real_estate__name="qux",
+    )
+
+    query = """
+        query {
+          allApartments {
+            fullAddress
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments with their buildings and real estates.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        '"app_apartment"."apartment_number"',
+        '"app_building"."street_address"',
+        '"app_realestate"."name"',
+        'INNER JOIN "app_building"',
+        'INNER JOIN "app_realestate"',
+    )
+    assert response.queries[0] != has('"app_building"."name"')
+
+    assert response.content == [
+        {"fullAddress": "foo 1, bar"},
+        {"fullAddress": "baz 2, qux"},
+    ]
+
+
+def test_fields__multi_field__to_many_lookups(graphql_client):
+    apartment = ApartmentFactory.create()
+    SaleFactory.create(apartment=apartment, purchase_date=datetime.date(2024, 1, 1))
+    SaleFactory.create(apartment=apartment, purchase_date=datetime.date(2024, 1, 2))
+    ApartmentFactory.create()
+
+    query = """
+        query {
+          allApartments {
+            saleDates
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching the sales of the apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[1] == has('"app_sale"."purchase_date"', 'FROM "app_sale"')
+
+    assert response.content == [
+        {"saleDates": "2024-01-01, 2024-01-02"},
+        {"saleDates": ""},
+    ]
+
+
+
+def test_fields__multi_field__filtered_selection(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building, street_address="1")
+    ApartmentFactory.create(building=building, street_address="2")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+                apartmentAddresses
+                apartments(streetAddress: "1") {
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting buildings.
+    # 1 query for all buildings.
+    # 1 query for the filtered apartments of the buildings.
+    # 1 query for all apartments of the buildings required by the multi field.
+    assert response.queries.count == 4, response.queries.log
+
+    assert response.queries[2] == has('FROM "app_apartment"', '"app_apartment"."street_address" = 1')
+    assert response.queries[3] == has('FROM "app_apartment"')
+    assert response.queries[3] != has('"app_apartment"."street_address" = 1')
+
+    # The multi field gets all apartments, even though the selection is filtered.
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "name": "1",
+                    "apartmentAddresses": "1, 2",
+                    "apartments": {"edges": [{"node": {"streetAddress": "1"}}]},
+                },
+            },
+        ],
+    }
+
+
+def test_fields__plain_field__source(graphql_client):
+    ApartmentFactory.create(street_address="foo", building__name="1")
+    ApartmentFactory.create(street_address="bar", building__name="2")
+
+    query = """
+        query {
+          allApartments {
+            streetAddressAlt
+            buildingAlt {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments with their buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        '"app_apartment"."street_address"',
+        '"app_building"."name"',
+        'INNER JOIN "app_building"',
+    )
+
+    assert response.content == [
+        {"streetAddressAlt": "foo", "buildingAlt": {"name": "1"}},
+        {"streetAddressAlt": "bar", "buildingAlt": {"name": "2"}},
+    ]
+
+
+def test_fields__plain_field__strict_custom_fields(graphql_client, settings):
+    HousingCompanyFactory.create(developers__name="foo")
+
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"STRICT_CUSTOM_FIELDS": True}
+
+    query = """
+        query {
+          allHousingCompanies {
+            firstDeveloper {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    assert response.errors[0]["message"] == (
+        "Field 'firstDeveloper' on object type 'HousingCompanyType' returns 'DeveloperType', "
+        "but cannot be optimized. Use the optimizer's field classes, the `source` argument, "
+        "or declare the model fields its resolver needs with `required_fields`."
+    )
+
+
+def test_fields__plain_field__strict_custom_fields__declared(graphql_client, settings):
+    HousingCompanyFactory.create(developers__name="foo")
+
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"STRICT_CUSTOM_FIELDS": True}
+
+    query = """
+        query {
+          allHousingCompanies {
+            firstDeveloperDeclared {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.content == [{"firstDeveloperDeclared": {"name": "foo"}}]
+
+
+def test_fields__prefetch_hook(graphql_client):
+    apartment_1 = ApartmentFactory.create(street_address="1")
+    apartment_2 = ApartmentFactory.create(street_address="2")
+    SaleFactory.create(apartment=apartment_1, purchase_price=50)
+    SaleFactory.create(apartment=apartment_1, purchase_price=150)
+    SaleFactory.create(apartment=apartment_2, purchase_price=200)
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            expensiveSales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching the expensive sales for all apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_sale"',
+        '"app_sale"."purchase_price" >= 100',
+    )
+
+    assert response.content == [
+        {"streetAddress": "1", "expensiveSales": [{"purchasePrice": "150.00"}]},
+        {"streetAddress": "2", "expensiveSales": [{"purchasePrice": "200.00"}]},
+    ]
+
+
+def test_fields__prefetch_hook__parent_not_optimized(graphql_client):
+    apartment = ApartmentFactory.create(street_address="1")
+    SaleFactory.create(apartment=apartment, purchase_price=50)
+    SaleFactory.create(apartment=apartment, purchase_price=150)
+
+    query = """
+        query {
+          firstApartment {
+            streetAddress
+            expensiveSales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching the apartment.
+    # 1 query for fetching the expensive sales for the apartment using the resolver and the hook.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_sale"',
+        '"app_sale"."purchase_price" >= 100',
+    )
+
+    assert response.content == {"streetAddress": "1", "expensiveSales": [{"purchasePrice": "150.00"}]}
+
+
+def test_fields__related_field__batched(graphql_client):
+    real_estate_1 = RealEstateFactory.create(name="1", housing_company__name="foo")
+    real_estate_2 = RealEstateFactory.create(name="2", housing_company__name="bar")
+    BuildingFactory.create(name="1", real_estate=real_estate_1)
+    BuildingFactory.create(name="2", real_estate=real_estate_2)
+    BuildingFactory.create(name="3", real_estate=real_estate_1)
 
     query = """
         query {
-          pagedDevelopers {
-            edges {
-              node {
-                housingCompanies {
-                  name
-                }
-                housingcompanySet {
-                  edges {
-                    node {
-                      name
-                    }
-                  }
-                }
+          allBuildings {
+            name
+            realEstateBatched {
+              name
+              housingCompany {
+                name
               }
             }
           }
@@ -700,101 +1785,41 @@ def test_fields__alternate_field__many_to_many_related__reverse__with_original(g
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting developers
-    # 1 query for fetching developers
-    # 1 query for fetching nested housing companies
-    # 1 query for fetching nested housing companies (to the alternate field)
-    assert response.queries.count == 4, response.queries.log
+    # 1 query for fetching buildings.
+    # 1 query for fetching the real estates and their housing companies for all buildings.
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "app_developer"',
+        '"app_building"."real_estate_id"',
+        'FROM "app_building"',
     )
+    assert response.queries[0] != has('INNER JOIN "app_realestate"')
     assert response.queries[1] == has(
-        'FROM "app_developer"',
-    )
-    assert response.queries[2] == has(
-        'FROM "app_housingcompany"',
-    )
-    assert response.queries[3] == has(
-        'FROM "app_housingcompany"',
-        (
-            "ROW_NUMBER() OVER "
-            '(PARTITION BY "app_housingcompany_developers"."developer_id" ORDER BY "app_housingcompany"."id"'
-        ),
+        'FROM "app_realestate"',
+        'INNER JOIN "app_housingcompany"',
     )
 
-    assert response.content == {
-        "edges": [
-            {
-                "node": {
-                    "housingCompanies": [
-                        {"name": "1"},
-                        {"name": "2"},
-                        {"name": "3"},
-                    ],
-                    "housingcompanySet": {
-                        "edges": [
-                            {"node": {"name": "1"}},
-                            {"node": {"name": "2"}},
-                            {"node": {"name": "3"}},
-                        ]
-                    },
-                }
-            },
-            {
-                "node": {
-                    "housingCompanies": [
-                        {"name": "3"},
-                        {"name": "4"},
-                        {"name": "5"},
-                    ],
-                    "housingcompanySet": {
-                        "edges": [
-                            {"node": {"name": "3"}},
-                            {"node": {"name": "4"}},
-                            {"node": {"name": "5"}},
-                        ]
-                    },
-                }
-            },
-            {
-                "node": {
-                    "housingCompanies": [
-                        {"name": "1"},
-                        {"name": "3"},
-                        {"name": "6"},
-                    ],
-                    "housingcompanySet": {
-                        "edges": [
-                            {"node": {"name": "1"}},
-                            {"node": {"name": "3"}},
-                            {"node": {"name": "6"}},
-                        ]
-                    },
-                }
-            },
-        ]
-    }
+    assert response.content == [
+        {"name": "1", "realEstateBatched": {"name": "1", "housingCompany": {"name": "foo"}}},
+        {"name": "2", "realEstateBatched": {"name": "2", "housingCompany": {"name": "bar"}}},
+        {"name": "3", "realEstateBatched": {"name": "1", "housingCompany": {"name": "foo"}}},
+    ]
 
 
-def test_fields__alternate_field__connection(graphql_client):
-    PropertyManagerFactory.create(housing_companies__name="1")
-    PropertyManagerFactory.create(housing_companies__name="2")
-    PropertyManagerFactory.create(housing_companies__name="3")
+def test_fields__related_field__batched__nested(graphql_client):
+    real_estate_1 = RealEstateFactory.create(name="1")
+    real_estate_2 = RealEstateFactory.create(name="2")
+    BuildingFactory.create(name="1", real_estate=real_estate_1)
+    BuildingFactory.create(name="2", real_estate=real_estate_2)
+    BuildingFactory.create(name="3", real_estate=real_estate_2)
 
     query = """
         query {
-          pagedPropertyManagers {
-            edges {
-              node {
-                housingCompaniesAlt {
-                  edges {
-                    node {
-                      name
-                    }
-                  }
-                }
+          allRealEstates {
+            buildingSet {
+              name
+              realEstateBatched {
+                name
               }
             }
           }
@@ -804,40 +1829,101 @@ def test_fields__alternate_field__connection(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers
-    # 1 query for fetching property managers
-    # 1 query for fetching nested housing companies (to the alternate field)
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings.
+    # 1 query for fetching the batched real estates for all buildings.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.content == [
+        {"buildingSet": [{"name": "1", "realEstateBatched": {"name": "1"}}]},
+        {
+            "buildingSet": [
+                {"name": "2", "realEstateBatched": {"name": "2"}},
+                {"name": "3", "realEstateBatched": {"name": "2"}},
+            ]
+        },
+    ]
+
+
+def test_fields__pre_field(graphql_client):
+    owner_1 = OwnerFactory.create()
+    owner_2 = OwnerFactory.create()
+    owner_3 = OwnerFactory.create()
+
+    query = """
+        query {
+          allOwners {
+            preField(foo:0)
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Owners
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.content == [
+        {"preField": f"{owner_1.name}-0"},
+        {"preField": f"{owner_2.name}-0"},
+        {"preField": f"{owner_3.name}-0"},
+    ]
+
+
+def test_fields__list_field__chunk_size(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="1")
+    ApartmentFactory.create(street_address="2", building__name="2")
+    ApartmentFactory.create(street_address="3", building__name="3")
+
+    query = """
+        query {
+          allBuildingsInChunks {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching all buildings.
+    # 1 query for fetching apartments for the first chunk of buildings.
+    # 1 query for fetching apartments for the second chunk of buildings.
     assert response.queries.count == 3, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "app_propertymanager"',
+        'FROM "app_building"',
     )
     assert response.queries[1] == has(
-        'FROM "app_propertymanager"',
+        'FROM "app_apartment"',
+        '"app_apartment"."building_id" IN (1, 2)',
     )
     assert response.queries[2] == has(
-        'FROM "app_housingcompany"',
+        'FROM "app_apartment"',
+        '"app_apartment"."building_id" IN (3)',
     )
 
-    assert response.content == {
-        "edges": [
-            {"node": {"housingCompaniesAlt": {"edges": [{"node": {"name": "1"}}]}}},
-            {"node": {"housingCompaniesAlt": {"edges": [{"node": {"name": "2"}}]}}},
-            {"node": {"housingCompaniesAlt": {"edges": [{"node": {"name": "3"}}]}}},
-        ]
-    }
+    assert response.content == [
+        {"name": "1", "apartments": [{"streetAddress": "1"}]},
+        {"name": "2", "apartments": [{"streetAddress": "2"}]},
+        {"name": "3", "apartments": [{"streetAddress": "3"}]},
+    ]
 
 
-def test_fields__multi_field(graphql_client):
-    ApartmentFactory.create(shares_start=1, shares_end=2)
-    ApartmentFactory.create(shares_start=3, shares_end=4)
-    ApartmentFactory.create(shares_start=5, shares_end=6)
+def test_fields__list_field__max_limit(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+    ApartmentFactory.create(street_address="4")
 
     query = """
         query {
-          allApartments {
-            shareRange
+          allApartmentsLimited {
+            streetAddress
           }
         }
     """
@@ -845,31 +1931,31 @@ def test_fields__multi_field(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for fetching Apartments
+    # 1 query for fetching apartments.
     assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
         'FROM "app_apartment"',
-        '"app_apartment"."shares_start"',
-        '"app_apartment"."shares_end"',
+        "LIMIT 3",
     )
 
     assert response.content == [
-        {"shareRange": "1 - 2"},
-        {"shareRange": "3 - 4"},
-        {"shareRange": "5 - 6"},
+        {"streetAddress": "1"},
+        {"streetAddress": "2"},
+        {"streetAddress": "3"},
     ]
 
 
-def test_fields__pre_field(graphql_client):
-    owner_1 = OwnerFactory.create()
-    owner_2 = OwnerFactory.create()
-    owner_3 = OwnerFactory.create()
+def test_fields__list_field__max_limit__first_and_offset(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+    ApartmentFactory.create(street_address="4")
 
     query = """
         query {
-          allOwners {
-            preField(foo:0)
+          allApartmentsLimited(first: 2, offset: 1) {
+            streetAddress
           }
         }
     """
@@ -877,11 +1963,112 @@ def test_fields__pre_field(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for fetching Owners
+    # 1 query for fetching apartments.
     assert response.queries.count == 1, response.queries.log
 
+    assert response.queries[0] == has(
+        'FROM "app_apartment"',
+        "LIMIT 2 OFFSET 1",
+    )
+
     assert response.content == [
-        {"preField": f"{owner_1.name}-0"},
-        {"preField": f"{owner_2.name}-0"},
-        {"preField": f"{owner_3.name}-0"},
+        {"streetAddress": "2"},
+        {"streetAddress": "3"},
+    ]
+
+
+def test_fields__list_field__max_limit__exceeded(graphql_client):
+    query = """
+        query {
+          allApartmentsLimited(first: 4) {
+            streetAddress
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.errors == [
+        {
+            "locations": [{"column": 11, "line": 3}],
+            "message": "Requesting first 4 records exceeds the limit of 3.",
+            "path": ["allApartmentsLimited"],
+        },
+    ]
+
+
+def test_fields__list_field__max_limit__nested(graphql_client):
+    building_1 = BuildingFactory.create(name="1")
+    building_2 = BuildingFactory.create(name="2")
+    ApartmentFactory.create(street_address="1", building=building_1)
+    ApartmentFactory.create(street_address="2", building=building_1)
+    ApartmentFactory.create(street_address="3", building=building_1)
+    ApartmentFactory.create(street_address="4", building=building_2)
+    ApartmentFactory.create(street_address="5", building=building_2)
+    ApartmentFactory.create(street_address="6", building=building_2)
+
+    query = """
+        query {
+          allBuildings {
+            name
+            limitedApartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments, limited separately for each building.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_apartment"',
+        'ROW_NUMBER() OVER (PARTITION BY "app_apartment"."building_id"',
+    )
+
+    assert response.content == [
+        {
+            "name": "1",
+            "limitedApartments": [{"streetAddress": "1"}, {"streetAddress": "2"}],
+        },
+        {
+            "name": "2",
+            "limitedApartments": [{"streetAddress": "4"}, {"streetAddress": "5"}],
+        },
+    ]
+
+
+def test_fields__list_field__max_limit__nested__first_and_offset(graphql_client):
+    building_1 = BuildingFactory.create(name="1")
+    building_2 = BuildingFactory.create(name="2")
+    ApartmentFactory.create(street_address="1", building=building_1)
+    ApartmentFactory.create(street_address="2", building=building_1)
+    ApartmentFactory.create(street_address="3", building=building_1)
+    ApartmentFactory.create(street_address="4", building=building_2)
+    ApartmentFactory.create(street_address="5", building=building_2)
+
+    query = """
+        query {
+          allBuildings {
+            name
+            limitedApartments(first: 1, offset: 1) {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments, limited separately for each building.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.content == [
+        {"name": "1", "limitedApartments": [{"streetAddress": "2"}]},
+        {"name": "2", "limitedApartments": [{"streetAddress": "5"}]},
     ]
@@ -1051,3 +1051,64 @@ def test_filter__aliased_queries(graphql_client):
     }
 
     assert response.queries.count == 6, response.queries.log
+
+
+def test_filter__aliased_queries__identical(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="A01", building=building)
+    ApartmentFactory.create(street_address="B01", building=building)
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+                first: apartments(streetAddress_Istartswith: "A") {
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+                second: apartments(streetAddress_Istartswith: "A") {
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+                other: apartments(streetAddress_Istartswith: "B") {
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting buildings.
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments for the identical aliases.
+    # 1 query for fetching apartments for the other alias.
+    assert response.queries.count == 4, response.queries.log
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "name": "1",
+                    "first": {"edges": [{"node": {"streetAddress": "A01"}}]},
+                    "second": {"edges": [{"node": {"streetAddress": "A01"}}]},
+                    "other": {"edges": [{"node": {"streetAddress": "B01"}}]},
+                },
+            },
+        ],
+    }
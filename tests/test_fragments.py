@@ -306,3 +306,91 @@ def test_inline_fragment__typename(graphql_client):
     # 1 query for fetching property managers.
     # 1 query for fetching owners (even if not used in the query).
     assert response.queries.count == 3, response.queries.log
+
+
+@pytest.mark.django_db(transaction=True)
+def test_inline_fragment__concurrent(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CONCURRENT_UNION_MAX_WORKERS": 3}
+
+    DeveloperFactory.create(name="1", housingcompany_set__name="2", housingcompany_set__property_manager__name="3")
+    OwnerFactory.create(name="4")
+    DeveloperFactory.create(name="5")
+
+    query = """
+        query {
+          allPeople {
+            ... on DeveloperType {
+              name
+              housingcompanySet {
+                name
+              }
+            }
+            ... on PropertyManagerType {
+              name
+            }
+            ... on OwnerType {
+              name
+              ownerships {
+                percentage
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Querysets for each model are evaluated in other threads
+    # using their own database connections, so they are not captured here.
+    assert response.queries.count == 0, response.queries.log
+
+    # Results are returned in the order of the querysets.
+    assert response.content == [
+        {"name": "1", "housingcompanySet": [{"name": "2"}]},
+        {"name": "5", "housingcompanySet": []},
+        {"name": "3"},
+        {"name": "4", "ownerships": []},
+    ]
+
+
+def test_inline_fragment__concurrent__in_transaction(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CONCURRENT_UNION_MAX_WORKERS": 3}
+
+    DeveloperFactory.create(name="1", housingcompany_set__name="2", housingcompany_set__property_manager__name="3")
+    OwnerFactory.create(name="4")
+
+    query = """
+        query {
+          allPeople {
+            ... on DeveloperType {
+              name
+              housingcompanySet {
+                name
+              }
+            }
+            ... on PropertyManagerType {
+              name
+            }
+            ... on OwnerType {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # The test runs inside a transaction, so the querysets are evaluated serially in this thread.
+    # 1 query for fetching developers.
+    # 1 query for fetching housing companies.
+    # 1 query for fetching property managers.
+    # 1 query for fetching owners.
+    assert response.queries.count == 4, response.queries.log
+
+    assert response.content == [
+        {"name": "1", "housingcompanySet": [{"name": "2"}]},
+        {"name": "3"},
+        {"name": "4"},
+    ]
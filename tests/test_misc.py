@@ -1,5 +1,16 @@
 import pytest
-
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.test import RequestFactory
+
+from example_project.app.models import Building, Developer, HousingCompany
+from example_project.app.schema import schema
+from example_project.app.utils import capture_database_queries
+from query_optimizer import prefetch_hack
+from query_optimizer.execution import ConcurrentExecutionContext
+from query_optimizer.iterables import add_post_fetch_hooks
+from query_optimizer.prefetch_hack import evaluate_in_chunks, get_parent_subquery, register_for_prefetch_hack
+from query_optimizer.settings import optimizer_settings
 from tests.factories import (
     ApartmentFactory,
     BuildingFactory,
@@ -9,7 +20,7 @@
     RealEstateFactory,
     TagFactory,
 )
-from tests.helpers import has
+from tests.helpers import has, like
 
 pytestmark = [
     pytest.mark.django_db,
@@ -464,7 +475,6 @@ def test_misc__generic_foreign_key(graphql_client):
     ]
 
 
-@pytest.mark.skip(reason="Optimization requires `GenericPrefetch` from Django 5.0")
 def test_misc__generic_foreign_key__nested_relations(graphql_client):
     postal_code_1 = PostalCodeFactory.create(code="00001")
     postal_code_2 = PostalCodeFactory.create(code="00002")
@@ -483,6 +493,7 @@ def test_misc__generic_foreign_key__nested_relations(graphql_client):
     query = """
         query {
           allTags {
+            tag
             contentObject {
               ... on PostalCodeType {
                 code
@@ -506,29 +517,81 @@ def test_misc__generic_foreign_key__nested_relations(graphql_client):
 
     assert response.queries.count == 5, response.queries.log
 
+    # 1 query for fetching tags.
+    # 1 query for fetching postal codes and 1 query for their housing companies.
+    # 1 query for fetching developers and 1 query for their housing companies.
     assert response.queries[0] == has(
         'FROM "app_tag"',
     )
     assert response.queries[1] == has(
-        'FROM "app_postalcode"',
+        'SELECT "app_postalcode"."code" FROM "app_postalcode"',
     )
     assert response.queries[2] == has(
-        'FROM "app_developer"',
+        'FROM "app_housingcompany"',
+        '"app_housingcompany"."postal_code_id"',
     )
     assert response.queries[3] == has(
-        'FROM "app_housingcompany"',
+        'SELECT "app_developer"."id", "app_developer"."name" FROM "app_developer"',
     )
     assert response.queries[4] == has(
         'FROM "app_housingcompany"',
+        '"app_housingcompany_developers"."developer_id"',
+    )
+
+    assert response.content == [
+        {"tag": "1", "contentObject": {"code": "00001", "housingCompanies": [{"name": "fizz"}]}},
+        {"tag": "2", "contentObject": {"code": "00001", "housingCompanies": [{"name": "fizz"}]}},
+        {"tag": "3", "contentObject": {"code": "00001", "housingCompanies": [{"name": "fizz"}]}},
+        {"tag": "4", "contentObject": {"code": "00002", "housingCompanies": [{"name": "buzz"}]}},
+        {"tag": "5", "contentObject": {"name": "foo", "housingcompanySet": [{"name": "fizz"}, {"name": "buzz"}]}},
+        {"tag": "6", "contentObject": {"name": "foo", "housingcompanySet": [{"name": "fizz"}, {"name": "buzz"}]}},
+    ]
+
+
+def test_misc__generic_foreign_key__fragment_spreads(graphql_client):
+    postal_code = PostalCodeFactory.create(code="00001")
+    developer = DeveloperFactory.create(name="foo")
+    TagFactory.create(tag="1", content_object=postal_code)
+    TagFactory.create(tag="2", content_object=developer)
+
+    query = """
+        query {
+          allTags {
+            tag
+            contentObject {
+              ...PostalCodeFragment
+              ...DeveloperFragment
+            }
+          }
+        }
+
+        fragment PostalCodeFragment on PostalCodeType {
+          code
+        }
+
+        fragment DeveloperFragment on DeveloperType {
+          name
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_tag"',
+    )
+    assert response.queries[1] == has(
+        'SELECT "app_postalcode"."code" FROM "app_postalcode"',
+    )
+    assert response.queries[2] == has(
+        'SELECT "app_developer"."id", "app_developer"."name" FROM "app_developer"',
     )
 
     assert response.content == [
-        {"contentObject": {"code": "00001", "housingCompanies": [{"name": "fizz"}]}},
-        {"contentObject": {"code": "00001", "housingCompanies": [{"name": "fizz"}]}},
-        {"contentObject": {"code": "00001", "housingCompanies": [{"name": "fizz"}]}},
-        {"contentObject": {"code": "00002", "housingCompanies": [{"name": "buzz"}]}},
-        {"contentObject": {"name": "foo", "housingcompanySet": [{"name": "fizz"}, {"name": "buzz"}]}},
-        {"contentObject": {"name": "foo", "housingcompanySet": [{"name": "fizz"}, {"name": "buzz"}]}},
+        {"tag": "1", "contentObject": {"code": "00001"}},
+        {"tag": "2", "contentObject": {"name": "foo"}},
     ]
 
 
@@ -597,3 +660,969 @@ def test_same_relation_multiple_times(graphql_client):
         'FROM "app_ownership"',
         'INNER JOIN "app_owner"',
     )
+
+
+def test_same_relation_multiple_times__identical_aliases(graphql_client):
+    ApartmentFactory.create(street_address="1", sales__purchase_price=100)
+    ApartmentFactory.create(street_address="2", sales__purchase_price=200)
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            first: sales {
+              purchasePrice
+            }
+            second: sales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching sales, shared by both aliases.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.content == [
+        {"streetAddress": "1", "first": [{"purchasePrice": "100.00"}], "second": [{"purchasePrice": "100.00"}]},
+        {"streetAddress": "2", "first": [{"purchasePrice": "200.00"}], "second": [{"purchasePrice": "200.00"}]},
+    ]
+
+
+def test_same_relation_multiple_times__identical_aliases__unaliased(graphql_client):
+    ApartmentFactory.create(street_address="1", sales__purchase_price=100)
+    ApartmentFactory.create(street_address="2", sales__purchase_price=200)
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            first: sales {
+              purchasePrice
+            }
+            sales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching sales, shared by the alias and the unaliased selection.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.content == [
+        {"streetAddress": "1", "first": [{"purchasePrice": "100.00"}], "sales": [{"purchasePrice": "100.00"}]},
+        {"streetAddress": "2", "first": [{"purchasePrice": "200.00"}], "sales": [{"purchasePrice": "200.00"}]},
+    ]
+
+
+def test_same_relation_multiple_times__identical_aliases__nested(graphql_client):
+    ApartmentFactory.create(building__name="1", street_address="1", sales__purchase_price=100)
+    ApartmentFactory.create(building__name="2", street_address="2", sales__purchase_price=200)
+
+    query = """
+        query {
+          allBuildings {
+            name
+            first: apartments {
+              streetAddress
+              sales {
+                purchasePrice
+              }
+            }
+            second: apartments {
+              streetAddress
+              sales {
+                purchasePrice
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments, shared by both aliases.
+    # 1 query for fetching sales.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.content == [
+        {
+            "name": "1",
+            "first": [{"streetAddress": "1", "sales": [{"purchasePrice": "100.00"}]}],
+            "second": [{"streetAddress": "1", "sales": [{"purchasePrice": "100.00"}]}],
+        },
+        {
+            "name": "2",
+            "first": [{"streetAddress": "2", "sales": [{"purchasePrice": "200.00"}]}],
+            "second": [{"streetAddress": "2", "sales": [{"purchasePrice": "200.00"}]}],
+        },
+    ]
+
+
+def test_same_relation_multiple_times__different_aliases(graphql_client):
+    ApartmentFactory.create(street_address="1", sales__purchase_price=100, sales__purchase_date="2020-01-01")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            first: sales {
+              purchasePrice
+            }
+            second: sales {
+              purchaseDate
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching sales for each alias, since their selections are different.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.content == [
+        {"streetAddress": "1", "first": [{"purchasePrice": "100.00"}], "second": [{"purchaseDate": "2020-01-01"}]},
+    ]
+
+
+def test_misc__coalesce_prefetches(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"COALESCE_PREFETCHES": True}
+
+    building_1 = BuildingFactory.create(name="1")
+    building_2 = BuildingFactory.create(name="2")
+    ApartmentFactory.create(building=building_1, street_address="1", stair="A", sales__purchase_price=100)
+    ApartmentFactory.create(building=building_1, street_address="2", stair="B")
+    ApartmentFactory.create(building=building_2, street_address="3", stair="C")
+
+    query = """
+        query {
+          allBuildings {
+            name
+            apartments {
+              streetAddress
+              sales {
+                purchasePrice
+              }
+            }
+            second: apartments {
+              stair
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments for both fields.
+    # 1 query for fetching sales.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_apartment"',
+        "UNION ALL",
+    )
+    assert response.queries[2] == has(
+        'FROM "app_sale"',
+    )
+
+    assert response.content == [
+        {
+            "name": "1",
+            "apartments": [
+                {"streetAddress": "1", "sales": [{"purchasePrice": "100.00"}]},
+                {"streetAddress": "2", "sales": []},
+            ],
+            "second": [{"stair": "A"}, {"stair": "B"}],
+        },
+        {
+            "name": "2",
+            "apartments": [{"streetAddress": "3", "sales": []}],
+            "second": [{"stair": "C"}],
+        },
+    ]
+
+
+def test_misc__coalesce_prefetches__parameter_limit(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"COALESCE_PREFETCHES": True}
+
+    buildings = BuildingFactory.create_batch(340)
+    ApartmentFactory.create(building=buildings[0], street_address="1", stair="A", floor=1)
+    ApartmentFactory.create(building=buildings[-1], street_address="2", stair="B", floor=2)
+
+    query = """
+        query {
+          allBuildings {
+            apartments {
+              streetAddress
+            }
+            second: apartments {
+              stair
+            }
+            third: apartments {
+              floor
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 3 queries for fetching apartments for all fields in chunks.
+    # SQLite allows 999 parameters, so at most 165 buildings fit in a chunk with 3 coalesced prefetches.
+    assert response.queries.count == 4, response.queries.log
+
+    for query in response.queries[1:]:
+        assert query == has('FROM "app_apartment"', "UNION ALL")
+
+    assert response.content[0] == {
+        "apartments": [{"streetAddress": "1"}],
+        "second": [{"stair": "A"}],
+        "third": [{"floor": 1}],
+    }
+    assert response.content[-1] == {
+        "apartments": [{"streetAddress": "2"}],
+        "second": [{"stair": "B"}],
+        "third": [{"floor": 2}],
+    }
+    assert all(item["apartments"] == [] for item in response.content[1:-1])
+
+
+def test_misc__coalesce_prefetches__many_to_many(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"COALESCE_PREFETCHES": True}
+
+    developer_1 = DeveloperFactory.create(name="1", description="foo")
+    developer_2 = DeveloperFactory.create(name="2", description="bar")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+            other: developers {
+              description
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers for both fields.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_developer"',
+        "UNION ALL",
+    )
+
+    assert response.content == [
+        {
+            "name": "1",
+            "developers": [{"name": "1"}, {"name": "2"}],
+            "other": [{"description": "foo"}, {"description": "bar"}],
+        },
+        {
+            "name": "2",
+            "developers": [{"name": "2"}],
+            "other": [{"description": "bar"}],
+        },
+    ]
+
+
+def test_misc__deduplicate_many_to_many_prefetches(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"DEDUPLICATE_MANY_TO_MANY_PREFETCHES": True}
+
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
+    HousingCompanyFactory.create(name="3", developers=[])
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies.
+    # 1 query for fetching the related developer ids from the through table.
+    # 1 query for fetching each distinct developer once.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_housingcompany_developers"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_developer"',
+        'WHERE "app_developer"."id" IN',
+    )
+    assert 'INNER JOIN "app_housingcompany_developers"' not in response.queries[2]
+
+    assert response.content == [
+        {"name": "1", "developers": [{"name": "1"}, {"name": "2"}]},
+        {"name": "2", "developers": [{"name": "2"}]},
+        {"name": "3", "developers": []},
+    ]
+
+
+def test_misc__deduplicate_many_to_many_prefetches__reverse(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"DEDUPLICATE_MANY_TO_MANY_PREFETCHES": True}
+
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
+
+    query = """
+        query {
+          allDevelopers {
+            name
+            housingcompanySet {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching developers.
+    # 1 query for fetching the related housing company ids from the through table.
+    # 1 query for fetching each distinct housing company once.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[1] == has(
+        'FROM "app_housingcompany_developers"',
+    )
+    assert response.queries[2] == has(
+        'FROM "app_housingcompany"',
+    )
+
+    assert response.content == [
+        {"name": "1", "housingcompanySet": [{"name": "1"}]},
+        {"name": "2", "housingcompanySet": [{"name": "1"}, {"name": "2"}]},
+    ]
+
+
+def test_misc__prefetch_in_chunks(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"PREFETCH_CHUNK_SIZE": 2}
+
+    housing_company_1 = HousingCompanyFactory.create(name="1")
+    housing_company_2 = HousingCompanyFactory.create(name="2")
+    housing_company_3 = HousingCompanyFactory.create(name="3")
+    BuildingFactory.create(name="1", real_estate__name="1", real_estate__housing_company=housing_company_1)
+    BuildingFactory.create(name="2", real_estate__name="2", real_estate__housing_company=housing_company_2)
+    BuildingFactory.create(name="3", real_estate__name="3", real_estate__housing_company=housing_company_3)
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            realEstates {
+              name
+              buildingSet {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies.
+    # 2 queries for fetching real estates, one for each chunk of housing companies.
+    # 2 queries for fetching buildings, one for the real estates of each chunk.
+    assert response.queries.count == 5, response.queries.log
+
+    assert response.queries[1] == like(r'.*FROM "app_realestate" WHERE "app_realestate"."housing_company_id" IN \(\d+, \d+\).*')
+    assert response.queries[2] == like(r'.*FROM "app_building" WHERE "app_building"."real_estate_id" IN \(\d+, \d+\).*')
+    assert response.queries[3] == like(r'.*FROM "app_realestate" WHERE "app_realestate"."housing_company_id" IN \(\d+\).*')
+    assert response.queries[4] == like(r'.*FROM "app_building" WHERE "app_building"."real_estate_id" IN \(\d+\).*')
+
+    assert response.content == [
+        {"name": "1", "realEstates": [{"name": "1", "buildingSet": [{"name": "1"}]}]},
+        {"name": "2", "realEstates": [{"name": "2", "buildingSet": [{"name": "2"}]}]},
+        {"name": "3", "realEstates": [{"name": "3", "buildingSet": [{"name": "3"}]}]},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_misc__concurrent_prefetch(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CONCURRENT_PREFETCH_MAX_WORKERS": 2}
+
+    housing_company = HousingCompanyFactory.create(name="1", developers__name="2")
+    RealEstateFactory.create(name="3", housing_company=housing_company)
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+            realEstates {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies.
+    # Prefetches for developers and real estates are made in other threads
+    # using their own database connections, so they are not captured here.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_housingcompany"',
+    )
+
+    assert response.content == [
+        {
+            "name": "1",
+            "developers": [{"name": "2"}],
+            "realEstates": [{"name": "3"}],
+        },
+    ]
+
+
+def test_misc__concurrent_prefetch__in_transaction(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CONCURRENT_PREFETCH_MAX_WORKERS": 2}
+
+    housing_company = HousingCompanyFactory.create(name="1", developers__name="2")
+    RealEstateFactory.create(name="3", housing_company=housing_company)
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+            realEstates {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # The test runs inside a transaction, so the prefetches are made serially in this thread.
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers.
+    # 1 query for fetching real estates.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.content == [
+        {
+            "name": "1",
+            "developers": [{"name": "2"}],
+            "realEstates": [{"name": "3"}],
+        },
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_misc__concurrent_root_fields():
+    ApartmentFactory.create(street_address="1", building__name="2", building__real_estate__name="3")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+          allBuildings {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+          allRealEstates {
+            name
+          }
+        }
+    """
+
+    request = RequestFactory().post("/graphql/")
+    with capture_database_queries() as queries:
+        result = schema.execute(query, context_value=request, execution_context_class=ConcurrentExecutionContext)
+
+    assert result.errors is None, result.errors
+
+    # All root fields are executed in other threads using their own database connections,
+    # so no queries should be made using the connection of this thread.
+    assert queries.count == 0, queries.log
+
+    assert result.data == {
+        "allApartments": [{"streetAddress": "1", "building": {"name": "2"}}],
+        "allBuildings": [{"name": "2", "apartments": [{"streetAddress": "1"}]}],
+        "allRealEstates": [{"name": "3"}],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_misc__concurrent_root_fields__shared_context(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"MAX_QUERIES": 10}
+
+    BuildingFactory.create(name="1", real_estate__name="2")
+
+    query = """
+        query {
+          allBuildings {
+            realEstateBatched {
+              name
+            }
+          }
+          second: allBuildings {
+            realEstateBatched {
+              name
+            }
+          }
+        }
+    """
+
+    request = RequestFactory().post("/graphql/")
+    result = schema.execute(query, context_value=request, execution_context_class=ConcurrentExecutionContext)
+
+    assert result.errors is None, result.errors
+
+    # Both root fields count their queries towards the same budget:
+    # 1 query for fetching buildings and 1 query for fetching real estates for each root field.
+    assert request.optimizer_budget.queries == 4
+
+    # Both root fields add their batch loaders to the same request-scoped loaders.
+    assert len(request.optimizer_batch_loaders) == 2
+
+    assert result.data == {
+        "allBuildings": [{"realEstateBatched": {"name": "2"}}],
+        "second": [{"realEstateBatched": {"name": "2"}}],
+    }
+
+
+def test_misc__concurrent_root_fields__in_transaction():
+    ApartmentFactory.create(street_address="1", building__name="2")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+          allBuildings {
+            name
+          }
+        }
+    """
+
+    request = RequestFactory().post("/graphql/")
+    with capture_database_queries() as queries:
+        result = schema.execute(query, context_value=request, execution_context_class=ConcurrentExecutionContext)
+
+    assert result.errors is None, result.errors
+
+    # The test runs inside a transaction, so the root fields are executed serially in this thread.
+    # 1 query for fetching apartments.
+    # 1 query for fetching buildings.
+    assert queries.count == 2, queries.log
+
+    assert result.data == {
+        "allApartments": [{"streetAddress": "1"}],
+        "allBuildings": [{"name": "2"}],
+    }
+
+
+def test_misc__max_queries(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"MAX_QUERIES": 2}
+
+    ApartmentFactory.create(building__name="1", building__real_estate__name="1")
+
+    query = """
+        query {
+          allRealEstates {
+            name
+            buildingSet {
+              name
+              apartments {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    assert response.errors[0]["message"] == "Operation exceeds the maximum allowed of 2 database queries"
+
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments, which is stopped before it's executed.
+    assert response.queries.count == 3, response.queries.log
+
+
+def test_misc__max_queries__whole_operation(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"MAX_QUERIES": 2}
+
+    ApartmentFactory.create(building__name="1", building__real_estate__name="1")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+          allBuildings {
+            name
+          }
+          allRealEstates {
+            name
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    # Queries made for all root fields are counted towards the same budget.
+    assert len(response.errors) == 1, response.errors
+    assert response.errors[0]["message"] == "Operation exceeds the maximum allowed of 2 database queries"
+    assert response.errors[0]["path"] == ["allRealEstates"]
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching buildings.
+    # 1 query for fetching real estates, which is stopped before it's executed.
+    assert response.queries.count == 3, response.queries.log
+
+
+def test_misc__max_queries__connection_count(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"MAX_QUERIES": 1}
+
+    ApartmentFactory.create(street_address="1")
+
+    query = """
+        query {
+          pagedApartments {
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    # The count query of the connection is counted towards the budget.
+    assert response.errors[0]["message"] == "Operation exceeds the maximum allowed of 1 database queries"
+
+    # 1 query for counting apartments.
+    # 1 query for fetching apartments, which is stopped before it's executed.
+    assert response.queries.count == 2, response.queries.log
+
+
+def test_misc__max_rows(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"MAX_ROWS": 3}
+
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allBuildings {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    # 1 building and 3 apartments are fetched.
+    assert response.errors[0]["message"] == "Operation exceeds the maximum allowed of 3 fetched rows"
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+
+
+def test_misc__max_db_time(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"MAX_DB_TIME": 1e-9}
+
+    ApartmentFactory.create(building__name="1")
+
+    query = """
+        query {
+          allBuildings {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    assert response.errors[0]["message"] == (
+        "Operation exceeds the maximum allowed of 1e-09 seconds of database time"
+    )
+
+    # Time is checked after the query for fetching buildings is made.
+    assert response.queries.count == 1, response.queries.log
+
+
+def test_misc__resource_budget__field(graphql_client):
+    ApartmentFactory.create(building__name="1")
+
+    query = """
+        query {
+          allBuildingsBudgeted {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    assert response.errors[0]["message"] == "Field 'allBuildingsBudgeted' exceeds the maximum allowed of 1 database queries"
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments, which is stopped before it's executed.
+    assert response.queries.count == 2, response.queries.log
+
+
+def test_misc__resource_budget__field__within_limits(graphql_client):
+    ApartmentFactory.create(building__name="1")
+    ApartmentFactory.create(building__name="2")
+
+    query = """
+        query {
+          allBuildingsBudgeted {
+            name
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.content == [{"name": "1"}, {"name": "2"}]
+
+
+def test_misc__resource_budget__object_type(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allBuildingsWithBudget {
+            name
+            apartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    # 1 building and 3 apartments are fetched.
+    assert response.errors[0]["message"] == "Field 'allBuildingsWithBudget' exceeds the maximum allowed of 3 fetched rows"
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+
+
+def test_misc__resource_budget__nested_field(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allBuildings {
+            name
+            budgetedApartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    # Limits set on a nested field are checked when its prefetch is made.
+    assert response.errors[0]["message"] == "Field 'budgetedApartments' exceeds the maximum allowed of 1 fetched rows"
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+
+
+def test_misc__resource_budget__nested_object_type(graphql_client):
+    real_estate = RealEstateFactory.create(name="1")
+    building = BuildingFactory.create(real_estate=real_estate)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allRealEstates {
+            name
+            buildingsWithBudget {
+              name
+              apartments {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+
+    # Limits set on the object type of a nested field also cover the field's own prefetches:
+    # 1 building and 3 apartments are fetched.
+    assert response.errors[0]["message"] == "Field 'buildingsWithBudget' exceeds the maximum allowed of 3 fetched rows"
+
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 3, response.queries.log
+
+
+def test_misc__resource_budget__nested_field__within_limits(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="1")
+    BuildingFactory.create(name="2")
+
+    query = """
+        query {
+          allBuildings {
+            name
+            budgetedApartments {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # The limits cover the prefetch for all buildings, not each building separately.
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.content == [
+        {"name": "1", "budgetedApartments": [{"streetAddress": "1"}]},
+        {"name": "2", "budgetedApartments": []},
+    ]
+
+
+def test_misc__evaluate_in_chunks__prefetch_hack_cache(monkeypatch):
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    HousingCompanyFactory.create(name="1", developers=[developer_1])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
+
+    prefetch_queryset = Developer.objects.all()
+    register_for_prefetch_hack(prefetch_queryset, HousingCompany._meta.get_field("developers"))
+    queryset = HousingCompany.objects.order_by("pk").prefetch_related(Prefetch("developers", prefetch_queryset))
+
+    used_aliases: list[set[str]] = []
+    filter_prefetch_queryset = prefetch_hack._filter_prefetch_queryset
+
+    def spy(queryset, field_name, instances):
+        used_aliases.append(set(queryset.query.used_aliases))
+        return filter_prefetch_queryset(queryset, field_name, instances)
+
+    monkeypatch.setattr(prefetch_hack, "_filter_prefetch_queryset", spy)
+
+    chunks = list(evaluate_in_chunks(queryset, chunk_size=1))
+
+    # The prefetch hack is applied with the same prefetch queryset for both chunks.
+    assert used_aliases == [{"app_housingcompany_developers"}, {"app_housingcompany_developers"}]
+
+    # The cache is removed from the prefetch queryset once the queryset has been evaluated.
+    assert optimizer_settings.PREFETCH_HACK_CACHE_KEY not in prefetch_queryset._hints
+
+    names = [[developer.name for developer in company.developers.all()] for chunk in chunks for company in chunk]
+    assert names == [["1"], ["2"]]
+
+
+def test_misc__record_source_queryset__limited_without_total_ordering():
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="1")
+
+    def fetch(queryset):
+        add_post_fetch_hooks(queryset, [])
+        queryset._hints[optimizer_settings.PREFETCH_SOURCE_QUERYSET_KEY] = True
+        return list(queryset)
+
+    # The database can pick either building when the query is executed again as a subquery,
+    # so prefetches for a sliced query without a total ordering need to use the primary keys.
+    assert get_parent_subquery(fetch(Building.objects.order_by("name")[:1])) is None
+    assert get_parent_subquery(fetch(Building.objects.order_by("name", "pk")[:1])) is not None
+    assert get_parent_subquery(fetch(Building.objects.order_by("name"))) is not None
+
+    # Same for queries paginated with a window function.
+    window = Window(RowNumber(), partition_by=F("real_estate"), order_by="name")
+    assert get_parent_subquery(fetch(Building.objects.alias(idx=window).filter(idx__lte=1))) is None
+
+    window = Window(RowNumber(), partition_by=F("real_estate"), order_by=["name", "-pk"])
+    assert get_parent_subquery(fetch(Building.objects.alias(idx=window).filter(idx__lte=1))) is not None
@@ -10,6 +10,7 @@
     DeveloperFactory,
     HousingCompanyFactory,
     PropertyManagerFactory,
+    RealEstateFactory,
 )
 from tests.helpers import has, like
 
@@ -1126,3 +1127,173 @@ def test_pagination__nested__has_next_page__last_page(graphql_client):
     assert response.no_errors, response.errors
 
     assert response.content == {"apartments": {"pageInfo": {"hasNextPage": False}}}
+
+
+def test_pagination__nested__many_to_many__chunked(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"PREFETCH_CHUNK_SIZE": 2}
+
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
+    HousingCompanyFactory.create(name="3", developers=[developer_1, developer_2])
+
+    query = """
+        query {
+          pagedHousingCompanies {
+            edges {
+              node {
+                name
+                developers(first: 1) {
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies.
+    # 1 query for fetching housing companies.
+    # 2 queries for fetching developers, one for each chunk of housing companies.
+    assert response.queries.count == 4, response.queries.log
+
+    for index in (2, 3):
+        assert response.queries[index] == has(
+            'FROM "app_developer"',
+            'ROW_NUMBER() OVER (PARTITION BY "app_housingcompany_developers"."housingcompany_id"',
+        )
+
+    assert response.content == {
+        "edges": [
+            {"node": {"name": "1", "developers": {"edges": [{"node": {"name": "1"}}]}}},
+            {"node": {"name": "2", "developers": {"edges": [{"node": {"name": "2"}}]}}},
+            {"node": {"name": "3", "developers": {"edges": [{"node": {"name": "1"}}]}}},
+        ]
+    }
+
+
+def test_pagination__nested__parent_subquery(graphql_client):
+    housing_company_1 = HousingCompanyFactory.create(name="1")
+    housing_company_2 = HousingCompanyFactory.create(name="2")
+    HousingCompanyFactory.create(name="3")
+    real_estate_1 = RealEstateFactory.create(name="1", housing_company=housing_company_1)
+    RealEstateFactory.create(name="2", housing_company=housing_company_1)
+    real_estate_3 = RealEstateFactory.create(name="3", housing_company=housing_company_2)
+    BuildingFactory.create(name="1", real_estate=real_estate_1)
+    BuildingFactory.create(name="2", real_estate=real_estate_1)
+    BuildingFactory.create(name="3", real_estate=real_estate_3)
+
+    query = """
+        query {
+          pagedHousingCompanies(first: 2) {
+            edges {
+              node {
+                name
+                realEstatesBySubquery(first: 1) {
+                  edges {
+                    node {
+                      name
+                      buildingsBySubquery {
+                        edges {
+                          node {
+                            name
+                          }
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies.
+    # 1 query for fetching housing companies.
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings.
+    assert response.queries.count == 4, response.queries.log
+
+    # Real estates are filtered with a subquery of the housing company query, including its limit.
+    assert response.queries[2] == like(
+        r'.*FROM "app_realestate" WHERE "app_realestate"."housing_company_id" IN '
+        r'\(SELECT U0."id" AS "pk" FROM "app_housingcompany" U0 .*LIMIT 2\).*'
+    )
+    # Buildings are filtered with a subquery of the real estate query, including its pagination.
+    assert response.queries[3] == like(
+        r'.*FROM "app_building" .*"app_building"."real_estate_id" IN \(SELECT .*FROM "app_realestate" .*'
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "name": "1",
+                    "realEstatesBySubquery": {
+                        "edges": [{"node": {"name": "1", "buildingsBySubquery": {"edges": [{"node": {"name": "1"}}, {"node": {"name": "2"}}]}}}],
+                    },
+                },
+            },
+            {
+                "node": {
+                    "name": "2",
+                    "realEstatesBySubquery": {
+                        "edges": [{"node": {"name": "3", "buildingsBySubquery": {"edges": [{"node": {"name": "3"}}]}}}],
+                    },
+                },
+            },
+        ]
+    }
+
+
+def test_pagination__nested__parent_subquery__many_to_many(graphql_client):
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    HousingCompanyFactory.create(name="1", developers=[developer_1, developer_2])
+    HousingCompanyFactory.create(name="2", developers=[developer_2])
+
+    query = """
+        query {
+          pagedHousingCompanies(name_Iexact: "2") {
+            edges {
+              node {
+                name
+                developersBySubquery {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting housing companies.
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers.
+    assert response.queries.count == 3, response.queries.log
+
+    assert response.queries[2] == like(
+        r'.*FROM "app_developer" INNER JOIN "app_housingcompany_developers" .*'
+        r'"app_housingcompany_developers"."housingcompany_id" IN \(SELECT .*FROM "app_housingcompany" .*'
+    )
+
+    assert response.content == {
+        "edges": [
+            {"node": {"name": "2", "developersBySubquery": [{"name": "2"}]}},
+        ]
+    }
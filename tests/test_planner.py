@@ -0,0 +1,160 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+
+from example_project.app.models import Building, RealEstate
+from example_project.app.utils import capture_database_queries
+from query_optimizer.planner import clear_table_statistics, estimate_row_count, estimate_row_width, fetch_row_count
+from tests.factories import BuildingFactory, RealEstateFactory, SaleFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture(autouse=True)
+def _clear_table_statistics():
+    clear_table_statistics()
+    yield
+    clear_table_statistics()
+
+
+def test_planner__related_field_strategy(graphql_client):
+    SaleFactory.create(apartment__street_address="1")
+    SaleFactory.create(apartment__street_address="2")
+
+    query = """
+        query {
+          allSales {
+            prefetchedApartment {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Sales.
+    # 1 query for fetching Apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has('FROM "app_sale"')
+    assert response.queries[0] != has("JOIN")
+    assert response.queries[1] == has('FROM "app_apartment"')
+
+    assert response.content == [
+        {"prefetchedApartment": {"streetAddress": "1"}},
+        {"prefetchedApartment": {"streetAddress": "2"}},
+    ]
+
+
+def test_planner__cost_based_to_one_planning(graphql_client, settings):
+    real_estate = RealEstateFactory.create(name="1")
+    BuildingFactory.create_batch(10, real_estate=real_estate)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    assert estimate_row_count(Building) == 10
+    assert estimate_row_count(RealEstate) == 1
+
+    settings.GRAPHQL_QUERY_OPTIMIZER = {
+        "COST_BASED_TO_ONE_PLANNING": True,
+        "PREFETCH_ROUND_TRIP_COST": 0,
+    }
+
+    query = """
+        query {
+          allBuildings {
+            realEstate {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching Buildings.
+    # 1 query for fetching the RealEstate shared by all Buildings.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has('FROM "app_building"')
+    assert response.queries[0] != has("JOIN")
+    assert response.queries[1] == has('FROM "app_realestate"')
+
+    assert response.content == [{"realEstate": {"name": "1"}}] * 10
+
+
+def test_planner__cost_based_to_one_planning__no_statistics(graphql_client, settings):
+    real_estate = RealEstateFactory.create(name="1")
+    BuildingFactory.create_batch(2, real_estate=real_estate)
+
+    settings.GRAPHQL_QUERY_OPTIMIZER = {
+        "COST_BASED_TO_ONE_PLANNING": True,
+        "PREFETCH_ROUND_TRIP_COST": 0,
+    }
+
+    query = """
+        query {
+          allBuildings {
+            realEstate {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 2 queries for fetching table statistics (which don't exist).
+    # 2 queries for rolling back the failed statistics queries to their savepoints.
+    # 1 query for fetching Buildings and related RealEstates.
+    assert response.queries.count == 5, response.queries.log
+
+    assert response.queries[1] == has("ROLLBACK TO SAVEPOINT")
+    assert response.queries[3] == has("ROLLBACK TO SAVEPOINT")
+    assert response.queries[4] == has('FROM "app_building"', 'INNER JOIN "app_realestate"')
+
+
+def test_planner__estimate_row_width():
+    assert estimate_row_width(Building, ["name"]) == 200
+    assert estimate_row_width(Building, ["name", "real_estate_id"]) == 208
+    assert estimate_row_width(Building, ["real_estate__name"]) == 200
+
+
+def test_planner__estimate_row_count__async():
+    BuildingFactory.create_batch(2)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    async def estimate() -> int | None:
+        return estimate_row_count(Building)
+
+    # Statistics are not fetched inside the event loop, since that would raise 'SynchronousOnlyOperation'.
+    assert async_to_sync(estimate)() is None
+
+    # Cached statistics are used inside the event loop.
+    assert estimate_row_count(Building) == 2
+    assert async_to_sync(estimate)() == 2
+
+
+def test_planner__fetch_row_count__postgresql_table_name(monkeypatch):
+    monkeypatch.setattr(connection, "vendor", "postgresql")
+
+    with capture_database_queries() as queries:
+        # 'to_regclass' doesn't exist on SQLite, so the query fails.
+        assert fetch_row_count("default", "App_Building") is None
+
+    # The table name is quoted, so that mixed case names are not folded to lower case.
+    assert queries[0] == has("to_regclass(", '"App_Building"')
+
+    # The transaction can still be used after the failed query.
+    assert queries[1] == has("ROLLBACK TO SAVEPOINT")
+    assert Building.objects.count() == 0
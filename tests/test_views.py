@@ -0,0 +1,201 @@
+from unittest.mock import patch
+
+import pytest
+
+from query_optimizer.compiler import OptimizationCompiler
+from query_optimizer.views import document_cache
+from tests.factories import ApartmentFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture(autouse=True)
+def _clear_document_cache():
+    document_cache.clear()
+    yield
+    document_cache.clear()
+
+
+def test_views__document_cache(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="2")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, graphql_url="/graphql/optimized/")
+    assert response.no_errors, response.errors
+
+    info = document_cache.cache_info()
+    assert info.hits == 0
+    assert info.misses == 1
+    assert info.currsize == 1
+
+    response = graphql_client(query, graphql_url="/graphql/optimized/")
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments with their buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_apartment"',
+        'INNER JOIN "app_building"',
+    )
+
+    assert response.content == [{"streetAddress": "1", "building": {"name": "2"}}]
+
+    info = document_cache.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+
+def test_views__document_cache__validation_errors(graphql_client):
+    query = """
+        query {
+          allApartments {
+            foo
+          }
+        }
+    """
+
+    response = graphql_client(query, graphql_url="/graphql/optimized/")
+    assert response.errors[0]["message"] == "Cannot query field 'foo' on type 'ApartmentType'. Did you mean 'floor'?"
+
+    response = graphql_client(query, graphql_url="/graphql/optimized/")
+    assert response.errors[0]["message"] == "Cannot query field 'foo' on type 'ApartmentType'. Did you mean 'floor'?"
+
+    info = document_cache.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+
+def test_views__document_cache__max_size(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"DOCUMENT_CACHE_MAX_SIZE": 1}
+
+    response = graphql_client("query { allApartments { pk } }", graphql_url="/graphql/optimized/")
+    assert response.no_errors, response.errors
+
+    response = graphql_client("query { allBuildings { pk } }", graphql_url="/graphql/optimized/")
+    assert response.no_errors, response.errors
+
+    info = document_cache.cache_info()
+    assert info.misses == 2
+    assert info.maxsize == 1
+    assert info.currsize == 1
+
+
+def test_views__document_cache__optimization_plans(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CACHE_OPTIMIZATION_PLANS": True}
+
+    ApartmentFactory.create(street_address="1", building__name="2")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    with patch.object(OptimizationCompiler, "run", autospec=True, side_effect=OptimizationCompiler.run) as run:
+        response = graphql_client(query, graphql_url="/graphql/optimized/")
+        assert response.no_errors, response.errors
+        assert run.call_count == 1
+
+        response = graphql_client(query, graphql_url="/graphql/optimized/")
+        assert response.no_errors, response.errors
+        # Optimizations were reused from the first request.
+        assert run.call_count == 1
+
+    # 1 query for fetching apartments with their buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_apartment"',
+        'INNER JOIN "app_building"',
+    )
+
+    assert response.content == [{"streetAddress": "1", "building": {"name": "2"}}]
+
+
+def test_views__document_cache__optimization_plans__operations(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CACHE_OPTIMIZATION_PLANS": True}
+
+    ApartmentFactory.create(street_address="1", building__name="2")
+
+    query = """
+        query Addresses {
+          allApartments {
+            streetAddress
+          }
+        }
+        query Buildings {
+          allApartments {
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, operation_name="Addresses", graphql_url="/graphql/optimized/")
+    assert response.no_errors, response.errors
+
+    response = graphql_client(query, operation_name="Buildings", graphql_url="/graphql/optimized/")
+    assert response.no_errors, response.errors
+
+    # Plans are cached separately for the fields of each operation.
+    # 1 query for fetching apartments with their buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "app_apartment"',
+        'INNER JOIN "app_building"',
+    )
+
+    assert response.content == [{"building": {"name": "2"}}]
+
+    # Cached plans don't keep a reference to the request they were compiled for.
+    (cached,) = document_cache.cache.values()
+    assert len(cached.plans.plans) == 2
+    assert all(plan.info is None for plan in cached.plans.plans.values())
+
+
+def test_views__document_cache__syntax_error(graphql_client):
+    response = graphql_client("query { allApartments {", graphql_url="/graphql/optimized/")
+    assert response.errors[0]["message"] == "Syntax Error: Expected Name, found <EOF>."
+
+    response = graphql_client("query { allApartments {", graphql_url="/graphql/optimized/")
+    assert response.errors[0]["message"] == "Syntax Error: Expected Name, found <EOF>."
+
+    info = document_cache.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+
+def test_views__document_cache__other_views(graphql_client):
+    ApartmentFactory.create(street_address="1")
+
+    response = graphql_client("query { allApartments { streetAddress } }")
+    assert response.no_errors, response.errors
+
+    assert response.content == [{"streetAddress": "1"}]
+
+    # Other views parse and validate the document as usual.
+    info = document_cache.cache_info()
+    assert info.misses == 0
+    assert info.currsize == 0